@@ -0,0 +1,23 @@
+"""Apps file for setting core module fancy tree registry app package when app is ready"""
+
+from django.apps import AppConfig
+
+
+class InitApp(AppConfig):
+    """Core module fancy tree registry app application settings"""
+
+    name = "core_module_fancy_tree_registry_app"
+    verbose_name = "Core Module Fancy Tree Registry App"
+
+    def ready(self):
+        """Run when the app is ready.
+
+        Returns:
+
+        """
+        from core_module_fancy_tree_registry_app.utils import (
+            watch as fancy_tree_watch,
+        )
+
+        # Invalidate the cached trees on category and refinement changes
+        fancy_tree_watch.init()
@@ -0,0 +1,182 @@
+"""Warm up the fancy tree caches command"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.models import User
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+from django.http import HttpRequest
+
+from core_main_registry_app.components.refinement import (
+    api as refinement_api,
+)
+from core_main_registry_app.components.template import (
+    api as template_registry_api,
+)
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_LAZY_LOADING,
+    FANCY_TREE_WARM_UP_WORKERS,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+)
+from core_module_fancy_tree_registry_app.views.forms import RefinementForm
+
+# field of the form rendering the tree, the cached tree does not depend on it
+WARM_UP_FIELD_ID = "warm_up"
+
+
+def warm_up_refinement(refinement):
+    """Build the category tree of a refinement, and render its tree into the
+    Django cache.
+
+    Args:
+        refinement:
+
+    Returns:
+        dict: number of categories and duration of each step, in ms, or
+            error message
+
+    """
+    try:
+        start = time.perf_counter()
+        category_tree = category_tree_utils.get_category_tree(refinement.id)
+        result = {
+            "categories": len(category_tree),
+            "category_tree": (time.perf_counter() - start) * 1000,
+        }
+
+        # lazy trees are rendered per record, and not cached
+        if not FANCY_TREE_LAZY_LOADING:
+            start = time.perf_counter()
+            form = RefinementForm(
+                refinement=refinement, field_id=WARM_UP_FIELD_ID
+            )
+            form.fields[WARM_UP_FIELD_ID].widget.get_payload()
+            result["payload"] = (time.perf_counter() - start) * 1000
+        return result
+    except Exception as exception:
+        return {"error": str(exception)}
+
+
+def _init_worker():
+    """Initialize a warm-up process, opening its own database connections.
+
+    Returns:
+
+    """
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    """Warm up the fancy tree caches command"""
+
+    help = (
+        "Build the category trees of the refinements of the current registry "
+        "template, and render their trees into the Django cache. Category "
+        "trees are shared with the server processes through snapshots "
+        "(FANCY_TREE_SNAPSHOT_DIR)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--template-hash",
+            default=None,
+            type=str,
+            help="Hash of the template of the refinements (current registry "
+            "template by default)",
+        )
+        parser.add_argument(
+            "--workers",
+            default=FANCY_TREE_WARM_UP_WORKERS,
+            type=int,
+            help="Number of processes warming up the refinements",
+        )
+
+    def handle(self, *args, **options):
+        template_hash = options["template_hash"] or self.get_template_hash()
+        refinements = list(
+            refinement_api.get_all_filtered_by_template_hash(template_hash)
+        )
+        if not refinements:
+            self.stdout.write(
+                f"No refinement found for template {template_hash}."
+            )
+            return
+
+        start = time.perf_counter()
+        if options["workers"] > 1 and len(refinements) > 1:
+            # the processes must not share the connections of this process
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=min(options["workers"], len(refinements)),
+                initializer=_init_worker,
+            ) as executor:
+                for refinement, result in zip(
+                    refinements, executor.map(warm_up_refinement, refinements)
+                ):
+                    self.write_result(refinement, result)
+        else:
+            for refinement in refinements:
+                self.write_result(refinement, warm_up_refinement(refinement))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(refinements)} refinements warmed up in "
+                f"{(time.perf_counter() - start) * 1000:.1f} ms."
+            )
+        )
+
+    @staticmethod
+    def get_template_hash():
+        """Get the hash of the current registry template, read as the first
+        superuser.
+
+        Returns:
+            str: template hash
+
+        """
+        user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError(
+                "A superuser is required to read the current registry "
+                "template, use --template-hash otherwise."
+            )
+        request = HttpRequest()
+        request.user = user
+        try:
+            return template_registry_api.get_current_registry_template(
+                request=request
+            ).hash
+        except Exception as exception:
+            raise CommandError(
+                "Unable to get the current registry template: "
+                + str(exception)
+            )
+
+    def write_result(self, refinement, result):
+        """Write the timing of the warm-up of a refinement.
+
+        Args:
+            refinement:
+            result:
+
+        Returns:
+
+        """
+        if "error" in result:
+            self.stderr.write(
+                f"{refinement.name} ({refinement.id}): {result['error']}"
+            )
+            return
+
+        timings = [f"category tree {result['category_tree']:.1f} ms"]
+        if "payload" in result:
+            timings.append(f"payload {result['payload']:.1f} ms")
+        self.stdout.write(
+            f"{refinement.name} ({refinement.id}): "
+            f"{result['categories']} categories, {', '.join(timings)}"
+        )
@@ -0,0 +1,81 @@
+"""Core module fancy tree registry app settings
+
+Settings with the following syntax can be overwritten at the project level:
+SETTING_NAME = getattr(settings, "SETTING_NAME", "Default Value")
+"""
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure()
+
+FANCY_TREE_INDEX_CACHE_SIZE = getattr(
+    settings, "FANCY_TREE_INDEX_CACHE_SIZE", 128
+)
+""" int: Maximum number of refinements kept in each of the process-local caches of category trees and search indexes.
+"""
+
+FANCY_TREE_CACHE_ALIAS = getattr(settings, "FANCY_TREE_CACHE_ALIAS", "default")
+""" str: Alias of the Django cache used to store refinement versions and rendered trees.
+"""
+
+FANCY_TREE_PAYLOAD_CACHE_TIMEOUT = getattr(
+    settings, "FANCY_TREE_PAYLOAD_CACHE_TIMEOUT", 86400
+)
+""" int: Lifetime, in seconds, of a rendered tree in the Django cache.
+"""
+
+FANCY_TREE_LAZY_LOADING = getattr(settings, "FANCY_TREE_LAZY_LOADING", False)
+""" boolean: Only render the top level of the tree (and the branches of selected nodes), children being loaded on expand.
+"""
+
+FANCY_TREE_SAVE_DELAY = getattr(settings, "FANCY_TREE_SAVE_DELAY", 300)
+""" int: Delay, in milliseconds, without selection change before the changes are sent to the server.
+"""
+
+FANCY_TREE_INSTRUMENTATION = getattr(
+    settings, "FANCY_TREE_INSTRUMENTATION", False
+)
+""" boolean: Measure the wall time and query count of the module phases, exposed as a Server-Timing header and logged.
+Queries of the async view are run in other threads and reported as 0.
+"""
+
+FANCY_TREE_SEARCH_LIMIT = getattr(settings, "FANCY_TREE_SEARCH_LIMIT", 20)
+""" int: Maximum number of categories returned by the category search.
+"""
+
+FANCY_TREE_BATCH_WORKERS = getattr(settings, "FANCY_TREE_BATCH_WORKERS", 0)
+""" int: Number of threads rendering the modules of a batch render request (modules are rendered sequentially below 2).
+"""
+
+FANCY_TREE_ASYNC = getattr(settings, "FANCY_TREE_ASYNC", False)
+""" boolean: Serve the module with async views, querying the database with the async ORM (for ASGI deployments).
+"""
+
+FANCY_TREE_SNAPSHOT_DIR = getattr(settings, "FANCY_TREE_SNAPSHOT_DIR", None)
+""" str: Local directory where the category trees are written as memory-mapped snapshots, shared by the processes of the host (disabled if None).
+"""
+
+FANCY_TREE_WARM_UP_WORKERS = getattr(settings, "FANCY_TREE_WARM_UP_WORKERS", 1)
+""" int: Number of processes warming up the refinements in the warmfancytreecache command (refinements are warmed up sequentially below 2).
+"""
+
+FANCY_TREE_VIRTUAL_RENDERING = getattr(
+    settings, "FANCY_TREE_VIRTUAL_RENDERING", False
+)
+""" boolean: Only keep the visible rows of the tree in the page (scrolled viewport), for refinements with a very large number of categories.
+"""
+
+FANCY_TREE_VIEWPORT_ROWS = getattr(settings, "FANCY_TREE_VIEWPORT_ROWS", 20)
+""" int: Number of rows of the tree rendered at a time when FANCY_TREE_VIRTUAL_RENDERING is enabled.
+"""
+
+FANCY_TREE_FILL_LOCK_TIMEOUT = getattr(
+    settings, "FANCY_TREE_FILL_LOCK_TIMEOUT", 30
+)
+""" int: Maximum time, in seconds, a process waits for another process building the same tree before building it itself (0 to only coalesce the builds of the threads of a process).
+"""
+
+FANCY_TREE_MAX_PATCHES = getattr(settings, "FANCY_TREE_MAX_PATCHES", 100)
+""" int: Maximum number of category changes applied to a cached category tree, beyond which the tree is built again.
+"""
@@ -1,17 +1,234 @@
+// Default delay (ms) without selection change before changes are sent
+var fancy_tree_default_save_delay = 300;
+// Changes not yet saved, by module id
+var fancy_tree_pending_saves = {};
+
+/**
+ * Queue the node selected or deselected by the user, to be sent to the server
+ * @param event
+ * @param data
+ */
 var fancy_tree_select_handler = function(event, data){
-	var values = [];
-    var nodes = data.node.tree.getSelectedNodes();
-    $(nodes).each(function() {
-        values.push($(this)[0].key);
+    var module = $(data.originalEvent.currentTarget).closest(".module");
+    fancy_tree_queue_change(module, data.node.key, data.node.isSelected());
+};
+
+/**
+ * Record a selection change and (re)start the save timer of the module
+ * @param $module
+ * @param key
+ * @param selected
+ */
+var fancy_tree_queue_change = function($module, key, selected){
+    var moduleId = $module.attr('id');
+    var pending = fancy_tree_pending_saves[moduleId];
+    if (pending === undefined) {
+        var $form = $module.find('.fancy-tree-form');
+        var saveDelay = $form.data('save-delay');
+        pending = fancy_tree_pending_saves[moduleId] = {
+            module: $module,
+            added: {},
+            removed: {},
+            timer: null,
+            inFlight: false,
+            flush: false,
+            saveAll: false,
+            delay: saveDelay === undefined ? fancy_tree_default_save_delay : saveDelay
+        };
+    }
+
+    // only keep the latest state of each node
+    if (selected) {
+        delete pending.removed[key];
+        pending.added[key] = true;
+    } else {
+        delete pending.added[key];
+        pending.removed[key] = true;
+    }
+
+    clearTimeout(pending.timer);
+    pending.timer = setTimeout(function(){
+        fancy_tree_send_pending(moduleId, true);
+    }, pending.delay);
+};
+
+/**
+ * Send the pending changes of a module. Only one request per module is in
+ * flight at a time: changes made meanwhile are sent when it completes.
+ * @param moduleId
+ * @param asyncOpt
+ */
+var fancy_tree_send_pending = function(moduleId, asyncOpt){
+    var pending = fancy_tree_pending_saves[moduleId];
+    clearTimeout(pending.timer);
+    pending.timer = null;
+
+    var saveAll = pending.saveAll;
+    if (pending.inFlight || !fancy_tree_has_pending_changes(pending)) {
+        return;
+    }
+
+    var $module = pending.module;
+    var module_data = fancy_tree_take_pending_data(moduleId, pending, saveAll);
+    pending.inFlight = true;
+
+    $.ajax({
+        url : '/' + $module.find('.moduleURL').text(),
+        type : "POST",
+        dataType: "json",
+        data: module_data,
+        async: asyncOpt,
+        fancyTreeSave: true,
+        success: function(data){
+            $module.find('.moduleDisplay').html($(data.html).find('.moduleDisplay').html());
+            $module.find('.moduleResult').html($(data.html).find('.moduleResult').html());
+        },
+        error: function() {
+            if (saveAll) {
+                console.error("An error occurred when saving module data");
+            } else {
+                // send the whole selection once the request completes
+                pending.saveAll = true;
+            }
+        },
+        complete: function() {
+            pending.inFlight = false;
+            // send the changes made while the request was in flight
+            var flush = pending.flush;
+            pending.flush = false;
+            fancy_tree_send_pending(moduleId, asyncOpt && !flush);
+        }
+    });
+};
+
+/**
+ * Check if a module has changes to send
+ * @param pending
+ * @returns true if changes are pending
+ */
+var fancy_tree_has_pending_changes = function(pending){
+    return pending.saveAll
+        || !$.isEmptyObject(pending.added)
+        || !$.isEmptyObject(pending.removed);
+};
+
+/**
+ * Get the data of the pending changes of a module, and clear them
+ * @param moduleId
+ * @param pending
+ * @param saveAll send the whole selection instead of the changes
+ * @returns module data
+ */
+var fancy_tree_take_pending_data = function(moduleId, pending, saveAll){
+    var module_data;
+    if (saveAll) {
+        // the last changes could not be applied: send the whole selection
+        module_data = {
+            'data[]': fancy_tree_get_selected_keys(pending.module),
+            'module_id': moduleId
+        };
+    } else {
+        // Collect data: only send the changes, the server applies them to the
+        // current module data
+        module_data = {
+            'added[]': Object.keys(pending.added),
+            'removed[]': Object.keys(pending.removed),
+            'module_id': moduleId
+        };
+    }
+    pending.added = {};
+    pending.removed = {};
+    pending.saveAll = false;
+    return module_data;
+};
+
+/**
+ * Send the pending changes of all modules while the page is hidden or
+ * unloaded, when synchronous requests are not allowed. A module with a
+ * request in flight sends its whole selection, which gives the same data
+ * whichever request the server handles last.
+ */
+var fancy_tree_beacon_pending_saves = function(){
+    $.each(fancy_tree_pending_saves, function(moduleId, pending) {
+        clearTimeout(pending.timer);
+        pending.timer = null;
+        if (!fancy_tree_has_pending_changes(pending)) {
+            return;
+        }
+
+        var $module = pending.module;
+        var module_data = fancy_tree_take_pending_data(
+            moduleId, pending, pending.saveAll || pending.inFlight
+        );
+        var body = new URLSearchParams();
+        $.each(module_data, function(name, value) {
+            $.each($.isArray(value) ? value : [value], function(i, item) {
+                body.append(name, item);
+            });
+        });
+        // no header can be set on a beacon: send the CSRF token in the body
+        body.append(
+            'csrfmiddlewaretoken',
+            $module.find('input[name=csrfmiddlewaretoken]').val()
+        );
+        var url = '/' + $module.find('.moduleURL').text();
+        if (!(navigator.sendBeacon && navigator.sendBeacon(url, body))) {
+            fetch(url, {
+                method: "POST",
+                body: body,
+                credentials: "same-origin",
+                keepalive: true
+            });
+        }
+    });
+};
+
+/**
+ * Synchronously send the pending changes of all modules
+ */
+var fancy_tree_flush_pending_saves = function(){
+    $.each(fancy_tree_pending_saves, function(moduleId, pending) {
+        if (pending.inFlight) {
+            // sent synchronously when the request in flight completes
+            pending.flush = true;
+            clearTimeout(pending.timer);
+            pending.timer = null;
+        } else {
+            fancy_tree_send_pending(moduleId, false);
+        }
     });
+};
 
-	// Collect data
-    var module_data = {
-        'data[]': values
+/**
+ * Get the keys of the selected nodes of the tree of a module
+ * @param $module
+ * @returns list of keys
+ */
+var fancy_tree_get_selected_keys = function($module){
+    var tree = $.ui.fancytree.getTree($module.find('.fancytree-container').first());
+    if (!tree) {
+        return [];
     }
+    return $.map(tree.getSelectedNodes(), function(node) {
+        return node.key;
+    });
+};
 
-    var module = $(data.originalEvent.currentTarget).closest(".module");
-    saveModuleData(module, module_data);
+/**
+ * Load the children of a node of a lazy tree from the server
+ * @param event
+ * @param data
+ */
+var fancy_tree_lazy_load_handler = function(event, data){
+    var $tree = $(data.tree.$div);
+    data.result = {
+        url: $tree.data("children-url"),
+        data: {
+            'refinement_id': $tree.data("refinement-id"),
+            'category_id': data.node.key
+        },
+        cache: true
+    };
 };
 
 // .ready() called.
@@ -20,4 +237,19 @@ $(function() {
     $(document).on("fancy_tree_select_event", function(event, data){
         fancy_tree_select_handler(event, data);
     });
-});
\ No newline at end of file
+    // do not lose pending changes when the form is submitted or left
+    $(document).on("submit", "form", fancy_tree_flush_pending_saves);
+    $(window).on("pagehide", fancy_tree_beacon_pending_saves);
+    $(document).on("visibilitychange", function(){
+        if (document.visibilityState === "hidden") {
+            fancy_tree_beacon_pending_saves();
+        }
+    });
+    // save the pending changes before the other requests of the page (e.g.
+    // saving or validating the curated form), which read the module data
+    $.ajaxPrefilter(function(options){
+        if (!options.fancyTreeSave && options.type.toUpperCase() !== "GET") {
+            fancy_tree_flush_pending_saves();
+        }
+    });
+});
@@ -2,12 +2,34 @@
 
 from django.urls import re_path
 
-from core_module_fancy_tree_registry_app.views.views import FancyTreeModule
+from core_module_fancy_tree_registry_app.settings import FANCY_TREE_ASYNC
+from core_module_fancy_tree_registry_app.views import ajax as module_ajax
+from core_module_fancy_tree_registry_app.views.views import (
+    AsyncFancyTreeModule,
+    FancyTreeModule,
+)
 
 urlpatterns = [
+    re_path(
+        r"module-fancy-tree-registry-children",
+        module_ajax.ChildrenView.as_view(),
+        name="core_module_fancy_tree_registry_children",
+    ),
+    re_path(
+        r"module-fancy-tree-registry-search",
+        module_ajax.SearchView.as_view(),
+        name="core_module_fancy_tree_registry_search",
+    ),
+    re_path(
+        r"module-fancy-tree-registry-batch",
+        module_ajax.BatchRenderView.as_view(),
+        name="core_module_fancy_tree_registry_batch",
+    ),
     re_path(
         r"module-fancy-tree-registry",
-        FancyTreeModule.as_view(),
+        (
+            AsyncFancyTreeModule if FANCY_TREE_ASYNC else FancyTreeModule
+        ).as_view(),
         name="core_module_fancy_tree_registry",
     ),
 ]
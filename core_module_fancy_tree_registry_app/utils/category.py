@@ -0,0 +1,38 @@
+"""Category lookup utilities for the fancy tree module"""
+
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+)
+
+
+def get_value_index(refinement_id):
+    """Get the value to category id index of a refinement.
+
+    Values of unspecified categories are mapped to the id of their parent
+    category (value ending with CATEGORY_SUFFIX), since unspecified nodes are
+    selected by checking their parent node.
+
+    Args:
+        refinement_id:
+
+    Returns:
+        dict: category value -> category id
+
+    """
+    return category_tree_utils.get_category_tree(refinement_id).value_index
+
+
+async def aget_value_index(refinement_id):
+    """Get the value to category id index of a refinement, with the async ORM
+    interface.
+
+    Args:
+        refinement_id:
+
+    Returns:
+        dict: category value -> category id
+
+    """
+    return (
+        await category_tree_utils.aget_category_tree(refinement_id)
+    ).value_index
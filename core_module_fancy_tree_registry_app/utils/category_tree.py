@@ -0,0 +1,982 @@
+"""Compact category trees of the refinements"""
+
+import logging
+import socket
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from functools import partial
+from itertools import chain, compress
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+
+from core_main_app.commons import exceptions
+from core_main_registry_app.components.category import api as category_api
+from core_main_registry_app.components.refinement import (
+    api as refinement_api,
+)
+from core_main_registry_app.constants import CATEGORY_SUFFIX, UNSPECIFIED_LABEL
+
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_INDEX_CACHE_SIZE,
+    FANCY_TREE_MAX_PATCHES,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    single_flight as single_flight_utils,
+    snapshot as snapshot_utils,
+    version as version_utils,
+)
+from core_module_fancy_tree_registry_app.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_ROWS_CHUNK_SIZE = 2000
+# snapshots are local to a host: so are the locks of their builds
+BUILD_LOCK_KEY = "fancy_tree:build_lock:{host}:{refinement_id}:{version}"
+
+category_tree_cache = LRUCache(FANCY_TREE_INDEX_CACHE_SIZE)
+# builds in progress, by (refinement id, version)
+category_tree_builds = single_flight_utils.SingleFlight()
+
+
+def _strip_category_suffix(value):
+    """Get the value of the xml element representing a category.
+
+    Args:
+        value:
+
+    Returns:
+        str: value without category suffix
+
+    """
+    if value.endswith(CATEGORY_SUFFIX):
+        return value[: -len(CATEGORY_SUFFIX)]
+    return value
+
+
+def _get_tag_index(tag_pairs, tag_indexes_by_pair, path):
+    """Get the index of the xml tags of a category path, adding them if
+    missing.
+
+    Args:
+        tag_pairs: distinct pairs of xml tags.
+        tag_indexes_by_pair: index of each pair of xml tags.
+        path:
+
+    Returns:
+        int: tag index
+
+    """
+    # the xml tags are the last two elements of the path
+    tag_pair = tuple(path.rsplit(".", 2)[-2:])
+    tag_index = tag_indexes_by_pair.setdefault(tag_pair, len(tag_pairs))
+    if tag_index == len(tag_pairs):
+        tag_pairs.append(tag_pair)
+    return tag_index
+
+
+def _index_values(value_index, categories):
+    """Set the categories of values in a value index. A value shared by
+    several categories is set to the last one.
+
+    Args:
+        value_index: category id of each value.
+        categories: (id, value, slug) of each category, in tree order.
+
+    """
+    unspecified_values = []
+    for category_id, value, slug in categories:
+        if slug.startswith(UNSPECIFIED_LABEL):
+            unspecified_values.append(value)
+        else:
+            value_index[value] = category_id
+
+    # values of unspecified categories are mapped to their parent category
+    for value in unspecified_values:
+        parent_value = f"{value}{CATEGORY_SUFFIX}"
+        if parent_value in value_index:
+            value_index[value] = value_index[parent_value]
+
+
+def _get_subtree_ends(parents):
+    """Get the end of the subtree of each category of a tree.
+
+    Args:
+        parents: position of the parent of each category, in tree order.
+
+    Returns:
+        array: end of each subtree
+
+    """
+    # a subtree ends where the subtree of its last descendant ends
+    ends = array("i", range(1, len(parents) + 1))
+    for position in range(len(parents) - 1, -1, -1):
+        parent = parents[position]
+        if parent >= 0 and ends[position] > ends[parent]:
+            ends[parent] = ends[position]
+    return ends
+
+
+def _iter_created_categories(category_id, created, child_ids_by_parent):
+    """Iterate over a created category and its created descendants, in tree
+    order.
+
+    Args:
+        category_id:
+        created: created categories, by id.
+        child_ids_by_parent: ids of the children of categories, in tree
+            order, by parent id.
+
+    Returns:
+        generator: (id, name, value, slug, path, parent id) of each category
+
+    """
+    stack = [category_id]
+    while stack:
+        category_id = stack.pop()
+        yield created[category_id]
+        stack.extend(
+            child_id
+            for child_id in reversed(child_ids_by_parent.get(category_id, ()))
+            if child_id in created
+        )
+
+
+class CategoryTree:
+    """Categories of a refinement, stored in parallel arrays.
+
+    Categories are stored in tree order (parents before their children), and
+    referenced by their position in the arrays. The descendants of the
+    category at position `p` are the positions between `p + 1` and
+    `ends[p]`, so that the children of a category are found by jumping from
+    a subtree end to the next. The xml tags of a category are stored once per
+    distinct pair of tags, and referenced by index. Trees read from a
+    snapshot hold views on the memory-mapped snapshot instead of arrays.
+    """
+
+    __slots__ = (
+        "version",
+        "ids",
+        "names",
+        "values",
+        "parents",
+        "ends",
+        "tag_indexes",
+        "tag_pairs",
+        "selectable",
+        "sorted_ids",
+        "sorted_positions",
+        "value_index",
+    )
+
+    def __init__(self, categories, version=None):
+        """
+
+        Args:
+            categories: (id, name, value, slug, path, parent id) of each
+                category, parents before their children.
+            version: version of the refinement the tree is built from.
+
+        """
+        self.version = version
+        self.ids = array("q")
+        self.names = []
+        self.values = []
+        self.parents = array("i")
+        self.tag_indexes = array("i")
+        self.tag_pairs = []
+        self.selectable = bytearray()
+        self.value_index = {}
+
+        positions = {}
+        tag_indexes_by_path = {}
+        tag_indexes_by_pair = {}
+        indexed_categories = []
+        for position, (
+            category_id,
+            name,
+            value,
+            slug,
+            path,
+            parent_id,
+        ) in enumerate(categories):
+            positions[category_id] = position
+            self.ids.append(category_id)
+            self.names.append(name)
+            self.parents.append(positions.get(parent_id, -1))
+
+            tag_index = tag_indexes_by_path.get(path)
+            if tag_index is None:
+                tag_index = _get_tag_index(
+                    self.tag_pairs, tag_indexes_by_pair, path
+                )
+                tag_indexes_by_path[path] = tag_index
+            self.tag_indexes.append(tag_index)
+
+            self.values.append(_strip_category_suffix(value))
+            # unspecified categories are selected by checking their parent
+            self.selectable.append(not name.startswith(UNSPECIFIED_LABEL))
+            indexed_categories.append((category_id, value, slug))
+        _index_values(self.value_index, indexed_categories)
+
+        # ids are looked up by bisection, rather than kept in a dict
+        self.sorted_ids = array("q", sorted(positions))
+        self.sorted_positions = array(
+            "i", (positions[category_id] for category_id in self.sorted_ids)
+        )
+        self.ends = _get_subtree_ends(self.parents)
+
+    @classmethod
+    def from_tables(cls, version, tables):
+        """Create a category tree from its tables, without building them.
+
+        Args:
+            version: version of the refinement the tables are built from.
+            tables: table of each slot of the tree (e.g. read from a
+                snapshot).
+
+        Returns:
+            CategoryTree
+
+        """
+        category_tree = cls.__new__(cls)
+        category_tree.version = version
+        for name, table in tables.items():
+            setattr(category_tree, name, table)
+        return category_tree
+
+    def __len__(self):
+        return len(self.ids)
+
+    def patch(self, categories, deleted_id_list, child_ids_by_parent, version):
+        """Get a tree with category changes applied, in a single pass over the
+        tables. The tree itself is left unchanged (e.g. read from a snapshot,
+        or shared with other threads).
+
+        Args:
+            categories: (id, name, value, slug, path, parent id) of each
+                created or updated category.
+            deleted_id_list: ids of the deleted categories.
+            child_ids_by_parent: ids of the children of the parents of the
+                created categories, in tree order, by parent id (None for the
+                root categories).
+            version: version of the patched tree.
+
+        Returns:
+            CategoryTree
+
+        Raises:
+            ValueError: if the changes do not match the tree, or if a changed
+                value is shared by several categories.
+
+        """
+        size = len(self.ids)
+        deleted = bytearray(size)
+        cuts = {0, size}
+        for category_id in deleted_id_list:
+            position = self.get_position(category_id)
+            if position is not None:
+                end = self.ends[position]
+                deleted[position:end] = b"\x01" * (end - position)
+                cuts.update((position, end))
+
+        updated = {}
+        created = {}
+        for category in categories:
+            position = self.get_position(category[0])
+            if position is None:
+                created[category[0]] = category
+            else:
+                self._check_update(position, category, deleted)
+                updated[position] = category
+
+        # created categories, by position of the category they are inserted
+        # before (the tree size to insert them at the end)
+        insertions = {}
+        for parent_id, child_id_list in child_ids_by_parent.items():
+            if parent_id in created:
+                # inserted with their parent
+                continue
+            if parent_id is None:
+                parent, depth = -1, 0
+            else:
+                parent = self.get_position(parent_id)
+                if parent is None or deleted[parent]:
+                    raise ValueError(f"Unknown parent category {parent_id}.")
+                depth = sum(1 for _ in self.iter_ancestors(parent)) + 1
+            gap = parent + 1
+            for child_id in child_id_list:
+                if child_id in created:
+                    insertions.setdefault(gap, []).append((depth, child_id))
+                    continue
+                child = self.get_position(child_id)
+                if child is None or deleted[child]:
+                    # created after the changes were read
+                    continue
+                if self.parents[child] != parent:
+                    raise ValueError(f"Category {child_id} was moved.")
+                gap = self.ends[child]
+        cuts.update(insertions)
+
+        ids = array("q")
+        names = []
+        values = []
+        parents = array("i")
+        tag_indexes = array("i")
+        tag_pairs = list(self.tag_pairs)
+        tag_indexes_by_pair = {
+            tag_pair: index for index, tag_pair in enumerate(tag_pairs)
+        }
+        selectable = bytearray()
+        # new position of each category of the tree
+        positions = array("i", [-1]) * size
+        created_positions = {}
+        old_names = list(self.names)
+        old_values = list(self.values)
+        cuts = sorted(cuts)
+        for start, end in zip(cuts, cuts[1:] + [None]):
+            # categories inserted at the end of deeper subtrees first
+            for _, inserted_id in sorted(
+                insertions.get(start, ()), key=itemgetter(0), reverse=True
+            ):
+                for category in _iter_created_categories(
+                    inserted_id, created, child_ids_by_parent
+                ):
+                    category_id, name, value, slug, path, parent_id = category
+                    created_positions[category_id] = len(ids)
+                    ids.append(category_id)
+                    names.append(name)
+                    values.append(_strip_category_suffix(value))
+                    if parent_id is None:
+                        parents.append(-1)
+                    elif parent_id in created_positions:
+                        parents.append(created_positions[parent_id])
+                    else:
+                        parents.append(positions[self.get_position(parent_id)])
+                    tag_indexes.append(
+                        _get_tag_index(tag_pairs, tag_indexes_by_pair, path)
+                    )
+                    selectable.append(not name.startswith(UNSPECIFIED_LABEL))
+            if end is None or deleted[start]:
+                continue
+            positions[start:end] = array(
+                "i", range(len(ids), len(ids) + end - start)
+            )
+            ids.extend(self.ids[start:end])
+            names.extend(old_names[start:end])
+            values.extend(old_values[start:end])
+            parents.extend(
+                positions[parent] if parent >= 0 else -1
+                for parent in self.parents[start:end]
+            )
+            tag_indexes.extend(self.tag_indexes[start:end])
+            selectable.extend(self.selectable[start:end])
+        unplaced_id_list = [
+            str(category_id)
+            for category_id in created
+            if category_id not in created_positions
+        ]
+        if unplaced_id_list:
+            raise ValueError(
+                f"Unknown parents of categories {', '.join(unplaced_id_list)}."
+            )
+
+        for position, category in updated.items():
+            _, name, value, _, path, _ = category
+            new_position = positions[position]
+            names[new_position] = name
+            values[new_position] = _strip_category_suffix(value)
+            tag_indexes[new_position] = _get_tag_index(
+                tag_pairs, tag_indexes_by_pair, path
+            )
+            selectable[new_position] = not name.startswith(UNSPECIFIED_LABEL)
+
+        # categories of the changed values, in tree order
+        changed_positions = sorted(
+            [positions[position] for position in updated]
+            + list(created_positions.values())
+        )
+        removed_positions = list(compress(range(size), deleted))
+        removed_positions.extend(updated)
+        self._check_shared_values(
+            removed_positions, values, selectable, changed_positions
+        )
+        value_index = dict(self.value_index)
+        for position in removed_positions:
+            for value, category_id in self._get_indexed_values(position):
+                if value_index.get(value) == category_id:
+                    del value_index[value]
+        changed_categories = {
+            category[0]: category
+            for category in chain(created.values(), updated.values())
+        }
+        _index_values(
+            value_index,
+            (
+                itemgetter(0, 2, 3)(changed_categories[ids[position]])
+                for position in changed_positions
+            ),
+        )
+
+        sorted_positions = array(
+            "i", sorted(range(len(ids)), key=ids.__getitem__)
+        )
+        return CategoryTree.from_tables(
+            version,
+            {
+                "ids": ids,
+                "names": names,
+                "values": values,
+                "parents": parents,
+                "ends": _get_subtree_ends(parents),
+                "tag_indexes": tag_indexes,
+                "tag_pairs": tag_pairs,
+                "selectable": selectable,
+                "sorted_ids": array(
+                    "q", map(ids.__getitem__, sorted_positions)
+                ),
+                "sorted_positions": sorted_positions,
+                "value_index": value_index,
+            },
+        )
+
+    def _check_update(self, position, category, deleted):
+        """Check that an updated category can be patched in the tree.
+
+        Args:
+            position: position of the category.
+            category: (id, name, value, slug, path, parent id) of the
+                category.
+            deleted: deleted flag of each position of the tree.
+
+        Raises:
+            ValueError: if the category was moved to another parent, or if
+                the value of a parent category changed.
+
+        """
+        category_id, _, value, _, _, parent_id = category
+        parent = self.parents[position]
+        if (
+            deleted[position]
+            or (parent_id is None) != (parent < 0)
+            or (parent >= 0 and self.ids[parent] != parent_id)
+        ):
+            raise ValueError(f"Category {category_id} was moved.")
+        value_changed = self.values[position] != _strip_category_suffix(value)
+        if value_changed and not self.is_leaf(position):
+            # the unspecified child may not be mapped to the category anymore
+            raise ValueError(
+                f"Value of parent category {category_id} changed."
+            )
+
+    def _check_shared_values(
+        self, removed_positions, values, selectable, changed_positions
+    ):
+        """Check that the values of the removed and changed categories are not
+        shared by other categories, whose values the patch would not index.
+
+        Args:
+            removed_positions: positions of the removed categories in the
+                tree.
+            values: values of the patched tree.
+            selectable: selectable flag of each category of the patched tree.
+            changed_positions: positions of the changed categories in the
+                patched tree.
+
+        Raises:
+            ValueError: if a value is shared by several categories.
+
+        """
+        for position_list, value_list, selectable_list in (
+            (removed_positions, self.values, self.selectable),
+            (changed_positions, values, selectable),
+        ):
+            # values of unspecified categories are their parent ones
+            counts = Counter(compress(value_list, selectable_list))
+            for position in position_list:
+                value = value_list[position]
+                if selectable_list[position] and counts[value] > 1:
+                    raise ValueError(f"Shared category value {value}.")
+
+    def _get_indexed_values(self, position):
+        """Get the entries of the value index set for a category.
+
+        Args:
+            position:
+
+        Returns:
+            list: (value, category id) entries
+
+        """
+        value = self.values[position]
+        if not self.selectable[position]:
+            # mapped to their parent category
+            parent = self.parents[position]
+            return [(value, self.ids[parent])] if parent >= 0 else []
+        category_id = self.ids[position]
+        parent_value = f"{value}{CATEGORY_SUFFIX}"
+        if self.value_index.get(parent_value) == category_id:
+            # the value itself is the one of the unspecified child
+            return [(parent_value, category_id)]
+        return [(value, category_id)]
+
+    def get_position(self, category_id):
+        """Get the position of a category in the tree.
+
+        Args:
+            category_id:
+
+        Returns:
+            int: position, None if the category is not in the tree
+
+        """
+        if not isinstance(category_id, int):
+            if not str(category_id).isdigit():
+                return None
+            category_id = int(category_id)
+        index = bisect_left(self.sorted_ids, category_id)
+        if (
+            index < len(self.sorted_ids)
+            and self.sorted_ids[index] == category_id
+        ):
+            return self.sorted_positions[index]
+        return None
+
+    def get_unselectable_ids(self, category_id_list):
+        """Get the ids of a list not matching a category that can be selected
+        in the tree.
+
+        Args:
+            category_id_list:
+
+        Returns:
+            list: ids of unknown or unspecified categories
+
+        """
+        unselectable_id_list = []
+        for category_id in category_id_list:
+            position = self.get_position(category_id)
+            if position is None or not self.selectable[position]:
+                unselectable_id_list.append(category_id)
+        return unselectable_id_list
+
+    def get_element(self, position):
+        """Get the xml element representing a category.
+
+        Args:
+            position:
+
+        Returns:
+            tuple: parent tag, child tag, value
+
+        """
+        parent_tag, child_tag = self.tag_pairs[self.tag_indexes[position]]
+        return parent_tag, child_tag, self.values[position]
+
+    def get_elements(self, category_id_list):
+        """Get the xml elements representing a list of categories.
+
+        Args:
+            category_id_list:
+
+        Returns:
+            list: (parent tag, child tag, value) of each category
+
+        Raises:
+            DoesNotExist: if any of the ids does not match a category of the
+                tree.
+
+        """
+        positions = [
+            self.get_position(category_id) for category_id in category_id_list
+        ]
+        unknown_id_list = [
+            str(category_id)
+            for category_id, position in zip(category_id_list, positions)
+            if position is None
+        ]
+        if unknown_id_list:
+            raise exceptions.DoesNotExist(
+                f"Unknown category ids: {', '.join(unknown_id_list)}."
+            )
+
+        return [self.get_element(position) for position in positions]
+
+    def is_leaf(self, position):
+        """Check if a category has no children.
+
+        Args:
+            position:
+
+        Returns:
+            bool
+
+        """
+        return self.ends[position] == position + 1
+
+    def iter_children(self, position=None):
+        """Iterate over the children of a category.
+
+        Args:
+            position: position of the category, None for the root categories.
+
+        Returns:
+            generator: positions of the children
+
+        """
+        if position is None:
+            child, end = 0, len(self.ids)
+        else:
+            child, end = position + 1, self.ends[position]
+        while child < end:
+            yield child
+            child = self.ends[child]
+
+    def iter_selectable_children(self, position=None):
+        """Iterate over the children of a category that can be selected.
+
+        Args:
+            position: position of the category, None for the root categories.
+
+        Returns:
+            generator: positions of the children
+
+        """
+        return (
+            child
+            for child in self.iter_children(position)
+            if self.selectable[child]
+        )
+
+    def iter_ancestors(self, position):
+        """Iterate over the ancestors of a category, parent first.
+
+        Args:
+            position:
+
+        Returns:
+            generator: positions of the ancestors
+
+        """
+        parent = self.parents[position]
+        while parent >= 0:
+            yield parent
+            parent = self.parents[parent]
+
+    def iter_selectable_rows(self):
+        """Iterate over the categories that can be selected, in tree order.
+
+        Returns:
+            generator: (id, name, parent id) of each category
+
+        """
+        for position, selectable in enumerate(self.selectable):
+            if selectable:
+                parent = self.parents[position]
+                yield (
+                    self.ids[position],
+                    self.names[position],
+                    self.ids[parent] if parent >= 0 else None,
+                )
+
+    def get_nodes(self, count_mode=False, position=None):
+        """Get the fancy tree nodes of the categories that can be selected.
+
+        Args:
+            count_mode: add an html element to display counts next to each
+                node.
+            position: position of the category whose children are returned,
+                None for the whole tree.
+
+        Returns:
+            list: fancy tree nodes
+
+        """
+        nodes = []
+        for child in self.iter_selectable_children(position):
+            category_id = self.ids[child]
+            if count_mode:
+                node = {
+                    "title": f"{self.names[child]} <em class='occurrences' id='{category_id}'></em>",
+                    "key": category_id,
+                }
+            else:
+                node = {"title": self.names[child], "key": category_id}
+            children = self.get_nodes(count_mode, child)
+            if children:
+                node["folder"] = True
+                node["children"] = children
+            nodes.append(node)
+        return nodes
+
+
+def build_category_tree(refinement_id, version=None):
+    """Build the category tree of a refinement.
+
+    Args:
+        refinement_id:
+        version: version of the refinement.
+
+    Returns:
+        CategoryTree
+
+    Raises:
+        DoesNotExist: if the refinement does not exist.
+
+    """
+    category_tree = CategoryTree(_iter_category_rows(refinement_id), version)
+    # unknown refinements are not cached as empty trees
+    if (
+        not len(category_tree)
+        and not refinement_api.get_all().filter(pk=refinement_id).exists()
+    ):
+        raise exceptions.DoesNotExist(f"Unknown refinement {refinement_id}.")
+    return category_tree
+
+
+def _get_category_rows(refinement_id):
+    """Get the rows of the categories of a refinement, in tree order.
+
+    Args:
+        refinement_id:
+
+    Returns:
+        Category values collection
+
+    """
+    return (
+        category_api.get_all_filtered_by_refinement_id(refinement_id)
+        .order_by("tree_id", "lft")
+        .values_list("id", "name", "value", "slug", "path", "parent_id")
+    )
+
+
+def _iter_category_rows(refinement_id):
+    """Iterate over the rows of the categories of a refinement, in tree
+    order, fetched by chunks.
+
+    Args:
+        refinement_id:
+
+    Returns:
+        iterator: (id, name, value, slug, path, parent id) of each category
+
+    """
+    return _get_category_rows(refinement_id).iterator(
+        chunk_size=CATEGORY_ROWS_CHUNK_SIZE
+    )
+
+
+def _read_snapshot(refinement_id, version):
+    """Read the category tree of a refinement version from its snapshot.
+
+    Args:
+        refinement_id:
+        version:
+
+    Returns:
+        CategoryTree: None if there is no snapshot of the version
+
+    """
+    tables = snapshot_utils.read_snapshot(refinement_id, version)
+    if tables is None:
+        return None
+    return CategoryTree.from_tables(version, tables)
+
+
+def _write_snapshot(refinement_id, category_tree):
+    """Write the snapshot of a category tree, and read the tree back from it
+    so that the memory of the tree is shared with the other processes.
+
+    Args:
+        refinement_id:
+        category_tree:
+
+    Returns:
+        CategoryTree
+
+    """
+    if snapshot_utils.write_snapshot(refinement_id, category_tree):
+        return (
+            _read_snapshot(refinement_id, category_tree.version)
+            or category_tree
+        )
+    return category_tree
+
+
+def _get_child_ids(refinement_id, parent_id_set):
+    """Get the ids of the children of categories of a refinement, in tree
+    order, with a single query.
+
+    Args:
+        refinement_id:
+        parent_id_set: ids of the parent categories, None for the root
+            categories.
+
+    Returns:
+        dict: ids of the children, by parent id
+
+    """
+    child_ids_by_parent = {}
+    if not parent_id_set:
+        return child_ids_by_parent
+    query = Q(parent_id__in=parent_id_set - {None})
+    if None in parent_id_set:
+        query |= Q(parent_id__isnull=True)
+    for category_id, parent_id in (
+        category_api.get_all_filtered_by_refinement_id(refinement_id)
+        .filter(query)
+        .order_by("tree_id", "lft")
+        .values_list("id", "parent_id")
+    ):
+        child_ids_by_parent.setdefault(parent_id, []).append(category_id)
+    return child_ids_by_parent
+
+
+def patch_category_tree(category_tree, refinement_id, version):
+    """Patch the category tree of a previous version of a refinement with the
+    category changes recorded since, rather than building the tree again.
+
+    Args:
+        category_tree: category tree of a previous version.
+        refinement_id:
+        version: version to patch the tree to.
+
+    Returns:
+        CategoryTree: None if the tree cannot be patched (changes not
+            recorded, too many changes, or changes not matching the tree)
+
+    """
+    if (
+        category_tree.version is None
+        or not 0 < version - category_tree.version <= FANCY_TREE_MAX_PATCHES
+    ):
+        return None
+    changes = version_utils.get_refinement_changes(
+        refinement_id, category_tree.version, version
+    )
+    if changes is None:
+        return None
+
+    # changes are applied at once, from the current rows of the categories
+    deleted_id_set = {
+        category_id
+        for operation, category_id in changes
+        if operation == version_utils.CATEGORY_DELETED
+    }
+    changed_id_set = {category_id for _, category_id in changes}
+    changed_id_set -= deleted_id_set
+    categories = (
+        list(_get_category_rows(refinement_id).filter(pk__in=changed_id_set))
+        if changed_id_set
+        else []
+    )
+    # deleted since, by a following change
+    deleted_id_set.update(
+        changed_id_set - {category[0] for category in categories}
+    )
+    child_ids_by_parent = _get_child_ids(
+        refinement_id,
+        {
+            category[5]
+            for category in categories
+            if category_tree.get_position(category[0]) is None
+        },
+    )
+    try:
+        return category_tree.patch(
+            categories, deleted_id_set, child_ids_by_parent, version
+        )
+    except ValueError as exception:
+        logger.info(
+            "Category tree of refinement %s rebuilt: %s",
+            refinement_id,
+            str(exception),
+        )
+        return None
+
+
+def get_category_tree(refinement_id):
+    """Get the category tree of a refinement, from the process-local cache if
+    built for the current version of the refinement, else from its snapshot
+    if any.
+
+    Args:
+        refinement_id:
+
+    Returns:
+        CategoryTree
+
+    """
+    refinement_id = int(refinement_id)
+    version = version_utils.get_refinement_version(refinement_id)
+    category_tree = category_tree_cache.get(refinement_id)
+    if category_tree is None or category_tree.version != version:
+        # concurrent requests wait for the same build
+        category_tree = category_tree_builds.do(
+            (refinement_id, version),
+            partial(
+                _load_category_tree, refinement_id, version, category_tree
+            ),
+        )
+        category_tree_cache.set(refinement_id, category_tree)
+    return category_tree
+
+
+def _load_category_tree(refinement_id, version, previous_tree=None):
+    """Load the category tree of a refinement version from its snapshot, else
+    patch the tree of a previous version, else build it. With snapshots, only
+    one process of the host builds the tree, the others reading its snapshot.
+
+    Args:
+        refinement_id:
+        version:
+        previous_tree: category tree of a previous version of the refinement.
+
+    Returns:
+        CategoryTree
+
+    """
+    category_tree = _read_snapshot(refinement_id, version)
+    if category_tree is not None:
+        return category_tree
+    if previous_tree is not None:
+        category_tree = patch_category_tree(
+            previous_tree, refinement_id, version
+        )
+        if category_tree is not None:
+            return _write_snapshot(refinement_id, category_tree)
+
+    def build():
+        return _write_snapshot(
+            refinement_id, build_category_tree(refinement_id, version)
+        )
+
+    if not snapshot_utils.is_enabled():
+        return build()
+    return single_flight_utils.fill_once(
+        BUILD_LOCK_KEY.format(
+            host=socket.gethostname(),
+            refinement_id=refinement_id,
+            version=version,
+        ),
+        partial(_read_snapshot, refinement_id, version),
+        build,
+    )
+
+
+async def aget_category_tree(refinement_id):
+    """Get the category tree of a refinement from async code. The tree is
+    looked up, loaded or built by `get_category_tree` in the thread of the
+    sync ORM calls, so that concurrent builds are coalesced the same way.
+
+    Args:
+        refinement_id:
+
+    Returns:
+        CategoryTree
+
+    """
+    return await sync_to_async(get_category_tree)(refinement_id)
@@ -0,0 +1,164 @@
+"""Module data utilities"""
+
+import re
+import zlib
+from functools import lru_cache
+from itertools import starmap
+from xml.sax.saxutils import escape, unescape
+
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+DATA_ELEMENT_REGEX = re.compile(
+    r"<([^\s<>/&\"'=]+)><([^\s<>/&\"'=]+)>([^<]*)</\2></\1>"
+)
+INVALID_REFERENCE_REGEX = re.compile(r"&(?!(?:amp|lt|gt|quot|apos);)")
+ENTITIES = {"&quot;": '"', "&apos;": "'"}
+# formatted elements kept per process, about one per category in use
+DATA_ELEMENT_CACHE_SIZE = 65536
+# window bits of the zlib decompressor for each supported content encoding
+CONTENT_ENCODING_WBITS = {
+    "gzip": 16 + zlib.MAX_WBITS,
+    "deflate": zlib.MAX_WBITS,
+}
+
+
+def parse_two_level_elements(data):
+    """Parse data made of `<parent><child>value</child></parent>` elements
+    only, as produced by the module, with a single scan of the string and
+    without building an XML tree.
+
+    Args:
+        data:
+
+    Returns:
+        list: (parent tag, child tag, value) of each element, None if the
+        data does not have the expected shape
+
+    """
+    has_references = "&" in data
+    if has_references and INVALID_REFERENCE_REGEX.search(data):
+        return None
+
+    elements = DATA_ELEMENT_REGEX.findall(data)
+    parsed_length = 0
+    for index, (parent_tag, child_tag, value) in enumerate(elements):
+        # length of <parent><child>value</child></parent>
+        parsed_length += 2 * (len(parent_tag) + len(child_tag)) + len(value)
+        parsed_length += 10
+        if has_references and "&" in value:
+            elements[index] = (
+                parent_tag,
+                child_tag,
+                unescape(value, ENTITIES),
+            )
+
+    # matches are not overlapping: the data is only made of matched
+    # elements if their total length is the length of the data
+    if parsed_length != len(data):
+        return None
+    return elements
+
+
+def _iter_xml_elements(data):
+    """Iterate over the elements of any XML data, using an XML tree.
+
+    Args:
+        data:
+
+    Returns:
+        generator: (parent tag, child tag, value) of each element
+
+    """
+    for element in XSDTree.fromstring(f"<root>{data}</root>"):
+        if len(element) > 0:
+            yield element.tag, element[0].tag, element[0].text
+
+
+def iter_data_elements(data):
+    """Iterate over the elements of the module data. Data having the two
+    level shape produced by the module is parsed without building an XML
+    tree, any other data is parsed as an XML tree.
+
+    Args:
+        data:
+
+    Returns:
+        iterator: (parent tag, child tag, value) of each element
+
+    """
+    if not data:
+        return iter(())
+
+    elements = parse_two_level_elements(data)
+    if elements is None:
+        return _iter_xml_elements(data)
+    return iter(elements)
+
+
+@lru_cache(maxsize=DATA_ELEMENT_CACHE_SIZE)
+def format_data_element(parent_tag, child_tag, value):
+    """Format an element of the module data, escaping its value. Formatted
+    elements are cached, so that the element of a category is only formatted
+    once.
+
+    Args:
+        parent_tag:
+        child_tag:
+        value:
+
+    Returns:
+        str: `<parent><child>value</child></parent>` xml fragment
+
+    """
+    return (
+        f"<{parent_tag}><{child_tag}>{escape(value or '')}"
+        f"</{child_tag}></{parent_tag}>"
+    )
+
+
+def format_data(data_elements):
+    """Format elements as module data.
+
+    Args:
+        data_elements: (parent tag, child tag, value) of each element.
+
+    Returns:
+        str: module data
+
+    """
+    return "".join(starmap(format_data_element, data_elements))
+
+
+def decompress(body, content_encoding, max_size=None):
+    """Decompress a request body sent with a `Content-Encoding`.
+
+    Args:
+        body: request body.
+        content_encoding: `gzip`, `deflate`, or `identity` / empty if the body
+            is not compressed.
+        max_size: maximum size of the decompressed body, None if unlimited.
+
+    Returns:
+        bytes: decompressed body
+
+    Raises:
+        ValueError: if the encoding is not supported, or the body is invalid
+            or decompresses beyond max_size.
+
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return body
+    if encoding not in CONTENT_ENCODING_WBITS:
+        raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+    decompressor = zlib.decompressobj(CONTENT_ENCODING_WBITS[encoding])
+    try:
+        data = decompressor.decompress(body, max_size or 0)
+    except zlib.error as error:
+        raise ValueError(f"Invalid {encoding} body: {error}")
+    if decompressor.unconsumed_tail:
+        raise ValueError("Decompressed body is too large.")
+    if not decompressor.eof:
+        raise ValueError(f"Truncated {encoding} body.")
+    return data
@@ -0,0 +1,103 @@
+"""Per-request instrumentation of the fancy tree module"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """Database execute wrapper counting the executed queries"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Instrumentation:
+    """Record the wall time and the number of database queries of the phases
+    of a module request. Only the queries executed in the thread of the
+    request are counted: the queries of an async request, run in the threads
+    of `sync_to_async`, are reported as 0."""
+
+    def __init__(self, enabled=False):
+        """Initialize the instrumentation
+
+        Args:
+            enabled: phases are only measured if enabled.
+        """
+        self.enabled = enabled
+        self.tags = {}
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Measure the code executed in the context as the phase `name`.
+        Measures of a phase entered several times are added up.
+
+        Args:
+            name: phase name, used as Server-Timing metric name.
+
+        Returns:
+
+        """
+        if not self.enabled:
+            yield
+            return
+
+        query_counter = QueryCounter()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(query_counter):
+                yield
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            phase = self.phases.setdefault(
+                name, {"duration_ms": 0.0, "queries": 0}
+            )
+            phase["duration_ms"] += duration
+            phase["queries"] += query_counter.count
+
+    def get_server_timing(self):
+        """Get the Server-Timing header value of the measured phases.
+
+        Returns:
+
+        """
+        return ", ".join(
+            f'{name};dur={phase["duration_ms"]:.2f};desc="{phase["queries"]} queries"'
+            for name, phase in self.phases.items()
+        )
+
+    def report(self, response):
+        """Add the measured phases to the response headers and log them.
+
+        Args:
+            response:
+
+        Returns:
+            response
+
+        """
+        if not self.enabled or not self.phases:
+            return response
+
+        response["Server-Timing"] = self.get_server_timing()
+        logger.info(
+            "Fancy tree module phases (xpath: %s, refinement: %s): %s",
+            self.tags.get("xml_xpath"),
+            self.tags.get("refinement_id"),
+            self.phases,
+            extra={
+                "fancy_tree_xpath": self.tags.get("xml_xpath"),
+                "fancy_tree_refinement_id": self.tags.get("refinement_id"),
+                "fancy_tree_phases": self.phases,
+            },
+        )
+        return response
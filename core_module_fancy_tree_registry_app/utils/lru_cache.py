@@ -0,0 +1,79 @@
+"""Process-local LRU cache"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe, size-bounded, least-recently-used cache"""
+
+    def __init__(self, max_size):
+        """Initialize the cache
+
+        Args:
+            max_size: maximum number of entries kept in the cache.
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value cached for key and mark it as recently used.
+
+        Args:
+            key:
+            default: value returned if key is not cached.
+
+        Returns:
+
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        """Cache value for key, evicting the least recently used entry if full.
+
+        Args:
+            key:
+            value:
+
+        Returns:
+
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key from the cache.
+
+        Args:
+            key:
+
+        Returns:
+
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries from the cache.
+
+        Returns:
+
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
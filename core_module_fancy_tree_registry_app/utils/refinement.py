@@ -0,0 +1,189 @@
+"""Refinement lookup utilities for the fancy tree module"""
+
+import re
+import threading
+from functools import lru_cache
+
+from core_main_app.commons import exceptions
+from core_main_registry_app.components.refinement import (
+    api as refinement_api,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    version as version_utils,
+)
+
+# refinements of the current registry template:
+# ((template hash, template version), xsd name -> refinement)
+_refinement_map = (None, {})
+_refinement_map_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1024)
+def parse_xml_xpath(xml_xpath):
+    """Get the field id and the element name from the xpath of an element.
+
+    Args:
+        xml_xpath:
+
+    Returns:
+        tuple: field id, element name without namespace
+
+    """
+    # create unique field id from xpath
+    field_id = re.sub(r"[/.:\[\]]", "", xml_xpath)
+    # get the last element of the xpath
+    xml_element = xml_xpath.split("/")[-1]
+    # only keep element name if namespace is present
+    if ":" in xml_element:
+        xml_element = xml_element.split(":")[-1]
+    return field_id, xml_element
+
+
+def build_refinement_map(template_hash):
+    """Build the xsd name to refinement map of a template.
+
+    Args:
+        template_hash:
+
+    Returns:
+        dict: xsd name -> refinement
+
+    """
+    return _index_refinements(
+        refinement_api.get_all_filtered_by_template_hash(template_hash)
+    )
+
+
+def _index_refinements(refinements):
+    """Index refinements by xsd name, the first refinement of a name being
+    kept.
+
+    Args:
+        refinements:
+
+    Returns:
+        dict: xsd name -> refinement
+
+    """
+    refinement_map = {}
+    for refinement in refinements:
+        refinement_map.setdefault(refinement.xsd_name, refinement)
+    return refinement_map
+
+
+def get_refinement_map(template_hash):
+    """Get the xsd name to refinement map of a template. The map is only
+    rebuilt when the template hash, or the version of its refinements,
+    changes.
+
+    Args:
+        template_hash:
+
+    Returns:
+        dict: xsd name -> refinement
+
+    """
+    global _refinement_map
+
+    map_key = (
+        template_hash,
+        version_utils.get_template_version(template_hash),
+    )
+    cached_map_key, refinement_map = _refinement_map
+    if cached_map_key != map_key:
+        with _refinement_map_lock:
+            cached_map_key, refinement_map = _refinement_map
+            if cached_map_key != map_key:
+                refinement_map = build_refinement_map(template_hash)
+                _refinement_map = (map_key, refinement_map)
+    return refinement_map
+
+
+async def aget_refinement_map(template_hash):
+    """Get the xsd name to refinement map of a template, with the async ORM
+    interface. The map is only rebuilt when the template hash, or the version
+    of its refinements, changes.
+
+    Args:
+        template_hash:
+
+    Returns:
+        dict: xsd name -> refinement
+
+    """
+    global _refinement_map
+
+    map_key = (
+        template_hash,
+        version_utils.get_template_version(template_hash),
+    )
+    cached_map_key, refinement_map = _refinement_map
+    if cached_map_key != map_key:
+        refinement_map = _index_refinements(
+            [
+                refinement
+                async for refinement in refinement_api.get_all_filtered_by_template_hash(
+                    template_hash
+                )
+            ]
+        )
+        with _refinement_map_lock:
+            _refinement_map = (map_key, refinement_map)
+    return refinement_map
+
+
+def clear_refinement_map():
+    """Clear the cached refinement map.
+
+    Returns:
+
+    """
+    global _refinement_map
+
+    with _refinement_map_lock:
+        _refinement_map = (None, {})
+
+
+def get_by_xsd_name(template_hash, xsd_name):
+    """Get the refinement of a template for an element name.
+
+    Args:
+        template_hash:
+        xsd_name:
+
+    Returns:
+        Refinement object
+
+    Raises:
+        DoesNotExist: if no refinement matches the element name.
+
+    """
+    try:
+        return get_refinement_map(template_hash)[xsd_name]
+    except KeyError:
+        raise exceptions.DoesNotExist(
+            f"No refinement found for element {xsd_name}."
+        )
+
+
+async def aget_by_xsd_name(template_hash, xsd_name):
+    """Get the refinement of a template for an element name, with the async
+    ORM interface.
+
+    Args:
+        template_hash:
+        xsd_name:
+
+    Returns:
+        Refinement object
+
+    Raises:
+        DoesNotExist: if no refinement matches the element name.
+
+    """
+    try:
+        return (await aget_refinement_map(template_hash))[xsd_name]
+    except KeyError:
+        raise exceptions.DoesNotExist(
+            f"No refinement found for element {xsd_name}."
+        )
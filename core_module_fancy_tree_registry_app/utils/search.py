@@ -0,0 +1,214 @@
+"""Category search utilities for the fancy tree module"""
+
+import heapq
+import re
+from bisect import bisect_left
+from functools import partial
+
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_INDEX_CACHE_SIZE,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+    single_flight as single_flight_utils,
+    version as version_utils,
+)
+from core_module_fancy_tree_registry_app.utils.lru_cache import LRUCache
+
+TOKEN_REGEX = re.compile(r"\w+")
+MAX_CHAR = chr(0x10FFFF)
+
+search_index_cache = LRUCache(FANCY_TREE_INDEX_CACHE_SIZE)
+# builds in progress, by refinement id
+search_index_builds = single_flight_utils.SingleFlight()
+
+
+def tokenize(text):
+    """Split a text into lower case word tokens.
+
+    Args:
+        text:
+
+    Returns:
+        list: tokens
+
+    """
+    return TOKEN_REGEX.findall(text.lower())
+
+
+class SearchIndex:
+    """Token prefix index of the category names of a refinement.
+
+    Categories are stored in tree order, and referenced by their position in
+    the index. Tokens of the names are kept sorted, so that the categories
+    having a token starting with a prefix are a contiguous range.
+    """
+
+    def __init__(self, categories, version=None):
+        """
+
+        Args:
+            categories: (id, name, parent id) of each category, parents
+                before their children.
+            version: version of the refinement of the categories.
+
+        """
+        self.version = version
+        self.ids = []
+        self.names = []
+        self.parents = []
+        self.positions_by_name = {}
+
+        positions = {}
+        postings = []
+        for position, (category_id, name, parent_id) in enumerate(categories):
+            positions[category_id] = position
+            self.ids.append(category_id)
+            self.names.append(name)
+            self.parents.append(positions.get(parent_id))
+            self.positions_by_name.setdefault(
+                " ".join(tokenize(name)), []
+            ).append(position)
+            postings.extend((token, position) for token in set(tokenize(name)))
+
+        postings.sort()
+        self.tokens = [token for token, _ in postings]
+        self.token_positions = [position for _, position in postings]
+
+    def get_prefix_positions(self, prefix):
+        """Get the positions of the categories having a token starting with
+        a prefix.
+
+        Args:
+            prefix:
+
+        Returns:
+            list: positions
+
+        """
+        start = bisect_left(self.tokens, prefix)
+        end = bisect_left(self.tokens, prefix + MAX_CHAR, start)
+        return self.token_positions[start:end]
+
+    def get_ancestors(self, position):
+        """Get the ancestor nodes of a category, root first.
+
+        Args:
+            position:
+
+        Returns:
+            list: fancy tree nodes
+
+        """
+        ancestors = []
+        parent = self.parents[position]
+        while parent is not None:
+            ancestors.append(
+                {"title": self.names[parent], "key": self.ids[parent]}
+            )
+            parent = self.parents[parent]
+        ancestors.reverse()
+        return ancestors
+
+    def search(self, query, limit):
+        """Search the categories whose names have a token starting with each
+        token of the query. Categories named like the query come first, then
+        the other matches in tree order.
+
+        Args:
+            query:
+            limit: maximum number of results.
+
+        Returns:
+            list: fancy tree nodes, with their ancestors
+
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens or limit <= 0:
+            return []
+
+        # start with the longest, most selective, prefix
+        candidates = None
+        for token in sorted(set(query_tokens), key=len, reverse=True):
+            positions = self.get_prefix_positions(token)
+            candidates = (
+                set(positions)
+                if candidates is None
+                else candidates.intersection(positions)
+            )
+            if not candidates:
+                return []
+
+        exact_positions = [
+            position
+            for position in self.positions_by_name.get(
+                " ".join(query_tokens), []
+            )
+            if position in candidates
+        ][:limit]
+        candidates.difference_update(exact_positions)
+        result_positions = exact_positions + heapq.nsmallest(
+            limit - len(exact_positions), candidates
+        )
+
+        return [
+            {
+                "title": self.names[position],
+                "key": self.ids[position],
+                "ancestors": self.get_ancestors(position),
+            }
+            for position in result_positions
+        ]
+
+
+def build_search_index(refinement_id, version=None):
+    """Build the search index of the selectable categories of a refinement.
+
+    Args:
+        refinement_id:
+        version: version of the refinement.
+
+    Returns:
+        SearchIndex
+
+    """
+    category_tree = category_tree_utils.get_category_tree(refinement_id)
+    return SearchIndex(category_tree.iter_selectable_rows(), version)
+
+
+def get_search_index(refinement_id):
+    """Get the search index of a refinement, from the process-local cache if
+    built for the current version of the refinement.
+
+    Args:
+        refinement_id:
+
+    Returns:
+        SearchIndex
+
+    """
+    version = version_utils.get_refinement_version(refinement_id)
+    search_index = search_index_cache.get(refinement_id)
+    if search_index is None or search_index.version != version:
+        # concurrent requests wait for the same build
+        search_index = search_index_builds.do(
+            (refinement_id, version),
+            partial(build_search_index, refinement_id, version),
+        )
+        search_index_cache.set(refinement_id, search_index)
+    return search_index
+
+
+def search_categories(refinement_id, query, limit):
+    """Search the categories of a refinement by name.
+
+    Args:
+        refinement_id:
+        query:
+        limit: maximum number of results.
+
+    Returns:
+        list: fancy tree nodes, with their ancestors
+
+    """
+    return get_search_index(refinement_id).search(query, limit)
@@ -0,0 +1,113 @@
+"""Coalescing of concurrent computations of the same value"""
+
+import threading
+import time
+import uuid
+
+from django.core.cache import caches
+
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_CACHE_ALIAS,
+    FANCY_TREE_FILL_LOCK_TIMEOUT,
+)
+
+# delay, in seconds, between two lookups while another process computes
+FILL_LOCK_POLL_INTERVAL = 0.05
+
+
+class _Call:
+    """Computation in progress, waited for by the other callers"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-safe group of computations: concurrent calls with the same key
+    only run the computation once, the other callers waiting for its result.
+    """
+
+    def __init__(self):
+        """Initialize the group"""
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Run func, unless a call with the same key is in progress, in which
+        case its result is returned (or its exception raised) when done.
+
+        Args:
+            key:
+            func: computation, called without arguments.
+
+        Returns:
+            result of func
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as exception:
+            call.error = exception
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def fill_once(lock_key, lookup, compute):
+    """Compute a value shared through a store (Django cache, snapshots), only
+    one process at a time computing it: while the lock of the Django cache is
+    held by another process, the store is looked up until the value is
+    available. The value is computed anyway if the lock is not released
+    within FANCY_TREE_FILL_LOCK_TIMEOUT seconds.
+
+    Args:
+        lock_key: Django cache key of the lock.
+        lookup: get the value from the store, None if not available.
+        compute: compute the value and fill the store.
+
+    Returns:
+        value
+
+    """
+    if not FANCY_TREE_FILL_LOCK_TIMEOUT:
+        return compute()
+
+    cache = caches[FANCY_TREE_CACHE_ALIAS]
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + FANCY_TREE_FILL_LOCK_TIMEOUT
+    is_locked = cache.add(lock_key, token, FANCY_TREE_FILL_LOCK_TIMEOUT)
+    while not is_locked:
+        value = lookup()
+        if value is not None:
+            return value
+        if time.monotonic() >= deadline:
+            return compute()
+        time.sleep(FILL_LOCK_POLL_INTERVAL)
+        is_locked = cache.add(lock_key, token, FANCY_TREE_FILL_LOCK_TIMEOUT)
+
+    try:
+        # filled by the previous holder of the lock
+        value = lookup()
+        if value is None:
+            value = compute()
+        return value
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
@@ -0,0 +1,333 @@
+"""Category tree snapshots, memory-mapped files shared by the processes"""
+
+import glob
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_SNAPSHOT_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"FTSNAP01"
+SNAPSHOT_FILE_NAME = "refinement_{refinement_id}_{version}.snapshot"
+SNAPSHOT_FILE_REGEX = re.compile(r"refinement_\d+_(\d+)\.snapshot$")
+HEADER_LENGTH_FORMAT = "<Q"
+SECTION_ALIGNMENT = 8
+
+# type codes of the numeric tables of a category tree
+NUMERIC_TABLES = {
+    "ids": "q",
+    "parents": "i",
+    "ends": "i",
+    "tag_indexes": "i",
+    "selectable": "B",
+    "sorted_ids": "q",
+    "sorted_positions": "i",
+}
+STRING_TABLES = ("names", "values")
+
+
+class StringTable(Sequence):
+    """Read-only sequence of strings stored as utf-8 data and offsets, decoded
+    on access."""
+
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets, data):
+        """
+
+        Args:
+            offsets: start of each string in data, followed by the end of the
+                data.
+            data: utf-8 encoded strings.
+
+        """
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("string table index out of range")
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return str(self.data[start:end], "utf-8")
+
+
+class ValueIndex(Mapping):
+    """Read-only category value -> category id mapping, looked up by bisection
+    over the sorted values."""
+
+    __slots__ = ("values", "ids")
+
+    def __init__(self, values, ids):
+        """
+
+        Args:
+            values: sorted category values.
+            ids: category id of each value.
+
+        """
+        self.values = values
+        self.ids = ids
+
+    def __getitem__(self, value):
+        if isinstance(value, str):
+            index = bisect_left(self.values, value)
+            if index < len(self.values) and self.values[index] == value:
+                return self.ids[index]
+        raise KeyError(value)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+
+def is_enabled():
+    """Check if the category trees are written as snapshots.
+
+    Returns:
+        bool
+
+    """
+    return bool(FANCY_TREE_SNAPSHOT_DIR)
+
+
+def _get_snapshot_path(refinement_id, version):
+    """Get the path of the snapshot of a refinement version.
+
+    Args:
+        refinement_id:
+        version:
+
+    Returns:
+        str: path of the snapshot file
+
+    """
+    return os.path.join(
+        FANCY_TREE_SNAPSHOT_DIR,
+        SNAPSHOT_FILE_NAME.format(
+            refinement_id=refinement_id, version=version
+        ),
+    )
+
+
+def _encode_strings(strings):
+    """Encode strings as utf-8 data and offsets.
+
+    Args:
+        strings:
+
+    Returns:
+        tuple: offsets array, data
+
+    """
+    offsets = array("q", [0])
+    data = bytearray()
+    for string in strings:
+        data += string.encode("utf-8")
+        offsets.append(len(data))
+    return offsets, data
+
+
+def write_snapshot(refinement_id, category_tree):
+    """Write the snapshot of a category tree, replacing atomically any
+    snapshot of the same version, and remove the snapshots of the previous
+    versions of the refinement. Does nothing if snapshots are disabled.
+
+    Args:
+        refinement_id:
+        category_tree:
+
+    Returns:
+        bool: True if the snapshot was written
+
+    """
+    if not FANCY_TREE_SNAPSHOT_DIR:
+        return False
+
+    sections = [
+        (name, NUMERIC_TABLES[name], getattr(category_tree, name))
+        for name in NUMERIC_TABLES
+    ]
+    for name in STRING_TABLES:
+        offsets, data = _encode_strings(getattr(category_tree, name))
+        sections.append((f"{name}_offsets", "q", offsets))
+        sections.append((f"{name}_data", "B", data))
+    index_values = sorted(category_tree.value_index)
+    offsets, data = _encode_strings(index_values)
+    sections.append(("index_values_offsets", "q", offsets))
+    sections.append(("index_values_data", "B", data))
+    sections.append(
+        (
+            "index_ids",
+            "q",
+            array(
+                "q",
+                (category_tree.value_index[value] for value in index_values),
+            ),
+        )
+    )
+
+    # sections are laid out after the header, aligned for zero-copy casts
+    header = {
+        "version": category_tree.version,
+        "tag_pairs": category_tree.tag_pairs,
+        "sections": {},
+    }
+    payloads = []
+    offset = 0
+    for name, type_code, table in sections:
+        payload = bytes(memoryview(table).cast("B"))
+        header["sections"][name] = [offset, len(payload), type_code]
+        padding = -len(payload) % SECTION_ALIGNMENT
+        payloads.append(payload + b"\0" * padding)
+        offset += len(payload) + padding
+    header_data = json.dumps(header).encode("utf-8")
+    header_data += b" " * (
+        -(len(SNAPSHOT_MAGIC) + 8 + len(header_data)) % SECTION_ALIGNMENT
+    )
+
+    temp_path = None
+    try:
+        os.makedirs(FANCY_TREE_SNAPSHOT_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=FANCY_TREE_SNAPSHOT_DIR, suffix=".tmp", delete=False
+        ) as snapshot_file:
+            temp_path = snapshot_file.name
+            snapshot_file.write(SNAPSHOT_MAGIC)
+            snapshot_file.write(
+                struct.pack(HEADER_LENGTH_FORMAT, len(header_data))
+            )
+            snapshot_file.write(header_data)
+            for payload in payloads:
+                snapshot_file.write(payload)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(
+            temp_path,
+            _get_snapshot_path(refinement_id, category_tree.version),
+        )
+    except OSError as exception:
+        logger.warning(
+            "Unable to write the snapshot of refinement %s: %s",
+            refinement_id,
+            str(exception),
+        )
+        if temp_path is not None:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        return False
+
+    _remove_previous_snapshots(refinement_id, category_tree.version)
+    return True
+
+
+def _remove_previous_snapshots(refinement_id, version):
+    """Remove the snapshots of the versions of a refinement older than
+    version. Processes mapping a removed snapshot keep reading it until they
+    unmap it.
+
+    Args:
+        refinement_id:
+        version:
+
+    Returns:
+
+    """
+    for path in glob.glob(_get_snapshot_path(refinement_id, "*")):
+        match = SNAPSHOT_FILE_REGEX.search(path)
+        if match and int(match.group(1)) < version:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def read_snapshot(refinement_id, version):
+    """Read the snapshot of a refinement version. The tables are views on the
+    memory-mapped file, shared with the other processes reading it.
+
+    Args:
+        refinement_id:
+        version:
+
+    Returns:
+        dict: tables of the category tree, None if snapshots are disabled or
+            if there is no valid snapshot of the version
+
+    """
+    if not FANCY_TREE_SNAPSHOT_DIR:
+        return None
+
+    try:
+        with open(
+            _get_snapshot_path(refinement_id, version), "rb"
+        ) as snapshot_file:
+            snapshot = mmap.mmap(
+                snapshot_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+    except (OSError, ValueError):
+        return None
+
+    try:
+        buffer = memoryview(snapshot)
+        if buffer[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError("invalid snapshot header")
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        (header_length,) = struct.unpack_from(
+            HEADER_LENGTH_FORMAT, buffer, len(SNAPSHOT_MAGIC)
+        )
+        sections_start = header_start + header_length
+        header = json.loads(str(buffer[header_start:sections_start], "utf-8"))
+        if header["version"] != version:
+            raise ValueError("snapshot version mismatch")
+
+        sections = {}
+        for name, (offset, length, type_code) in header["sections"].items():
+            start = sections_start + offset
+            end = start + length
+            if end > len(buffer):
+                raise ValueError("truncated snapshot")
+            sections[name] = buffer[start:end].cast(type_code)
+
+        tables = {name: sections[name] for name in NUMERIC_TABLES}
+        for name in STRING_TABLES:
+            tables[name] = StringTable(
+                sections[f"{name}_offsets"], sections[f"{name}_data"]
+            )
+        tables["tag_pairs"] = [
+            tuple(tag_pair) for tag_pair in header["tag_pairs"]
+        ]
+        tables["value_index"] = ValueIndex(
+            StringTable(
+                sections["index_values_offsets"], sections["index_values_data"]
+            ),
+            sections["index_ids"],
+        )
+    except (ValueError, KeyError, TypeError, struct.error) as exception:
+        logger.warning(
+            "Ignoring the snapshot of refinement %s: %s",
+            refinement_id,
+            str(exception),
+        )
+        return None
+
+    return tables
@@ -0,0 +1,85 @@
+"""Lazy fancy tree utilities"""
+
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+)
+
+
+def category_to_node(category_tree, position, selected_ids=()):
+    """Represent a category as a fancy tree node. Categories with children
+    are lazy folders, their children being loaded on expand.
+
+    Args:
+        category_tree:
+        position: position of the category in the tree.
+        selected_ids: ids of the selected categories, as strings.
+
+    Returns:
+        dict: fancy tree node
+
+    """
+    category_id = category_tree.ids[position]
+    node = {"title": category_tree.names[position], "key": category_id}
+    if str(category_id) in selected_ids:
+        node["selected"] = True
+        node["expand"] = True
+    if not category_tree.is_leaf(position):
+        node["folder"] = True
+        node["lazy"] = True
+    return node
+
+
+def get_lazy_tree(refinement_id, selected_ids=()):
+    """Get the top level nodes of a refinement tree, with the branches leading
+    to the selected categories already loaded and expanded.
+
+    Args:
+        refinement_id:
+        selected_ids: ids of the selected categories.
+
+    Returns:
+        list: fancy tree nodes
+
+    """
+    selected_ids = {str(selected_id) for selected_id in selected_ids}
+    category_tree = category_tree_utils.get_category_tree(refinement_id)
+
+    expanded_positions = set()
+    for selected_id in selected_ids:
+        position = category_tree.get_position(selected_id)
+        if position is not None and category_tree.selectable[position]:
+            expanded_positions.update(category_tree.iter_ancestors(position))
+
+    def get_nodes(position=None):
+        nodes = []
+        for child in category_tree.iter_selectable_children(position):
+            node = category_to_node(category_tree, child, selected_ids)
+            if child in expanded_positions:
+                node["expand"] = True
+                node["children"] = get_nodes(child)
+                del node["lazy"]
+            nodes.append(node)
+        return nodes
+
+    return get_nodes()
+
+
+def get_children(refinement_id, category_id):
+    """Get the children nodes of a category.
+
+    Args:
+        refinement_id:
+        category_id:
+
+    Returns:
+        list: fancy tree nodes
+
+    """
+    category_tree = category_tree_utils.get_category_tree(refinement_id)
+    position = category_tree.get_position(category_id)
+    if position is None:
+        return []
+    return [
+        category_to_node(category_tree, child)
+        for child in category_tree.iter_selectable_children(position)
+    ]
@@ -0,0 +1,217 @@
+"""Refinement and template content versions, shared through the Django cache"""
+
+import hashlib
+import time
+from functools import lru_cache
+from importlib import metadata
+
+from django.core.cache import caches
+from django.template.loader import get_template
+
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_CACHE_ALIAS,
+    FANCY_TREE_PAYLOAD_CACHE_TIMEOUT,
+)
+
+REFINEMENT_VERSION_KEY = "fancy_tree:refinement:{refinement_id}:version"
+REFINEMENT_CHANGE_KEY = (
+    "fancy_tree:refinement:{refinement_id}:change:{version}"
+)
+TEMPLATE_VERSION_KEY = "fancy_tree:template:{template_hash}:version"
+
+# packages and templates of the module html: the module rendered before a
+# change of one of them must not be served from the caches
+RENDER_PACKAGES = ("core_module_fancy_tree_registry_app", "core_parser_app")
+RENDER_TEMPLATES = (
+    "core_module_fancy_tree_registry_app/fancy_tree.html",
+    "core_module_fancy_tree_registry_app/fancy_tree_widget.html",
+    "core_module_fancy_tree_registry_app/lazy_fancy_tree_widget.html",
+    "core_module_fancy_tree_registry_app/virtual_fancy_tree_widget.html",
+)
+
+# operations of the recorded category changes
+CATEGORY_CREATED = "created"
+CATEGORY_UPDATED = "updated"
+CATEGORY_DELETED = "deleted"
+
+
+def _get_cache():
+    """Get the Django cache used by the module.
+
+    Returns:
+
+    """
+    return caches[FANCY_TREE_CACHE_ALIAS]
+
+
+def _init_version(cache, key):
+    """Initialize a version counter if missing. Counters start from the
+    current time so that a counter evicted from the cache never goes back to a
+    previously used value.
+
+    Args:
+        cache:
+        key:
+
+    Returns:
+
+    """
+    cache.add(key, time.time_ns() // 1000, timeout=None)
+    return cache.get(key)
+
+
+def _get_version(key):
+    """Get a version counter, initializing it if missing.
+
+    Args:
+        key:
+
+    Returns:
+        int: version
+
+    """
+    cache = _get_cache()
+    version = cache.get(key)
+    if version is None:
+        version = _init_version(cache, key)
+    return version
+
+
+def _bump_version(key):
+    """Increment a version counter, initializing it if missing.
+
+    Args:
+        key:
+
+    Returns:
+        int: new version
+
+    """
+    cache = _get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        _init_version(cache, key)
+        return cache.incr(key)
+
+
+def get_refinement_version(refinement_id):
+    """Get the content version of a refinement, bumped when the refinement or
+    one of its categories changes.
+
+    Args:
+        refinement_id:
+
+    Returns:
+        int: version of the refinement
+
+    """
+    return _get_version(
+        REFINEMENT_VERSION_KEY.format(refinement_id=refinement_id)
+    )
+
+
+def bump_refinement_version(refinement_id, change=None):
+    """Increment the content version of a refinement, invalidating everything
+    cached for its previous version.
+
+    Args:
+        refinement_id:
+        change: (operation, category id) of the category change leading to
+            the new version, recorded so that cached structures can be
+            patched rather than rebuilt.
+
+    Returns:
+        int: new version of the refinement
+
+    """
+    version = _bump_version(
+        REFINEMENT_VERSION_KEY.format(refinement_id=refinement_id)
+    )
+    if change is not None:
+        _get_cache().set(
+            REFINEMENT_CHANGE_KEY.format(
+                refinement_id=refinement_id, version=version
+            ),
+            change,
+            FANCY_TREE_PAYLOAD_CACHE_TIMEOUT,
+        )
+    return version
+
+
+def get_refinement_changes(refinement_id, from_version, to_version):
+    """Get the category changes of a refinement between two versions.
+
+    Args:
+        refinement_id:
+        from_version: version the changes are applied to.
+        to_version: version after the changes.
+
+    Returns:
+        list: (operation, category id) of each change, oldest first, None if
+            any version was not reached by a recorded change
+
+    """
+    keys = [
+        REFINEMENT_CHANGE_KEY.format(
+            refinement_id=refinement_id, version=version
+        )
+        for version in range(from_version + 1, to_version + 1)
+    ]
+    changes = _get_cache().get_many(keys)
+    if len(changes) != len(keys):
+        return None
+    return [changes[key] for key in keys]
+
+
+def get_template_version(template_hash):
+    """Get the content version of the refinements of a template, bumped when
+    one of them is created, changed or deleted.
+
+    Args:
+        template_hash:
+
+    Returns:
+        int: version of the refinements of the template
+
+    """
+    return _get_version(
+        TEMPLATE_VERSION_KEY.format(template_hash=template_hash)
+    )
+
+
+def bump_template_version(template_hash):
+    """Increment the content version of the refinements of a template,
+    invalidating everything cached for its previous version.
+
+    Args:
+        template_hash:
+
+    Returns:
+        int: new version of the refinements of the template
+
+    """
+    return _bump_version(
+        TEMPLATE_VERSION_KEY.format(template_hash=template_hash)
+    )
+
+
+@lru_cache(maxsize=1)
+def get_render_version():
+    """Get the version of the module rendering, from the versions of the
+    packages rendering it and the content of the module templates, so that a
+    deploy changing the markup invalidates the modules rendered before.
+
+    Returns:
+        str: version of the rendering
+
+    """
+    digest = hashlib.sha1()
+    for package in RENDER_PACKAGES:
+        try:
+            digest.update(f"{package}={metadata.version(package)};".encode())
+        except metadata.PackageNotFoundError:
+            pass
+    for template_name in RENDER_TEMPLATES:
+        digest.update(get_template(template_name).template.source.encode())
+    return digest.hexdigest()[:16]
@@ -0,0 +1,122 @@
+"""Handle category and refinement signals"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_module_fancy_tree_registry_app.utils import (
+    version as version_utils,
+)
+
+
+def init():
+    """Connect to category and refinement object events."""
+    post_save.connect(
+        category_saved,
+        sender=Category,
+        dispatch_uid="fancy_tree_post_save_category",
+    )
+    post_delete.connect(
+        category_deleted,
+        sender=Category,
+        dispatch_uid="fancy_tree_post_delete_category",
+    )
+    post_save.connect(
+        refinement_changed,
+        sender=Refinement,
+        dispatch_uid="fancy_tree_post_save_refinement",
+    )
+    post_delete.connect(
+        refinement_changed,
+        sender=Refinement,
+        dispatch_uid="fancy_tree_post_delete_refinement",
+    )
+
+
+def category_saved(sender, instance, created=False, using=None, **kwargs):
+    """Method executed after saving a Category object.
+
+    Args:
+        sender:
+        instance: category object.
+        created: True if the category was created.
+        using: database alias.
+        **kwargs:
+
+    Returns:
+
+    """
+    _record_category_change(
+        instance,
+        (
+            version_utils.CATEGORY_CREATED
+            if created
+            else version_utils.CATEGORY_UPDATED
+        ),
+        using,
+    )
+
+
+def category_deleted(sender, instance, using=None, **kwargs):
+    """Method executed after deleting a Category object.
+
+    Args:
+        sender:
+        instance: category object.
+        using: database alias.
+        **kwargs:
+
+    Returns:
+
+    """
+    _record_category_change(instance, version_utils.CATEGORY_DELETED, using)
+
+
+def _record_category_change(instance, operation, using):
+    """Bump the version of the refinement of a category, recording the
+    change, once the transaction is committed, so that other processes do not
+    cache the previous content under the new version.
+
+    Args:
+        instance: category object.
+        operation: operation of the change.
+        using: database alias.
+
+    Returns:
+
+    """
+    transaction.on_commit(
+        partial(
+            version_utils.bump_refinement_version,
+            instance.refinement_id,
+            (operation, instance.id),
+        ),
+        using=using,
+    )
+
+
+def refinement_changed(sender, instance, using=None, **kwargs):
+    """Method executed after saving or deleting a Refinement object. The
+    versions of the refinement and of its template are bumped once the
+    transaction is committed.
+
+    Args:
+        sender:
+        instance: refinement object.
+        using: database alias.
+        **kwargs:
+
+    Returns:
+
+    """
+    transaction.on_commit(
+        partial(version_utils.bump_refinement_version, instance.id),
+        using=using,
+    )
+    transaction.on_commit(
+        partial(version_utils.bump_template_version, instance.template_hash),
+        using=using,
+    )
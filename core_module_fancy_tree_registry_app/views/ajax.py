@@ -0,0 +1,240 @@
+"""Fancy Tree module AJAX views"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.db import connections
+from django.http.response import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotFound,
+)
+from django.views.generic import View
+
+from core_main_app.commons import exceptions
+from core_main_registry_app.components.template import (
+    api as template_registry_api,
+)
+from core_parser_app.tools.modules.exceptions import ModuleError
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_BATCH_WORKERS,
+    FANCY_TREE_SEARCH_LIMIT,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    search as search_utils,
+    tree as tree_utils,
+)
+from core_module_fancy_tree_registry_app.views.views import FancyTreeModule
+
+
+class ChildrenView(View):
+    """Children nodes of a category of a refinement.
+
+    Class based, so that the module discovery does not mistake it for a
+    module view.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """Get the children nodes of a category, as JSON.
+
+        Args:
+            request:
+            *args:
+            **kwargs:
+
+        Returns:
+
+        """
+        refinement_id = request.GET.get("refinement_id", "")
+        category_id = request.GET.get("category_id", "")
+        if not refinement_id.isdigit() or not category_id.isdigit():
+            return HttpResponseBadRequest(
+                json.dumps(
+                    {"message": "refinement_id and category_id are required."}
+                ),
+                content_type="application/json",
+            )
+
+        try:
+            children = tree_utils.get_children(refinement_id, category_id)
+        except exceptions.DoesNotExist as exception:
+            return _render_not_found(exception)
+        return HttpResponse(
+            json.dumps(children), content_type="application/json"
+        )
+
+
+class SearchView(View):
+    """Search of the categories of a refinement by name."""
+
+    def get(self, request, *args, **kwargs):
+        """Get the categories matching a query, with their ancestors, as
+        JSON.
+
+        Args:
+            request:
+            *args:
+            **kwargs:
+
+        Returns:
+
+        """
+        refinement_id = request.GET.get("refinement_id", "")
+        query = request.GET.get("query", "")
+        limit = request.GET.get("limit", str(FANCY_TREE_SEARCH_LIMIT))
+        if not refinement_id.isdigit() or not limit.isdigit():
+            return HttpResponseBadRequest(
+                json.dumps(
+                    {
+                        "message": "refinement_id is required and limit must "
+                        "be a number."
+                    }
+                ),
+                content_type="application/json",
+            )
+
+        try:
+            matches = search_utils.search_categories(
+                int(refinement_id),
+                query,
+                min(int(limit), FANCY_TREE_SEARCH_LIMIT),
+            )
+        except exceptions.DoesNotExist as exception:
+            return _render_not_found(exception)
+        return HttpResponse(
+            json.dumps(matches), content_type="application/json"
+        )
+
+
+class BatchRenderView(View):
+    """Rendering of the fancy tree modules of several elements in a single
+    request, the registry template and its refinements being looked up once.
+    """
+
+    def post(self, request, *args, **kwargs):
+        """Render the modules of a JSON list of `xml_xpath`/`data` pairs, sent
+        as `{"modules": [{"xml_xpath": ..., "data": ...}, ...]}`. Each module
+        is returned, in order, with either its `html` or its `error`.
+
+        Args:
+            request:
+            *args:
+            **kwargs:
+
+        Returns:
+
+        """
+        try:
+            modules = json.loads(request.body)["modules"]
+            if not isinstance(modules, list) or not all(
+                isinstance(module, dict)
+                and isinstance(module.get("xml_xpath"), str)
+                and isinstance(module.get("data", ""), str)
+                for module in modules
+            ):
+                raise ValueError()
+        except (ValueError, KeyError, TypeError):
+            return HttpResponseBadRequest(
+                json.dumps(
+                    {
+                        "message": "A list of modules with an xml_xpath is "
+                        "required."
+                    }
+                ),
+                content_type="application/json",
+            )
+
+        try:
+            template = template_registry_api.get_current_registry_template(
+                request=request
+            )
+        except Exception as exception:
+            error = "Something went wrong when rendering the module: " + str(
+                exception
+            )
+            results = [
+                {"xml_xpath": module["xml_xpath"], "error": error}
+                for module in modules
+            ]
+        else:
+            render = partial(render_batch_module, request, template)
+            if FANCY_TREE_BATCH_WORKERS > 1 and len(modules) > 1:
+                with ThreadPoolExecutor(
+                    max_workers=min(FANCY_TREE_BATCH_WORKERS, len(modules))
+                ) as executor:
+                    results = list(
+                        executor.map(
+                            partial(_render_batch_module_in_thread, render),
+                            modules,
+                        )
+                    )
+            else:
+                results = [render(module) for module in modules]
+
+        return HttpResponse(
+            json.dumps({"modules": results}),
+            content_type="application/json",
+        )
+
+
+def render_batch_module(request, template, module):
+    """Render the module of an element of a batch render request.
+
+    Args:
+        request:
+        template: registry template.
+        module: dict with the `xml_xpath` of the element and module `data`.
+
+    Returns:
+        dict: xml_xpath, and html or error message
+
+    """
+    module_view = FancyTreeModule()
+    module_view.data = module.get("data", "")
+    try:
+        return {
+            "xml_xpath": module["xml_xpath"],
+            "html": module_view.render_element(
+                request, module["xml_xpath"], template
+            ),
+        }
+    except ModuleError as module_error:
+        return {
+            "xml_xpath": module["xml_xpath"],
+            "error": module_error.message,
+        }
+
+
+def _render_batch_module_in_thread(render, module):
+    """Render a module in a worker thread, closing the database connections
+    opened by the thread.
+
+    Args:
+        render:
+        module:
+
+    Returns:
+        dict: xml_xpath, and html or error message
+
+    """
+    try:
+        return render(module)
+    finally:
+        connections.close_all()
+
+
+def _render_not_found(exception):
+    """Answer a request for an unknown refinement.
+
+    Args:
+        exception: lookup error.
+
+    Returns:
+        HttpResponseNotFound: JSON error message
+
+    """
+    return HttpResponseNotFound(
+        json.dumps({"message": str(exception)}),
+        content_type="application/json",
+    )
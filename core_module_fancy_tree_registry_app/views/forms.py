@@ -1,10 +1,84 @@
 """Refinement Form."""
 
 from django import forms
+from django.core.exceptions import ValidationError
 
 from core_main_registry_app.components.category import api as category_api
 from core_main_registry_app.constants import UNSPECIFIED_LABEL
-from core_main_registry_app.utils.fancytree.widget import FancyTreeWidget
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_LAZY_LOADING,
+    FANCY_TREE_VIRTUAL_RENDERING,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+)
+from core_module_fancy_tree_registry_app.views.widgets import (
+    CachedFancyTreeWidget,
+    LazyFancyTreeWidget,
+    VirtualFancyTreeWidget,
+)
+
+
+class CategoryMultipleChoiceField(forms.ModelMultipleChoiceField):
+    """Multiple choice field of the categories of a refinement.
+
+    The selected categories are validated against the category tree of the
+    refinement, also used to render the widget, instead of being queried.
+    """
+
+    def __init__(self, refinement_id, **kwargs):
+        """
+
+        Args:
+            refinement_id: id of the refinement of the categories.
+            **kwargs: ModelMultipleChoiceField arguments.
+
+        """
+        super().__init__(**kwargs)
+        self.refinement_id = refinement_id
+
+    def _check_values(self, value):
+        """Check that the selected categories can be selected in the tree of
+        the refinement.
+
+        Args:
+            value: selected category ids.
+
+        Returns:
+            Category collection (not evaluated)
+
+        """
+        try:
+            value = frozenset(value)
+        except TypeError:
+            raise ValidationError(
+                self.error_messages["invalid_list"], code="invalid_list"
+            )
+
+        unselectable_id_list = category_tree_utils.get_category_tree(
+            self.refinement_id
+        ).get_unselectable_ids(value)
+        if unselectable_id_list:
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": unselectable_id_list[0]},
+            )
+        return self.queryset.filter(pk__in=value)
+
+
+def _get_widget_class():
+    """Get the widget class of the categories, depending on the settings.
+
+    Returns:
+        FancyTreeWidget subclass
+
+    """
+    if FANCY_TREE_LAZY_LOADING:
+        return LazyFancyTreeWidget
+    if FANCY_TREE_VIRTUAL_RENDERING:
+        return VirtualFancyTreeWidget
+    return CachedFancyTreeWidget
 
 
 class RefinementForm(forms.Form):
@@ -17,13 +91,19 @@ class RefinementForm(forms.Form):
         field_id = kwargs.pop("field_id", None)
         super().__init__(*args, **kwargs)
         if refinement and field_id:
-            # Get categories except unspecified (those should be selected by checking a parent node)
+            # Get categories except unspecified (those should be selected by checking a parent node).
+            # The queryset is not evaluated, the field and the widget sharing the category tree
             categories = category_api.get_all_filtered_by_refinement_id(
                 refinement.id
             ).exclude(name__startswith=UNSPECIFIED_LABEL)
-            self.fields[field_id] = forms.ModelMultipleChoiceField(
+            self.fields[field_id] = CategoryMultipleChoiceField(
+                refinement_id=refinement.id,
                 queryset=categories,
                 required=False,
                 label="",
-                widget=FancyTreeWidget(queryset=categories, select_mode=2),
+                widget=_get_widget_class()(
+                    queryset=categories,
+                    select_mode=2,
+                    refinement_id=refinement.id,
+                ),
             )
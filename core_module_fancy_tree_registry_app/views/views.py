@@ -1,18 +1,59 @@
 """Fancy Tree module view"""
 
-import re
+import asyncio
+import hashlib
+import json
+from contextlib import contextmanager
+from functools import update_wrapper
+
+from asgiref.sync import async_to_sync, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotModified,
+)
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 
-from core_main_registry_app.components.category import api as category_api
-from core_main_registry_app.components.refinement import api as refinement_api
 from core_main_registry_app.components.template import (
     api as template_registry_api,
 )
-from core_main_registry_app.constants import CATEGORY_SUFFIX, UNSPECIFIED_LABEL
+from core_parser_app.components.data_structure_element import (
+    api as data_structure_element_api,
+)
 from core_parser_app.tools.modules.exceptions import ModuleError
 from core_parser_app.tools.modules.views.module import AbstractModule
-from xml_utils.xsd_tree.xsd_tree import XSDTree
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_INSTRUMENTATION,
+    FANCY_TREE_LAZY_LOADING,
+    FANCY_TREE_SAVE_DELAY,
+    FANCY_TREE_VIRTUAL_RENDERING,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    category as category_utils,
+    category_tree as category_tree_utils,
+    data as data_utils,
+    refinement as refinement_utils,
+    version as version_utils,
+)
+from core_module_fancy_tree_registry_app.utils.instrumentation import (
+    Instrumentation,
+)
 from core_module_fancy_tree_registry_app.views.forms import RefinementForm
 
+# content type of the POST requests rendering the module, sent instead of GET
+# requests when the module data is too large for the URL
+RENDER_CONTENT_TYPE = "application/json"
+RENDER_PARAMETERS = ("module_id", "xml_xpath", "url", "data")
+
+INIT_ERROR = "Something went wrong during module initialization: "
+UPDATE_ERROR = "Something went wrong during module update: "
+RENDER_ERROR = "Something went wrong when rendering the module: "
+POSTED_DATA_ERROR = (
+    "Something went wrong during the processing of posted data: "
+)
+
 
 class FancyTreeModule(AbstractModule):
     """Fancy Tree Module"""
@@ -24,37 +65,438 @@ class FancyTreeModule(AbstractModule):
             self,
             scripts=["core_module_fancy_tree_registry_app/js/fancy_tree.js"],
         )
+        self.instrumentation = Instrumentation(FANCY_TREE_INSTRUMENTATION)
+        self.module_refinement = None
+        self.render_parameters = None
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if asyncio.iscoroutine(response):
+            return self._areport(response)
+        return self.instrumentation.report(response)
+
+    async def _areport(self, response):
+        return self.instrumentation.report(await response)
+
+    def _get(self, request):
+        """Manage the GET requests, answering 304 Not Modified if the module
+        rendered by the client is still up to date.
+
+        Args:
+            request:
+
+        Returns:
+
+        """
+        etag = self._get_etag(request)
+        if self._is_not_modified(request, etag):
+            self._save_rendered_data(request)
+            response = HttpResponseNotModified()
+        else:
+            response = self._render(request)
+
+        return self._set_etag(response, etag)
+
+    def _render(self, request):
+        """Render the module, and save its data.
+
+        Args:
+            request:
+
+        Returns:
+
+        """
+        parameters = self._get_render_parameters(request)
+        module_element = None
+        if "url" not in parameters:
+            module_element = data_structure_element_api.get_by_id(
+                parameters["module_id"], request
+            )
+        template_data = self._get_template_data(parameters, module_element)
+
+        with _module_error(INIT_ERROR):
+            self.data = self._retrieve_data(request)
+            template_data["module"] = self._render_module(request)
+            template_data["display"] = self._render_data(request)
+            self._save_module_data(parameters["module_id"], request)
+
+        return self._render_response(template_data)
+
+    @staticmethod
+    def _get_template_data(parameters, module_element=None):
+        """Get the data of the module template, before rendering the module.
+
+        Args:
+            parameters: render parameters.
+            module_element: data structure element of the module, loaded if
+                the url is not a render parameter.
+
+        Returns:
+            dict: module_id, module, display and url of the module
+
+        """
+        return {
+            "module_id": parameters["module_id"],
+            "module": "",
+            "display": "",
+            "url": (
+                parameters["url"]
+                if module_element is None
+                else module_element.options["url"]
+            ),
+        }
+
+    def _render_response(self, template_data):
+        """Answer a module rendering.
+
+        Args:
+            template_data: data of the module template.
+
+        Returns:
+            HttpResponse
+
+        """
+        return HttpResponse(
+            AbstractModule.render_template(self.template_name, template_data)
+        )
+
+    def _save_rendered_data(self, request):
+        """Save the data of the module rendered by the client, when it is
+        still up to date. The stored data may differ (e.g. after a draft
+        switch), and must match the client's for its changes to be applied
+        to it.
+
+        Args:
+            request:
+
+        Returns:
+
+        """
+        with _module_error(INIT_ERROR):
+            self.data = self._retrieve_data(request)
+            self._save_module_data(
+                self._get_render_parameters(request)["module_id"], request
+            )
+
+    def _save_module_data(self, module_id, request):
+        """Save the module data in its data structure element, if changed.
+
+        Args:
+            module_id:
+            request:
+
+        Returns:
+
+        """
+        module_element = data_structure_element_api.get_by_id(
+            module_id, request
+        )
+        if module_element.options.get("data") == self.data:
+            return
+        self._set_module_data(module_element)
+        data_structure_element_api.upsert(module_element, request)
+
+    def _set_module_data(self, module_element):
+        """Set the module data in its data structure element.
+
+        Args:
+            module_element:
+
+        Returns:
+
+        """
+        options = module_element.options
+        options["data"] = self.data
+        module_element.options = options
+
+    def post(self, request, *args, **kwargs):
+        """Manage POST requests: render the module for a JSON request, else
+        save the posted module data.
+
+        Args:
+            request:
+            *args:
+            **kwargs:
+
+        Returns:
+
+        """
+        if request.content_type == RENDER_CONTENT_TYPE:
+            try:
+                self.render_parameters = self._read_render_parameters(request)
+            except ValueError as exception:
+                return _render_bad_request(exception)
+            return self._render(request)
+
+        if "module_id" not in request.POST:
+            return _render_missing_module_id()
+
+        with _module_error(UPDATE_ERROR):
+            module_element = data_structure_element_api.get_by_id(
+                request.POST["module_id"], request
+            )
+            self.data = self._retrieve_data(request, module_element)
+            self._set_module_data(module_element)
+            data_structure_element_api.upsert(module_element, request)
+
+        return self._render_post_response(request)
+
+    def _render_post_response(self, request):
+        """Answer a save of the posted module data.
+
+        Args:
+            request:
+
+        Returns:
+            HttpResponse: JSON module html
+
+        """
+        html_code = AbstractModule.render_template(
+            self.template_name,
+            {"display": self._render_data(request), "url": ""},
+        )
+        return HttpResponse(json.dumps({"html": html_code}))
+
+    @staticmethod
+    def _read_render_parameters(request):
+        """Read the parameters of a module rendering from the JSON body of a
+        POST request, compressed if sent with a `Content-Encoding`. The body
+        has the parameters of the GET request:
+        `{"module_id": ..., "xml_xpath": ..., "url": ..., "data": ...}`.
+
+        Args:
+            request:
+
+        Returns:
+            dict: module_id, xml_xpath, and optional url and data
+
+        Raises:
+            ValueError: if the body is not a valid render request.
+
+        """
+        body = data_utils.decompress(
+            request.body,
+            request.headers.get("Content-Encoding"),
+            settings.DATA_UPLOAD_MAX_MEMORY_SIZE,
+        )
+        try:
+            parameters = json.loads(body)
+        except ValueError:
+            raise ValueError("The body is not valid JSON.")
+        if (
+            not isinstance(parameters, dict)
+            or "module_id" not in parameters
+            or "xml_xpath" not in parameters
+            or not all(
+                isinstance(parameters.get(name, ""), str)
+                for name in RENDER_PARAMETERS
+            )
+        ):
+            raise ValueError(
+                "A module_id and an xml_xpath are required, and all "
+                "parameters must be strings."
+            )
+        return {
+            name: parameters[name]
+            for name in RENDER_PARAMETERS
+            if name in parameters
+        }
+
+    def _get_render_parameters(self, request):
+        """Get the parameters of the module rendering: the parameters of a
+        POST render request, else the GET parameters.
+
+        Args:
+            request:
+
+        Returns:
+            dict: module_id, xml_xpath, url and data parameters
+
+        """
+        if self.render_parameters is not None:
+            return self.render_parameters
+        return request.GET
+
+    @staticmethod
+    def _is_not_modified(request, etag):
+        """Check if the module rendered by the client has the current ETag.
+
+        Args:
+            request:
+            etag:
+
+        Returns:
+
+        """
+        return etag is not None and etag in parse_etags(
+            request.headers.get("If-None-Match", "")
+        )
+
+    @staticmethod
+    def _set_etag(response, etag):
+        """Set the ETag of a module response, the client revalidating the
+        module each time it is requested.
+
+        Args:
+            response:
+            etag:
+
+        Returns:
+            response
+
+        """
+        if etag is not None:
+            response["ETag"] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def _get_etag(self, request):
+        """Get the ETag of the module rendered for a GET request, from the
+        template hash, the refinement and its version, and the module data.
+
+        Args:
+            request:
+
+        Returns:
+            str: quoted ETag, None if the module cannot be identified
+
+        """
+        parameters = self._get_render_parameters(request)
+        xml_xpath = parameters.get("xml_xpath", None)
+        if xml_xpath is None or "module_id" not in parameters:
+            return None
+
+        try:
+            _, refinement, template = self._get_module_refinement(
+                request, xml_xpath
+            )
+        except Exception:
+            # let the module rendering report the error
+            return None
+
+        return self._compute_etag(parameters, xml_xpath, refinement, template)
+
+    @staticmethod
+    def _compute_etag(parameters, xml_xpath, refinement, template):
+        """Compute the ETag of the module rendered for a GET request.
+
+        Args:
+            parameters: GET parameters.
+            xml_xpath:
+            refinement:
+            template:
+
+        Returns:
+            str: quoted ETag
+
+        """
+        digest = hashlib.sha1(
+            "|".join(
+                [
+                    template.hash,
+                    str(refinement.id),
+                    str(version_utils.get_refinement_version(refinement.id)),
+                    str(version_utils.get_render_version()),
+                    xml_xpath,
+                    parameters["module_id"],
+                    parameters.get("url", ""),
+                    parameters.get("data", ""),
+                    str(FANCY_TREE_LAZY_LOADING),
+                    str(FANCY_TREE_VIRTUAL_RENDERING),
+                    str(FANCY_TREE_SAVE_DELAY),
+                ]
+            ).encode()
+        ).hexdigest()
+        return quote_etag(digest)
+
+    def _get_module_refinement(self, request, xml_xpath, template=None):
+        """Get the refinement of the element on which the module is placed.
+        The lookup is done once per request.
+
+        Args:
+            request:
+            xml_xpath:
+            template: registry template, if already resolved by the caller.
+
+        Returns:
+            tuple: field id, refinement and registry template
+
+        """
+        if self.module_refinement is None:
+            with self.instrumentation.phase("refinement"):
+                # get the field id and the element name from the xpath
+                field_id, xml_element = refinement_utils.parse_xml_xpath(
+                    xml_xpath
+                )
+
+                # get registry template
+                if template is None:
+                    template = (
+                        template_registry_api.get_current_registry_template(
+                            request=request
+                        )
+                    )
+                # get the refinement for the xml element
+                refinement = refinement_utils.get_by_xsd_name(
+                    template.hash, xml_element
+                )
+            self._set_module_refinement(
+                xml_xpath, field_id, refinement, template
+            )
+
+        return self.module_refinement
+
+    def _set_module_refinement(
+        self, xml_xpath, field_id, refinement, template
+    ):
+        """Keep the refinement of the element on which the module is placed
+        for the rest of the request.
+
+        Args:
+            xml_xpath:
+            field_id:
+            refinement:
+            template: registry template.
+
+        Returns:
+
+        """
+        self.instrumentation.tags["xml_xpath"] = xml_xpath
+        self.instrumentation.tags["refinement_id"] = refinement.id
+        self.module_refinement = (field_id, refinement, template)
 
     def _reload_data(self, field_id, refinement):
         if self.data == "":  # If no data is provided, the form will be empty.
             return {}
 
-        # Get the categories for the current refinement
-        categories = category_api.get_all_filtered_by_refinement_id(
-            refinement.id
-        )
+        # Get the value to category id index of the current refinement
+        with self.instrumentation.phase("categories"):
+            value_index = category_utils.get_value_index(refinement.id)
+        return self._get_reload_data(field_id, value_index)
+
+    def _get_reload_data(self, field_id, value_index):
+        """Get the form data selecting the categories of the module data.
+
+        Args:
+            field_id:
+            value_index: category value -> category id index of the
+                refinement.
+
+        Returns:
+            dict: form data
+
+        """
         # Initialize list of categories id
         reload_categories_id_list = []
         # Load list of data to reload from XML
-        reload_data = XSDTree.fromstring(f"<root>{self.data}</root>")
+        with self.instrumentation.phase("xml_parse"):
+            reload_data = self._get_data_elements(self.data)
         # Iterate xml elements
-        for reload_data_element in list(reload_data):
+        for _, _, selected_value in reload_data:
             try:
-                if len(reload_data_element) == 0:
-                    continue
-
-                # The xml element value to be reloaded is the child element
-                selected_value = reload_data_element[0].text
-                # find the corresponding category and add its id to the list
-                category = categories.get(value=selected_value)
-                # if the element is an unspecified element
-                if category.slug.startswith(UNSPECIFIED_LABEL):
-                    # get the parent category
-                    category = categories.get(
-                        value=f"{selected_value}{CATEGORY_SUFFIX}"
-                    )
-
-                reload_categories_id_list.append(category.id)
+                # find the corresponding category (or the parent category of
+                # an unspecified element) and add its id to the list
+                reload_categories_id_list.append(value_index[selected_value])
             except Exception as exception:
                 raise ModuleError(
                     "Something went wrong when reloading data from XML."
@@ -67,82 +509,591 @@ class FancyTreeModule(AbstractModule):
         }
 
     def _render_module(self, request):
-        # get the xml path of the element on which the module is placed
-        xml_xpath = request.GET.get("xml_xpath", None)
-        # xml path is provided
+        xml_xpath = self._get_render_xml_xpath(request)
+
+        return self.render_element(request, xml_xpath)
+
+    def render_element(self, request, xml_xpath, template=None):
+        """Render the module of an element, with the current module data.
+
+        Args:
+            request:
+            xml_xpath: xml path of the element on which the module is placed.
+            template: registry template, if already resolved by the caller.
+
+        Returns:
+            str: module html
+
+        """
+        with _module_error(RENDER_ERROR):
+            field_id, refinement, _ = self._get_module_refinement(
+                request, xml_xpath, template
+            )
+            reload_data = self._reload_data(field_id, refinement)
+            return self._render_form(field_id, refinement, reload_data)
+
+    def _get_render_xml_xpath(self, request):
+        """Get the xml path of the element on which the module is placed.
+
+        Args:
+            request:
+
+        Returns:
+            str: xml path
+
+        Raises:
+            ModuleError: if the xml path is not a render parameter.
+
+        """
+        xml_xpath = self._get_render_parameters(request).get("xml_xpath", None)
         if xml_xpath is None:
             raise ModuleError(
                 "xml_xpath was not found in request GET parameters."
             )
+        return xml_xpath
 
-        try:
-            # create unique field id from xpath
-            field_id = re.sub(r"[/.:\[\]]", "", xml_xpath)
-            # get the last element of the xpath
-            xml_element = xml_xpath.split("/")[-1]
-            # only keep element name if namespace is present
-            if ":" in xml_element:
-                xml_element = xml_element.split(":")[-1]
+    def _render_form(self, field_id, refinement, reload_data):
+        """Render the refinement form of the module.
 
-            # get registry template
-            template = template_registry_api.get_current_registry_template(
-                request=request
-            )
-            # get all refinements for this template
-            refinement_query_set = (
-                refinement_api.get_all_filtered_by_template_hash(template.hash)
-            )
-            # get the refinement for the xml element
-            refinement = refinement_query_set.get(xsd_name=xml_element)
+        Args:
+            field_id:
+            refinement:
+            reload_data: form data.
+
+        Returns:
+            str: module html
 
+        """
+        with self.instrumentation.phase("render"):
             return AbstractModule.render_template(
                 "core_module_fancy_tree_registry_app/fancy_tree.html",
                 {
                     "form": RefinementForm(
                         refinement=refinement,
                         field_id=field_id,
-                        data=self._reload_data(field_id, refinement),
-                    )
+                        data=reload_data,
+                    ),
+                    "save_delay": FANCY_TREE_SAVE_DELAY,
                 },
             )
-        except Exception as exception:
-            raise ModuleError(
-                "Something went wrong when rendering the module: "
-                + str(exception)
-            )
 
-    def _retrieve_data(self, request):
-        if request.method == "GET":
-            return request.GET.get("data", "")
+    def _retrieve_data(self, request, module_element=None):
+        """Retrieve the module data, from the render parameters, or posted by
+        the client.
 
-        if request.method == "POST":
-            form = RefinementForm(request.POST)
-            if not form.is_valid():
-                raise ModuleError("Data not properly sent to server.")
+        Args:
+            request:
+            module_element: data structure element of the module, if already
+                loaded by the caller.
 
-            if "data[]" not in request.POST:
-                return ""
+        Returns:
+            str: module data
 
-            data = ""
-            try:
-                category_id_list = request.POST.getlist("data[]")
-                for category_id in category_id_list:
-                    category = category_api.get_by_id(category_id)
-                    split_category_path = category.path.split(".")
-                    category_value = (
-                        category.value
-                        if not category.value.endswith(CATEGORY_SUFFIX)
-                        else category.value[: -len(CATEGORY_SUFFIX)]
+        """
+        if request.method == "GET" or self.render_parameters is not None:
+            return self._get_render_parameters(request).get("data", "")
+
+        if request.method == "POST":
+            with _module_error(POSTED_DATA_ERROR):
+                if module_element is None:
+                    module_element = data_structure_element_api.get_by_id(
+                        request.POST["module_id"], request
                     )
+                category_tree = self._get_posted_category_tree(
+                    request, module_element
+                )
+                return self._get_posted_data(
+                    request, module_element, category_tree
+                )
 
-                    data += f"<{split_category_path[-2]}><{split_category_path[-1]}>{category_value}</{split_category_path[-1]}></{split_category_path[-2]}>"
-            except Exception as exception:
-                raise ModuleError(
-                    "Something went wrong during the processing of posted data: "
-                    + str(exception)
+    def _get_posted_data(self, request, module_element, category_tree):
+        """Get the module data from the posted categories: all the selected
+        categories, or the categories added and removed since the last save.
+
+        Args:
+            request:
+            module_element: data structure element of the module.
+            category_tree: category tree of the refinement of the module.
+
+        Returns:
+            str: module data
+
+        """
+        if "data[]" in request.POST:
+            with self.instrumentation.phase("categories"):
+                category_elements = category_tree.get_elements(
+                    request.POST.getlist("data[]")
                 )
+        elif "added[]" in request.POST or "removed[]" in request.POST:
+            category_elements = self._apply_data_delta(
+                module_element,
+                request.POST.getlist("added[]"),
+                request.POST.getlist("removed[]"),
+                category_tree,
+            )
+        else:
+            return ""
+
+        return self._format_data(category_elements)
+
+    def _get_posted_category_tree(self, request, module_element):
+        """Get the category tree of the refinement of the module, and check
+        that the posted categories can be selected in it.
+
+        Args:
+            request:
+            module_element: data structure element of the module.
+
+        Returns:
+            CategoryTree
+
+        Raises:
+            ModuleError: if a posted category is not a selectable category
+                of the refinement.
+
+        """
+        _, refinement, _ = self._get_module_refinement(
+            request, module_element.options["xpath"]["xml"]
+        )
+        with self.instrumentation.phase("categories"):
+            category_tree = category_tree_utils.get_category_tree(
+                refinement.id
+            )
+        self._check_posted_categories(request, category_tree)
+        return category_tree
+
+    @staticmethod
+    def _check_posted_categories(request, category_tree):
+        """Check that the posted categories can be selected in the category
+        tree of their refinement.
+
+        Args:
+            request:
+            category_tree:
+
+        Returns:
+
+        Raises:
+            ModuleError: if a posted category is not a selectable category
+                of the tree.
+
+        """
+        unselectable_id_list = category_tree.get_unselectable_ids(
+            request.POST.getlist("data[]")
+            + request.POST.getlist("added[]")
+            + request.POST.getlist("removed[]")
+        )
+        if unselectable_id_list:
+            raise ModuleError(
+                "Data not properly sent to server. Unknown category ids: "
+                f"{', '.join(unselectable_id_list)}."
+            )
+
+    @staticmethod
+    def _format_data(data_elements):
+        """Format xml elements as module data.
+
+        Args:
+            data_elements: (parent tag, child tag, value) of each element.
+
+        Returns:
+            str: module data
+
+        """
+        return data_utils.format_data(data_elements)
+
+    @staticmethod
+    def _get_data_elements(data):
+        """Get the xml elements of existing module data.
+
+        Args:
+            data:
+
+        Returns:
+            list: (parent tag, child tag, value) of each element
+
+        """
+        return list(data_utils.iter_data_elements(data))
+
+    def _apply_data_delta(
+        self,
+        module_element,
+        added_id_list,
+        removed_id_list,
+        category_tree,
+    ):
+        """Apply the categories added and removed by the client to the data
+        currently stored for the module.
 
-            return data
+        Args:
+            module_element: data structure element of the module.
+            added_id_list:
+            removed_id_list:
+            category_tree: category tree of the refinement of the categories.
+
+        Returns:
+            list: (parent tag, child tag, value) of each selected category
+
+        """
+        with self.instrumentation.phase("xml_parse"):
+            data_elements = self._get_data_elements(
+                module_element.options.get("data", "")
+            )
+
+        with self.instrumentation.phase("categories"):
+            category_elements = category_tree.get_elements(
+                added_id_list + removed_id_list
+            )
+        return self._merge_data_delta(
+            data_elements, category_elements, len(added_id_list)
+        )
+
+    @staticmethod
+    def _merge_data_delta(data_elements, category_elements, added_count):
+        """Merge the added and removed categories into the module data.
+
+        Args:
+            data_elements: (parent tag, child tag, value) of each element of
+                the stored data.
+            category_elements: (parent tag, child tag, value) of the added,
+                then removed, categories.
+            added_count: number of added categories.
+
+        Returns:
+            list: (parent tag, child tag, value) of each selected category
+
+        """
+        added_elements = category_elements[:added_count]
+        removed_elements = set(category_elements[added_count:])
+
+        data_elements = [
+            element
+            for element in data_elements
+            if element not in removed_elements
+        ]
+        selected_elements = set(data_elements) | removed_elements
+        for element in added_elements:
+            if element not in selected_elements:
+                data_elements.append(element)
+                selected_elements.add(element)
+        return data_elements
 
     def _render_data(self, request):
         return ""
+
+
+class AsyncFancyTreeModule(FancyTreeModule):
+    """Fancy Tree Module with async request handlers, for ASGI deployments.
+
+    Refinements are queried with the async ORM interface. The category trees,
+    the template and data structure element APIs, and the rendering of the
+    form, are run in a thread, so the instrumentation reports no queries.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """Get the async view, also callable from synchronous code (e.g. the
+        module resources views).
+
+        Args:
+            **initkwargs:
+
+        Returns:
+
+        """
+        async_view = super().as_view(**initkwargs)
+
+        def view(request, *args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return async_to_sync(async_view)(request, *args, **kwargs)
+            return async_view(request, *args, **kwargs)
+
+        update_wrapper(view, async_view)
+        return markcoroutinefunction(view)
+
+    async def get(self, request, *args, **kwargs):
+        """Manage the GET requests
+
+        Args:
+            request:
+            *args:
+            **kwargs:
+
+        Returns:
+
+        """
+        if "resources" in request.GET or "managing_occurrences" in request.GET:
+            return super().get(request, *args, **kwargs)
+
+        return await self._aget(request)
+
+    async def _aget(self, request):
+        """Manage the GET requests, answering 304 Not Modified if the module
+        rendered by the client is still up to date.
+
+        Args:
+            request:
+
+        Returns:
+
+        """
+        etag = await self._aget_etag(request)
+        if self._is_not_modified(request, etag):
+            await sync_to_async(self._save_rendered_data)(request)
+            response = HttpResponseNotModified()
+        else:
+            response = await self._arender(request)
+
+        return self._set_etag(response, etag)
+
+    async def _arender(self, request):
+        """Render the module, and save its data.
+
+        Args:
+            request:
+
+        Returns:
+
+        """
+        parameters = self._get_render_parameters(request)
+        module_element = None
+        if "url" not in parameters:
+            module_element = await sync_to_async(
+                data_structure_element_api.get_by_id
+            )(parameters["module_id"], request)
+        template_data = self._get_template_data(parameters, module_element)
+
+        with _module_error(INIT_ERROR):
+            self.data = self._retrieve_data(request)
+            template_data["module"] = await self._arender_module(request)
+            template_data["display"] = self._render_data(request)
+            await sync_to_async(self._save_module_data)(
+                parameters["module_id"], request
+            )
+
+        return self._render_response(template_data)
+
+    async def post(self, request, *args, **kwargs):
+        """Manage POST requests: render the module for a JSON request, else
+        save the posted module data.
+
+        Args:
+            request:
+            *args:
+            **kwargs:
+
+        Returns:
+
+        """
+        if request.content_type == RENDER_CONTENT_TYPE:
+            try:
+                self.render_parameters = self._read_render_parameters(request)
+            except ValueError as exception:
+                return _render_bad_request(exception)
+            return await self._arender(request)
+
+        if "module_id" not in request.POST:
+            return _render_missing_module_id()
+
+        with _module_error(UPDATE_ERROR):
+            module_element = await sync_to_async(
+                data_structure_element_api.get_by_id
+            )(request.POST["module_id"], request)
+            self.data = await self._aretrieve_data(request, module_element)
+            self._set_module_data(module_element)
+            await sync_to_async(data_structure_element_api.upsert)(
+                module_element, request
+            )
+
+        return self._render_post_response(request)
+
+    async def _aget_etag(self, request):
+        """Get the ETag of the module rendered for a GET request, from the
+        template hash, the refinement and its version, and the module data.
+
+        Args:
+            request:
+
+        Returns:
+            str: quoted ETag, None if the module cannot be identified
+
+        """
+        parameters = self._get_render_parameters(request)
+        xml_xpath = parameters.get("xml_xpath", None)
+        if xml_xpath is None or "module_id" not in parameters:
+            return None
+
+        try:
+            _, refinement, template = await self._aget_module_refinement(
+                request, xml_xpath
+            )
+        except Exception:
+            # let the module rendering report the error
+            return None
+
+        return self._compute_etag(parameters, xml_xpath, refinement, template)
+
+    async def _aget_module_refinement(self, request, xml_xpath, template=None):
+        """Get the refinement of the element on which the module is placed.
+        The lookup is done once per request.
+
+        Args:
+            request:
+            xml_xpath:
+            template: registry template, if already resolved by the caller.
+
+        Returns:
+            tuple: field id, refinement and registry template
+
+        """
+        if self.module_refinement is None:
+            with self.instrumentation.phase("refinement"):
+                field_id, xml_element = refinement_utils.parse_xml_xpath(
+                    xml_xpath
+                )
+                if template is None:
+                    template = await sync_to_async(
+                        template_registry_api.get_current_registry_template
+                    )(request=request)
+                refinement = await refinement_utils.aget_by_xsd_name(
+                    template.hash, xml_element
+                )
+            self._set_module_refinement(
+                xml_xpath, field_id, refinement, template
+            )
+
+        return self.module_refinement
+
+    async def _areload_data(self, field_id, refinement):
+        """Get the form data selecting the categories of the module data.
+
+        Args:
+            field_id:
+            refinement:
+
+        Returns:
+            dict: form data
+
+        """
+        if self.data == "":
+            return {}
+
+        with self.instrumentation.phase("categories"):
+            value_index = await category_utils.aget_value_index(refinement.id)
+        return self._get_reload_data(field_id, value_index)
+
+    async def _arender_module(self, request):
+        """Render the module content
+
+        Args:
+            request:
+
+        Returns:
+            str: module html
+
+        """
+        xml_xpath = self._get_render_xml_xpath(request)
+
+        with _module_error(RENDER_ERROR):
+            field_id, refinement, _ = await self._aget_module_refinement(
+                request, xml_xpath
+            )
+            reload_data = await self._areload_data(field_id, refinement)
+            return await sync_to_async(self._render_form)(
+                field_id, refinement, reload_data
+            )
+
+    async def _aretrieve_data(self, request, module_element):
+        """Retrieve the module data posted by the client.
+
+        Args:
+            request:
+            module_element: data structure element of the module.
+
+        Returns:
+            str: module data
+
+        """
+        with _module_error(POSTED_DATA_ERROR):
+            category_tree = await self._aget_posted_category_tree(
+                request, module_element
+            )
+            return self._get_posted_data(
+                request, module_element, category_tree
+            )
+
+    async def _aget_posted_category_tree(self, request, module_element):
+        """Get the category tree of the refinement of the module, and check
+        that the posted categories can be selected in it.
+
+        Args:
+            request:
+            module_element: data structure element of the module.
+
+        Returns:
+            CategoryTree
+
+        Raises:
+            ModuleError: if a posted category is not a selectable category
+                of the refinement.
+
+        """
+        _, refinement, _ = await self._aget_module_refinement(
+            request, module_element.options["xpath"]["xml"]
+        )
+        with self.instrumentation.phase("categories"):
+            category_tree = await category_tree_utils.aget_category_tree(
+                refinement.id
+            )
+        self._check_posted_categories(request, category_tree)
+        return category_tree
+
+
+@contextmanager
+def _module_error(message):
+    """Raise the errors of the context as a ModuleError.
+
+    Args:
+        message: beginning of the error message.
+
+    Returns:
+
+    Raises:
+        ModuleError: with the message of the error.
+
+    """
+    try:
+        yield
+    except Exception as exception:
+        raise ModuleError(message + str(exception))
+
+
+def _render_bad_request(exception):
+    """Answer an invalid module render request.
+
+    Args:
+        exception: validation error.
+
+    Returns:
+        HttpResponseBadRequest: JSON error message
+
+    """
+    return HttpResponseBadRequest(
+        json.dumps({"message": str(exception)}),
+        content_type="application/json",
+    )
+
+
+def _render_missing_module_id():
+    """Answer a save of module data without module id.
+
+    Returns:
+        HttpResponseBadRequest: JSON error message
+
+    """
+    return HttpResponseBadRequest(
+        json.dumps({"error": 'No "module_id" parameter provided'}),
+        content_type="application/json",
+    )
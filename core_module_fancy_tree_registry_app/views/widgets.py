@@ -0,0 +1,409 @@
+"""Fancy Tree widgets"""
+
+import hashlib
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.forms.utils import flatatt
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.encoding import force_str
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from core_main_registry_app.utils.fancytree.widget import (
+    FANCYTREE_CDN_PATH,
+    FancyTreeWidget,
+)
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_CACHE_ALIAS,
+    FANCY_TREE_PAYLOAD_CACHE_TIMEOUT,
+    FANCY_TREE_VIEWPORT_ROWS,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+    single_flight as single_flight_utils,
+    tree as tree_utils,
+    version as version_utils,
+)
+
+PAYLOAD_KEY = (
+    "fancy_tree:payload:{refinement_id}:{version}:{render_version}:{settings}"
+)
+VIRTUAL_PAYLOAD_KEY = (
+    "fancy_tree:virtual_payload:"
+    "{refinement_id}:{version}:{render_version}:{settings}"
+)
+PAYLOAD_LOCK_KEY = "{payload_key}:lock"
+
+# renderings in progress, by payload cache key
+payload_renders = single_flight_utils.SingleFlight()
+
+# placeholders of the field name and id in the cached tree
+PAYLOAD_NAME = "\x00name\x00"
+PAYLOAD_ID = "\x00id\x00"
+
+SELECTION_SCRIPT = """<script type="text/javascript">
+(function(nodes, keys, checkbox_prefix) {
+    var selected = {};
+    for (var i = 0; i < keys.length; i++) selected[keys[i]] = true;
+    var selectNodes = function(nodes) {
+        var hasSelectedChild = false;
+        for (var i = 0; i < nodes.length; i++) {
+            var node = nodes[i];
+            if (selected[String(node.key)]) {
+                node.selected = true;
+                node.expand = true;
+                hasSelectedChild = true;
+                var checkbox = document.getElementById(checkbox_prefix + node.key);
+                if (checkbox) checkbox.checked = true;
+            }
+            if (node.children && selectNodes(node.children)) node.expand = true;
+        }
+        return hasSelectedChild;
+    };
+    selectNodes(nodes);
+})(%(js_var)s, %(keys)s, "%(id)s_");
+</script>"""
+
+
+def get_js_var(widget_id):
+    """Get the name of the javascript variable holding the nodes of a tree.
+
+    Args:
+        widget_id:
+
+    Returns:
+        str: javascript variable name
+
+    """
+    return "fancytree_data_%s" % (widget_id.replace("-", "_"))
+
+
+class CachedFancyTreeWidget(FancyTreeWidget):
+    """Fancy Tree Widget caching the rendered tree of a refinement.
+
+    The tree is rendered without selection, from the category tree of the
+    refinement, and stored in the Django cache, keyed by refinement id,
+    content version and widget settings. The name and id of the field, and
+    the selection of the current record, are applied on top of the cached
+    tree at request time.
+    """
+
+    template_name = (
+        "core_module_fancy_tree_registry_app/fancy_tree_widget.html"
+    )
+    payload_key = PAYLOAD_KEY
+
+    def __init__(self, refinement_id=None, **kwargs):
+        """
+
+        Args:
+            refinement_id: id of the refinement rendered by the widget.
+            **kwargs: FancyTreeWidget arguments.
+
+        """
+        super().__init__(**kwargs)
+        self.refinement_id = refinement_id
+
+    def get_payload_cache_key(self):
+        """Get the cache key of the rendered tree.
+
+        Returns:
+
+        """
+        return self.payload_key.format(
+            refinement_id=self.refinement_id,
+            version=version_utils.get_refinement_version(self.refinement_id),
+            render_version=version_utils.get_render_version(),
+            settings=self.get_payload_settings(),
+        )
+
+    def get_payload_settings(self):
+        """Get a digest of the widget settings rendered in the tree: the
+        select and count modes, the field label and the checkbox attributes.
+
+        Returns:
+            str: settings digest
+
+        """
+        return hashlib.sha1(
+            json.dumps(
+                [
+                    self.select_mode,
+                    self.count_mode,
+                    self.get_label(),
+                    self.get_checkbox_attrs(),
+                ]
+            ).encode()
+        ).hexdigest()
+
+    def get_label(self):
+        """Get the label of the field of the widget.
+
+        Returns:
+            str: field label
+
+        """
+        field = getattr(self.choices, "field", None)
+        return str(getattr(field, "label", None) or "")
+
+    def get_checkbox_attrs(self):
+        """Get the html attributes of the checkboxes of the categories, from
+        the attributes of the widget.
+
+        Returns:
+            str: flattened attributes
+
+        """
+        return flatatt(
+            {
+                key: value
+                for key, value in self.build_attrs(self.attrs).items()
+                if key != "id"
+            }
+        )
+
+    def get_payload(self):
+        """Get the rendered tree of the refinement, from the Django cache if
+        available. The name and id of the field are left as placeholders.
+        Concurrent requests, of the process and of the processes sharing the
+        Django cache, wait for the same rendering.
+
+        Returns:
+            str: rendered tree
+
+        """
+        cache = caches[FANCY_TREE_CACHE_ALIAS]
+        cache_key = self.get_payload_cache_key()
+        payload = cache.get(cache_key)
+        if payload is None:
+            payload = payload_renders.do(
+                cache_key,
+                partial(
+                    single_flight_utils.fill_once,
+                    PAYLOAD_LOCK_KEY.format(payload_key=cache_key),
+                    partial(cache.get, cache_key),
+                    partial(self._render_and_cache_payload, cache_key),
+                ),
+            )
+        return payload
+
+    def _render_and_cache_payload(self, cache_key):
+        """Render the tree of the refinement and store it in the Django cache.
+
+        Args:
+            cache_key:
+
+        Returns:
+            str: rendered tree
+
+        """
+        payload = self.render_payload()
+        caches[FANCY_TREE_CACHE_ALIAS].set(
+            cache_key, payload, FANCY_TREE_PAYLOAD_CACHE_TIMEOUT
+        )
+        return payload
+
+    def render(self, name, value, attrs=None, choices=(), renderer=None):
+        """render
+
+        Args:
+            name:
+            value:
+            attrs:
+            choices:
+            renderer:
+
+        Returns:
+
+        """
+        if self.refinement_id is None or not (attrs and "id" in attrs):
+            return super().render(name, value, attrs, choices, renderer)
+
+        payload = (
+            self.get_payload()
+            .replace(get_js_var(PAYLOAD_ID), get_js_var(escape(attrs["id"])))
+            .replace(PAYLOAD_ID, escape(attrs["id"]))
+            .replace(PAYLOAD_NAME, escape(name))
+        )
+        return mark_safe(payload + self.render_selection(value, attrs))
+
+    def render_payload(self):
+        """Render the tree of the refinement, without selection, from its
+        category tree. The name and id of the field are rendered as
+        placeholders.
+
+        Returns:
+            str: rendered tree
+
+        """
+        category_tree = category_tree_utils.get_category_tree(
+            self.refinement_id
+        )
+        return render_to_string(
+            self.template_name, self.get_payload_context(category_tree)
+        )
+
+    def get_payload_context(self, category_tree):
+        """Get the context of the template of the tree.
+
+        Args:
+            category_tree: category tree of the refinement.
+
+        Returns:
+            dict: template context
+
+        """
+        checkbox_attrs = self.get_checkbox_attrs()
+        checkboxes = "\n".join(
+            f'<li><label for="{PAYLOAD_ID}_{category_id}">'
+            f'<input type="checkbox" name="{PAYLOAD_NAME}" value="{category_id}"'
+            f'{checkbox_attrs} id="{PAYLOAD_ID}_{category_id}"> '
+            f"{escape(category_name)}</label></li>"
+            for (
+                category_id,
+                category_name,
+                _,
+            ) in category_tree.iter_selectable_rows()
+        )
+        return {
+            "id": PAYLOAD_ID,
+            "label": self.get_label(),
+            "checkboxes": mark_safe(checkboxes),
+            "js_var": get_js_var(PAYLOAD_ID),
+            "source": mark_safe(
+                json.dumps(category_tree.get_nodes(self.count_mode)).replace(
+                    "</", "<\\/"
+                )
+            ),
+            "select_mode": self.select_mode,
+            "debug": settings.DEBUG and 1 or 0,
+            "fancytree": f"{FANCYTREE_CDN_PATH}/jquery.fancytree-all-deps.min.js",
+        }
+
+    @staticmethod
+    def render_selection(value, attrs):
+        """Render the script selecting the nodes of the current record.
+
+        Args:
+            value:
+            attrs:
+
+        Returns:
+
+        """
+        if not value:
+            return ""
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+
+        return SELECTION_SCRIPT % {
+            "js_var": get_js_var(attrs["id"]),
+            "keys": json.dumps(sorted({force_str(v) for v in value})).replace(
+                "</", "<\\/"
+            ),
+            "id": attrs["id"],
+        }
+
+
+class VirtualFancyTreeWidget(CachedFancyTreeWidget):
+    """Cached Fancy Tree Widget only keeping the visible rows of the tree in
+    the page. The rows are rendered in a scrolled viewport, and the selected
+    categories are tracked as hidden inputs updated on each selection change,
+    instead of a checkbox per category.
+    """
+
+    template_name = (
+        "core_module_fancy_tree_registry_app/virtual_fancy_tree_widget.html"
+    )
+    payload_key = VIRTUAL_PAYLOAD_KEY
+
+    def get_payload_context(self, category_tree):
+        """Get the context of the template of the tree.
+
+        Args:
+            category_tree: category tree of the refinement.
+
+        Returns:
+            dict: template context
+
+        """
+        return {
+            "id": PAYLOAD_ID,
+            "name": PAYLOAD_NAME,
+            "label": self.get_label(),
+            "js_var": get_js_var(PAYLOAD_ID),
+            "source": mark_safe(
+                json.dumps(category_tree.get_nodes(self.count_mode)).replace(
+                    "</", "<\\/"
+                )
+            ),
+            "select_mode": self.select_mode,
+            "viewport_rows": FANCY_TREE_VIEWPORT_ROWS,
+            "debug": settings.DEBUG and 1 or 0,
+            "fancytree": f"{FANCYTREE_CDN_PATH}/jquery.fancytree-all-deps.min.js",
+        }
+
+
+class LazyFancyTreeWidget(FancyTreeWidget):
+    """Fancy Tree Widget only rendering the top level of a refinement tree,
+    and the branches leading to the selected nodes. Other children are loaded
+    from the server when their parent node is expanded.
+    """
+
+    template_name = (
+        "core_module_fancy_tree_registry_app/lazy_fancy_tree_widget.html"
+    )
+
+    def __init__(self, refinement_id=None, **kwargs):
+        """
+
+        Args:
+            refinement_id: id of the refinement rendered by the widget.
+            **kwargs: FancyTreeWidget arguments.
+
+        """
+        super().__init__(**kwargs)
+        self.refinement_id = refinement_id
+
+    def render(self, name, value, attrs=None, choices=(), renderer=None):
+        """render
+
+        Args:
+            name:
+            value:
+            attrs:
+            choices:
+            renderer:
+
+        Returns:
+
+        """
+        if value is None:
+            value = []
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        widget_id = (attrs or {}).get("id", f"id_{name}")
+
+        return mark_safe(
+            render_to_string(
+                self.template_name,
+                {
+                    "id": widget_id,
+                    "source_id": f"{widget_id}_source",
+                    "source": tree_utils.get_lazy_tree(
+                        self.refinement_id, value
+                    ),
+                    "children_url": reverse(
+                        "core_module_fancy_tree_registry_children"
+                    ),
+                    "refinement_id": self.refinement_id,
+                    "select_mode": self.select_mode,
+                    "debug": settings.DEBUG and 1 or 0,
+                    "fancytree": f"{FANCYTREE_CDN_PATH}/jquery.fancytree-all-deps.min.js",
+                },
+            )
+        )
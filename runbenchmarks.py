@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""Run benchmarks"""
+
+import argparse
+import json
+import os
+import sys
+
+import django
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the fancy tree module over synthetic refinements."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100, 10000, 100000],
+        help="numbers of categories of the synthetic refinements",
+    )
+    parser.add_argument(
+        "--selected",
+        type=int,
+        default=100,
+        help="number of selected categories",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="number of warm runs"
+    )
+    parser.add_argument(
+        "--data-elements",
+        type=int,
+        default=10000,
+        help="number of elements of the parsed module data",
+    )
+    parser.add_argument(
+        "--concurrency-size",
+        type=int,
+        default=1000,
+        help="number of categories of the refinement loaded concurrently",
+    )
+    parser.add_argument(
+        "--loads",
+        type=int,
+        default=200,
+        help="number of simultaneous module loads (0 to skip)",
+    )
+    parser.add_argument(
+        "--browser-size",
+        type=int,
+        default=0,
+        help="number of categories of the refinement rendered in a headless "
+        "browser, e.g. 50000 (0 to skip, requires playwright)",
+    )
+    parser.add_argument(
+        "--output", help="JSON output file (standard output by default)"
+    )
+    args = parser.parse_args()
+
+    os.environ["DJANGO_SETTINGS_MODULE"] = "tests.test_settings"
+    django.setup()
+
+    from tests.benchmarks.benchmark_module import run_benchmarks
+
+    results = run_benchmarks(
+        sizes=args.sizes,
+        selected=args.selected,
+        repeat=args.repeat,
+        data_elements=args.data_elements,
+        concurrency_size=args.concurrency_size,
+        loads=args.loads,
+        browser_size=args.browser_size,
+    )
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
@@ -0,0 +1,595 @@
+"""Benchmarks of the fancy tree module over synthetic refinements"""
+
+import asyncio
+import platform
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from os.path import dirname, join
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import django
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from core_main_registry_app.components.category import api as category_api
+from core_main_registry_app.constants import UNSPECIFIED_LABEL
+from core_parser_app.tools import modules as parser_modules
+from core_module_fancy_tree_registry_app.settings import (
+    FANCY_TREE_CACHE_ALIAS,
+    FANCY_TREE_SEARCH_LIMIT,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+    data as data_utils,
+    refinement as refinement_utils,
+    search as search_utils,
+)
+from core_module_fancy_tree_registry_app.views import views as module_views
+from core_module_fancy_tree_registry_app.views.widgets import (
+    CachedFancyTreeWidget,
+    VirtualFancyTreeWidget,
+)
+from tests.benchmarks.fixtures import create_refinement
+
+try:
+    from playwright.sync_api import sync_playwright
+except ImportError:
+    sync_playwright = None
+
+DEFAULT_SIZES = (100, 10000, 100000)
+XML_XPATH = "/ns:Resource/ns:role/ns:type"
+# token prefix shared by thousands of categories of the larger trees
+SEARCH_QUERY = "l2n1"
+JQUERY_URL = (
+    "https://cdnjs.cloudflare.com/ajax/libs/jquery/3.7.1/jquery.min.js"
+)
+BROWSER_WIDGETS = {
+    "render_tree_browser": CachedFancyTreeWidget,
+    "render_tree_browser_virtual": VirtualFancyTreeWidget,
+}
+# number of nodes deselected and selected again in the browser
+SELECT_EVENTS = 100
+
+BROWSER_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+%(media)s
+<script type="text/javascript" src="%(jquery)s"></script>
+<script type="text/javascript">
+// helpers of the core main app base template
+var cachedScript = function(url) {
+    return $.ajax({url: url, dataType: "script", cache: true});
+};
+var onjQueryReady = function(callback) { $(callback); };
+$(document).on("fancy_tree_ready_event", function(event, data) {
+    window.fancyTree = data.tree;
+    window.fancyTreeReady = performance.now();
+});
+</script>
+</head>
+<body>
+%(widget)s
+</body>
+</html>
+"""
+
+# toggle nodes the way a click does, timing the select handlers
+BROWSER_SELECT_SCRIPT = """(keys) => {
+    var times = [];
+    keys.forEach(function(key) {
+        var node = window.fancyTree.getNodeByKey(key);
+        var start = performance.now();
+        node.toggleSelected();
+        times.push(performance.now() - start);
+    });
+    return times;
+}"""
+
+
+def clear_caches():
+    """Clear every cache of the module, to measure cold runs.
+
+    Returns:
+
+    """
+    category_tree_utils.category_tree_cache.clear()
+    refinement_utils.clear_refinement_map()
+    search_utils.search_index_cache.clear()
+    caches[FANCY_TREE_CACHE_ALIAS].clear()
+
+
+def measure(func, repeat, trace_memory=True):
+    """Measure a function: a cold run (empty caches) tracking queries, then
+    `repeat` warm runs, then a cold run tracking peak memory (tracing
+    allocations slows the function down, so it is not timed).
+
+    Args:
+        func:
+        repeat:
+        trace_memory: run the cold run tracking peak memory.
+
+    Returns:
+        dict: cold and warm measures
+
+    """
+    clear_caches()
+    with CaptureQueriesContext(connection) as cold_queries:
+        start = time.perf_counter()
+        func()
+        cold_time = time.perf_counter() - start
+
+    warm_times = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as warm_queries:
+            start = time.perf_counter()
+            func()
+            warm_times.append(time.perf_counter() - start)
+
+    cold = {
+        "time_ms": round(cold_time * 1000, 3),
+        "queries": len(cold_queries),
+    }
+    if trace_memory:
+        clear_caches()
+        tracemalloc.start()
+        func()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        cold["peak_memory_kb"] = round(peak_memory / 1024, 1)
+
+    return {
+        "cold": cold,
+        "warm": {
+            "time_ms_median": round(statistics.median(warm_times) * 1000, 3),
+            "time_ms_min": round(min(warm_times) * 1000, 3),
+            "queries": len(warm_queries),
+        },
+    }
+
+
+def get_selection(refinement, selected):
+    """Get ids of categories spread over the refinement tree.
+
+    Args:
+        refinement:
+        selected: number of categories to select.
+
+    Returns:
+        list: category ids, as strings
+
+    """
+    category_ids = list(
+        category_api.get_all_filtered_by_refinement_id(refinement.id)
+        .exclude(slug__startswith="unspecified")
+        .values_list("id", flat=True)
+    )
+    step = max(1, len(category_ids) // selected)
+    return [str(category_id) for category_id in category_ids[::step]][
+        :selected
+    ]
+
+
+def patch_registry_template(template_hash):
+    """Patch the current registry template of the module views.
+
+    Args:
+        template_hash: hash of the template of the benchmark refinement.
+
+    Returns:
+        patcher
+
+    """
+    return patch.object(
+        module_views.template_registry_api,
+        "get_current_registry_template",
+        return_value=SimpleNamespace(hash=template_hash),
+    )
+
+
+def retrieve_data(post_request):
+    """Retrieve the module data posted for the module of the benchmark
+    element.
+
+    Args:
+        post_request:
+
+    Returns:
+        str: module data
+
+    """
+    module_element = SimpleNamespace(options={"xpath": {"xml": XML_XPATH}})
+    return module_views.FancyTreeModule()._retrieve_data(
+        post_request, module_element
+    )
+
+
+def benchmark_refinement(size, selected, repeat):
+    """Benchmark the module operations over a refinement of `size`
+    categories, with `selected` selected categories.
+
+    Args:
+        size:
+        selected:
+        repeat:
+
+    Returns:
+        list: results of each operation
+
+    """
+    template_hash = f"benchmark_{size}"
+    refinement = create_refinement(size, template_hash=template_hash)
+    selection = get_selection(refinement, selected)
+    field_id, _ = refinement_utils.parse_xml_xpath(XML_XPATH)
+    request_factory = RequestFactory()
+
+    post_request = request_factory.post(
+        "/module-fancy-tree-registry", {"data[]": selection}
+    )
+    with patch_registry_template(template_hash):
+        data = retrieve_data(post_request)
+    get_request = request_factory.get(
+        "/module-fancy-tree-registry", {"xml_xpath": XML_XPATH, "data": data}
+    )
+
+    def render_module():
+        module = module_views.FancyTreeModule()
+        module.data = data
+        module._render_module(get_request)
+
+    def reload_data():
+        module = module_views.FancyTreeModule()
+        module.data = data
+        module._reload_data(field_id, refinement)
+
+    def build_category_tree():
+        category_tree_utils.build_category_tree(refinement.id)
+
+    def search():
+        search_utils.search_categories(
+            refinement.id, SEARCH_QUERY, FANCY_TREE_SEARCH_LIMIT
+        )
+
+    operations = {
+        "render_module": render_module,
+        "reload_data": reload_data,
+        "retrieve_data": partial(retrieve_data, post_request),
+        "build_category_tree": build_category_tree,
+        "search": search,
+    }
+    results = []
+    with patch_registry_template(template_hash):
+        for name, operation in operations.items():
+            results.append(
+                dict(
+                    benchmark=name,
+                    size=size,
+                    selected=len(selection),
+                    **measure(operation, repeat),
+                )
+            )
+    return results
+
+
+def benchmark_data_parsing(elements, repeat):
+    """Benchmark the parsing of module data of `elements` elements, with the
+    two level fast path and with the XML tree fallback.
+
+    Args:
+        elements:
+        repeat:
+
+    Returns:
+        list: results of each parser
+
+    """
+    data = "".join(
+        f"<role><type>Category {index}:Subcategory {index}</type></role>"
+        for index in range(elements)
+    )
+    parsers = {
+        "parse_data_fast_path": data_utils.iter_data_elements,
+        "parse_data_xml_tree": data_utils._iter_xml_elements,
+    }
+    return [
+        dict(
+            benchmark=name,
+            elements=elements,
+            **measure(lambda parser=parser: list(parser(data)), repeat),
+        )
+        for name, parser in parsers.items()
+    ]
+
+
+def benchmark_concurrency(size, loads, repeat):
+    """Benchmark the throughput of `loads` simultaneous module loads (GET
+    requests) of a refinement of `size` categories, served by the sync view
+    from a pool of `loads` threads, and by the async view from one event
+    loop.
+
+    Args:
+        size:
+        loads: number of simultaneous module loads.
+        repeat: number of warm runs.
+
+    Returns:
+        list: results of each view
+
+    """
+    template_hash = f"benchmark_concurrency_{size}"
+    refinement = create_refinement(size, template_hash=template_hash)
+    post_request = RequestFactory().post(
+        "/module-fancy-tree-registry",
+        {"data[]": get_selection(refinement, 10)},
+    )
+    with patch_registry_template(template_hash):
+        query = {
+            "xml_xpath": XML_XPATH,
+            "module_id": "benchmark_module_id",
+            "url": "module-fancy-tree-registry",
+            "data": retrieve_data(post_request),
+        }
+
+    sync_view = module_views.FancyTreeModule.as_view()
+    async_view = module_views.AsyncFancyTreeModule.as_view()
+
+    def sync_load(_):
+        request = RequestFactory().get("/module-fancy-tree-registry", query)
+        return sync_view(request).status_code
+
+    def sync_loads():
+        with ThreadPoolExecutor(max_workers=loads) as executor:
+            return list(executor.map(sync_load, range(loads)))
+
+    async def async_loads():
+        responses = await asyncio.gather(
+            *(
+                async_view(
+                    AsyncRequestFactory().get(
+                        "/module-fancy-tree-registry", query
+                    )
+                )
+                for _ in range(loads)
+            )
+        )
+        return [response.status_code for response in responses]
+
+    views = {
+        "concurrent_loads_sync": sync_loads,
+        "concurrent_loads_async": async_to_sync(async_loads),
+    }
+    # module template of the core parser
+    templates = [
+        dict(
+            settings.TEMPLATES[0],
+            DIRS=[join(dirname(parser_modules.__file__), "templates")],
+        )
+    ]
+    results = []
+    with patch_registry_template(template_hash), patch.object(
+        module_views.data_structure_element_api, "get_by_id", MagicMock()
+    ), patch.object(
+        module_views.data_structure_element_api, "upsert", MagicMock()
+    ), override_settings(
+        TEMPLATES=templates
+    ):
+        for name, view_loads in views.items():
+            status_codes = view_loads()
+            measures = measure(view_loads, repeat, trace_memory=False)
+            for measure_name in ("cold", "warm"):
+                # queries of the worker threads are not captured
+                del measures[measure_name]["queries"]
+                time_ms = measures[measure_name].get(
+                    "time_ms", measures[measure_name].get("time_ms_median")
+                )
+                measures[measure_name]["loads_per_second"] = round(
+                    loads / time_ms * 1000, 1
+                )
+            results.append(
+                dict(
+                    benchmark=name,
+                    size=size,
+                    loads=loads,
+                    errors=sum(
+                        status_code != 200 for status_code in status_codes
+                    ),
+                    **measures,
+                )
+            )
+    return results
+
+
+def render_browser_page(refinement, selection, widget_class, jquery_url):
+    """Render a standalone page with the tree widget of a refinement.
+
+    Args:
+        refinement:
+        selection: selected category ids.
+        widget_class: widget rendering the tree.
+        jquery_url:
+
+    Returns:
+        str: HTML page
+
+    """
+    categories = category_api.get_all_filtered_by_refinement_id(
+        refinement.id
+    ).exclude(name__startswith=UNSPECIFIED_LABEL)
+    widget = widget_class(
+        queryset=categories, select_mode=2, refinement_id=refinement.id
+    )
+    return BROWSER_PAGE % {
+        "media": widget.media,
+        "jquery": jquery_url,
+        "widget": widget.render(
+            "refinement-benchmark",
+            selection,
+            {"id": "id_refinement-benchmark"},
+        ),
+    }
+
+
+def measure_browser_page(browser, page_html, selection, repeat):
+    """Measure the time to interactive of a page, the number of elements of
+    its DOM, and the time of the select handlers.
+
+    Args:
+        browser: playwright browser.
+        page_html:
+        selection: selected category ids.
+        repeat: number of page loads.
+
+    Returns:
+        dict: measures
+
+    """
+    ready_times = []
+    for _ in range(repeat):
+        page = browser.new_page()
+        page.set_content(page_html, wait_until="domcontentloaded")
+        page.wait_for_function("window.fancyTreeReady !== undefined")
+        # the ready event is triggered 200ms after the tree initialization
+        ready_times.append(page.evaluate("window.fancyTreeReady") - 200)
+        dom_elements = page.evaluate(
+            "document.getElementsByTagName('*').length"
+        )
+        keys = selection[:SELECT_EVENTS]
+        select_times = page.evaluate(BROWSER_SELECT_SCRIPT, keys + keys)
+        page.close()
+
+    return {
+        "time_to_interactive_ms_median": round(
+            statistics.median(ready_times), 3
+        ),
+        "time_to_interactive_ms_min": round(min(ready_times), 3),
+        "dom_elements": dom_elements,
+        "select_event_ms_mean": round(
+            statistics.mean(select_times) if select_times else 0, 3
+        ),
+    }
+
+
+def benchmark_browser(size, selected, repeat, jquery_url=JQUERY_URL):
+    """Benchmark the time to interactive of the tree widgets in a headless
+    Chromium (driven by playwright, if installed). The scripts of the page
+    are loaded from their CDN.
+
+    Args:
+        size: number of categories of the synthetic refinement.
+        selected: number of selected categories.
+        repeat: number of page loads.
+        jquery_url:
+
+    Returns:
+        list: measures of each widget
+
+    """
+    if sync_playwright is None:
+        return [
+            dict(benchmark=name, size=size, skipped="playwright not installed")
+            for name in BROWSER_WIDGETS
+        ]
+
+    refinement = create_refinement(size)
+    selection = get_selection(refinement, selected)
+    results = []
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        try:
+            for name, widget_class in BROWSER_WIDGETS.items():
+                clear_caches()
+                page_html = render_browser_page(
+                    refinement, selection, widget_class, jquery_url
+                )
+                results.append(
+                    dict(
+                        benchmark=name,
+                        size=size,
+                        selected=selected,
+                        page_kb=round(len(page_html.encode()) / 1024, 1),
+                        **measure_browser_page(
+                            browser, page_html, selection, repeat
+                        ),
+                    )
+                )
+        finally:
+            browser.close()
+    return results
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES,
+    selected=100,
+    repeat=5,
+    data_elements=10000,
+    concurrency_size=1000,
+    loads=200,
+    browser_size=0,
+):
+    """Run the benchmarks against an in-memory SQLite database.
+
+    Args:
+        sizes: numbers of categories of the synthetic refinements.
+        selected: number of selected categories.
+        repeat: number of warm runs.
+        data_elements: number of elements of the parsed module data.
+        concurrency_size: number of categories of the refinement loaded
+            concurrently.
+        loads: number of simultaneous module loads.
+        browser_size: number of categories of the refinement rendered in a
+            headless browser (skipped if 0).
+
+    Returns:
+        dict: machine-readable results
+
+    """
+    setup_test_environment()
+    old_database_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with override_settings(BOOTSTRAP_VERSION="5.1.3", DEBUG=False):
+            results = []
+            for size in sizes:
+                results.extend(benchmark_refinement(size, selected, repeat))
+            results.extend(benchmark_data_parsing(data_elements, repeat))
+            if loads:
+                results.extend(
+                    benchmark_concurrency(concurrency_size, loads, repeat)
+                )
+            if browser_size:
+                results.extend(
+                    benchmark_browser(browser_size, selected, repeat)
+                )
+    finally:
+        connection.creation.destroy_test_db(old_database_name, verbosity=0)
+        teardown_test_environment()
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+        },
+        "parameters": {
+            "sizes": list(sizes),
+            "selected": selected,
+            "repeat": repeat,
+            "data_elements": data_elements,
+            "concurrency_size": concurrency_size,
+            "loads": loads,
+            "browser_size": browser_size,
+        },
+        "results": results,
+    }
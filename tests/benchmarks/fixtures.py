@@ -0,0 +1,129 @@
+"""Synthetic refinements for the fancy tree module benchmarks"""
+
+import math
+
+from django.db import connection
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.constants import CATEGORY_SUFFIX, UNSPECIFIED_LABEL
+
+CATEGORY_PATH = "Resource.role.type"
+
+
+def get_depth(size):
+    """Get a realistic tree depth for a number of categories.
+
+    Args:
+        size:
+
+    Returns:
+
+    """
+    if size <= 1000:
+        return 2
+    if size <= 20000:
+        return 3
+    return 4
+
+
+def _build_tree(size, depth):
+    """Build the nested (name, value, children) structure of a refinement,
+    with an unspecified child under each parent node, as created by the
+    registry refinement initialization.
+
+    Args:
+        size: number of categories, unspecified categories included.
+        depth:
+
+    Returns:
+
+    """
+    # each parent has `branching` children plus its unspecified node
+    branching = max(2, math.ceil(size ** (1 / depth)))
+    remaining = [size]
+
+    def build_level(prefix, level):
+        nodes = []
+        for index in range(branching):
+            if remaining[0] <= 0:
+                break
+            name = f"l{level}n{index}"
+            value = f"{prefix}:{name}" if prefix else name
+            remaining[0] -= 1
+            children = []
+            if level < depth - 1 and remaining[0] > 1:
+                # reserve the unspecified node before the children
+                remaining[0] -= 1
+                children = build_level(value, level + 1)
+                children.insert(0, (f"{UNSPECIFIED_LABEL} {name}", value, []))
+            nodes.append((name, value, children))
+        return nodes
+
+    # branching ** depth >= size: the whole budget fits under the roots
+    return build_level("", 0)
+
+
+def create_refinement(size, template_hash="benchmark_hash", xsd_name="type"):
+    """Create a refinement with about `size` categories, in bulk.
+
+    Args:
+        size:
+        template_hash:
+        xsd_name:
+
+    Returns:
+        Refinement object
+
+    """
+    refinement = Refinement.objects.create(
+        name=f"Benchmark {size}",
+        xsd_name=xsd_name,
+        template_hash=template_hash,
+    )
+    last_category = Category.objects.order_by("-id").first()
+    next_id = [last_category.id + 1 if last_category else 1]
+    rows = []
+
+    def insert(nodes, parent_id, tree_id, level, lft):
+        for name, value, children in nodes:
+            category_id = next_id[0]
+            next_id[0] += 1
+            row = [
+                category_id,
+                parent_id,
+                name,
+                name.replace(" ", "-"),
+                CATEGORY_PATH,
+                f"{value}{CATEGORY_SUFFIX}" if children else value,
+                refinement.id,
+                lft,
+                None,
+                tree_id,
+                level,
+            ]
+            rows.append(row)
+            rght = insert(children, category_id, tree_id, level + 1, lft + 1)
+            row[8] = rght
+            lft = rght + 1
+        return lft
+
+    last_tree = Category.objects.order_by("-tree_id").first()
+    first_tree_id = last_tree.tree_id + 1 if last_tree else 1
+    for tree_id, root in enumerate(
+        _build_tree(size, get_depth(size)), start=first_tree_id
+    ):
+        insert([root], None, tree_id, 0, 1)
+
+    table = Category._meta.db_table
+    columns = (
+        "id, parent_id, name, slug, path, value, refinement_id, "
+        "lft, rght, tree_id, level"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} ({columns}) VALUES "
+            f"(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+    return refinement
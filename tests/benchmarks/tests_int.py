@@ -0,0 +1,106 @@
+"""Integration tests for the fancy tree module benchmarks."""
+
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from core_main_registry_app.components.category.models import Category
+from tests.benchmarks import benchmark_module
+from tests.benchmarks.fixtures import create_refinement
+
+
+class TestCreateRefinement(TestCase):
+    """Integration tests for the `create_refinement` function."""
+
+    def test_creates_consistent_tree(self):
+        """test_creates_consistent_tree"""
+        refinement = create_refinement(100)
+        categories = Category.objects.filter(refinement=refinement)
+
+        self.assertEqual(categories.count(), 100)
+        for category in categories.filter(level=0):
+            self.assertEqual(
+                category.get_descendant_count(),
+                category.get_descendants().count(),
+            )
+        self.assertTrue(categories.filter(slug__startswith="unspecified"))
+
+
+@override_settings(BOOTSTRAP_VERSION="5.1.3")
+class TestBenchmarkRefinement(TestCase):
+    """Integration tests for the `benchmark_refinement` function."""
+
+    def test_returns_measures_of_each_operation(self):
+        """test_returns_measures_of_each_operation"""
+        results = benchmark_module.benchmark_refinement(100, 10, 1)
+
+        self.assertEqual(
+            [result["benchmark"] for result in results],
+            [
+                "render_module",
+                "reload_data",
+                "retrieve_data",
+                "build_category_tree",
+                "search",
+            ],
+        )
+        for result in results:
+            self.assertEqual(result["selected"], 10)
+            self.assertIn("peak_memory_kb", result["cold"])
+
+    def test_warm_reload_does_not_query(self):
+        """test_warm_reload_does_not_query"""
+        results = benchmark_module.benchmark_refinement(100, 10, 1)
+
+        self.assertEqual(results[1]["warm"]["queries"], 0)
+
+
+class TestBenchmarkDataParsing(TestCase):
+    """Integration tests for the `benchmark_data_parsing` function."""
+
+    def test_returns_measures_of_each_parser(self):
+        """test_returns_measures_of_each_parser"""
+        results = benchmark_module.benchmark_data_parsing(10, 1)
+
+        self.assertEqual(
+            [result["benchmark"] for result in results],
+            ["parse_data_fast_path", "parse_data_xml_tree"],
+        )
+        for result in results:
+            self.assertEqual(result["elements"], 10)
+            self.assertEqual(result["warm"]["queries"], 0)
+
+
+@override_settings(BOOTSTRAP_VERSION="5.1.3")
+class TestBenchmarkBrowser(TestCase):
+    """Integration tests for the `benchmark_browser` function."""
+
+    def test_renders_page_of_each_widget(self):
+        """test_renders_page_of_each_widget"""
+        refinement = create_refinement(100)
+        selection = benchmark_module.get_selection(refinement, 10)
+
+        for widget_class in benchmark_module.BROWSER_WIDGETS.values():
+            with self.subTest(widget_class=widget_class):
+                page_html = benchmark_module.render_browser_page(
+                    refinement,
+                    selection,
+                    widget_class,
+                    benchmark_module.JQUERY_URL,
+                )
+
+                self.assertIn("fancy_tree_ready_event", page_html)
+                self.assertIn('$("#id_refinement-benchmark")', page_html)
+                self.assertIn(selection[0], page_html)
+
+    @patch.object(benchmark_module, "sync_playwright", None)
+    def test_skipped_without_playwright(self):
+        """test_skipped_without_playwright"""
+        results = benchmark_module.benchmark_browser(100, 10, 1)
+
+        self.assertEqual(
+            [result["benchmark"] for result in results],
+            list(benchmark_module.BROWSER_WIDGETS),
+        )
+        for result in results:
+            self.assertIn("skipped", result)
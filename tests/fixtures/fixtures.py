@@ -0,0 +1,51 @@
+"""Fancy tree module fixtures"""
+
+from core_main_app.utils.integration_tests.fixture_interface import (
+    FixtureInterface,
+)
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.constants import CATEGORY_SUFFIX
+
+
+class RefinementFixtures(FixtureInterface):
+    """Refinement fixtures: a refinement with the following categories
+
+    a (a__category)
+        unspecified a (a)
+        b (a:b)
+        c (a:c__category)
+            unspecified c (a:c)
+            d (a:c:d)
+    e (e)
+    """
+
+    refinement = None
+    categories = None
+
+    def insert_data(self):
+        """Insert a set of refinement and categories.
+
+        Returns:
+
+        """
+        self.refinement = Refinement.objects.create(
+            name="Type", xsd_name="type", template_hash="mock_hash"
+        )
+        self.categories = {}
+        self._create_category("a", f"a{CATEGORY_SUFFIX}")
+        self._create_category("unspecified a", "a", parent="a")
+        self._create_category("b", "a:b", parent="a")
+        self._create_category("c", f"a:c{CATEGORY_SUFFIX}", parent="a")
+        self._create_category("unspecified c", "a:c", parent="c")
+        self._create_category("d", "a:c:d", parent="c")
+        self._create_category("e", "e")
+
+    def _create_category(self, name, value, parent=None):
+        self.categories[name] = Category.objects.create(
+            name=name,
+            path="Resource.role.type",
+            value=value,
+            parent=self.categories[parent] if parent else None,
+            refinement=self.refinement,
+        )
@@ -0,0 +1,190 @@
+"""Integration tests for the `core_module_fancy_tree_registry_app.management.commands` package."""
+
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from core_main_registry_app.components.refinement.models import Refinement
+
+from core_module_fancy_tree_registry_app.management.commands import (
+    warmfancytreecache,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+)
+from core_module_fancy_tree_registry_app.views.forms import RefinementForm
+from tests.fixtures.fixtures import RefinementFixtures
+
+
+class TestWarmFancyTreeCacheCommand(TestCase):
+    """Integration tests for the `warmfancytreecache` command."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+
+    def test_refinements_of_template_are_warmed_up(self):
+        """test_refinements_of_template_are_warmed_up"""
+        output = StringIO()
+
+        call_command(
+            "warmfancytreecache", "--template-hash=mock_hash", stdout=output
+        )
+
+        self.assertIn(
+            f"Type ({self.fixture.refinement.id}): 7 categories, "
+            "category tree",
+            output.getvalue(),
+        )
+        self.assertIn("1 refinements warmed up", output.getvalue())
+        self.assertIn(
+            self.fixture.refinement.id,
+            category_tree_utils.category_tree_cache,
+        )
+        # the tree is rendered for the fields of the module forms
+        form = RefinementForm(
+            refinement=self.fixture.refinement, field_id="mock_field_id"
+        )
+        self.assertIsNotNone(
+            cache.get(
+                form.fields["mock_field_id"].widget.get_payload_cache_key()
+            )
+        )
+
+    @patch.object(warmfancytreecache, "template_registry_api")
+    def test_current_registry_template_is_used_by_default(
+        self, mock_template_registry_api
+    ):
+        """test_current_registry_template_is_used_by_default"""
+        User.objects.create_superuser("admin", "admin@example.com", "admin")
+        mock_template_registry_api.get_current_registry_template.return_value.hash = (
+            "mock_hash"
+        )
+        output = StringIO()
+
+        call_command("warmfancytreecache", stdout=output)
+
+        self.assertIn("1 refinements warmed up", output.getvalue())
+        self.assertTrue(
+            mock_template_registry_api.get_current_registry_template.call_args.kwargs[
+                "request"
+            ].user.is_superuser
+        )
+
+    def test_no_refinement_is_reported(self):
+        """test_no_refinement_is_reported"""
+        output = StringIO()
+
+        call_command(
+            "warmfancytreecache", "--template-hash=unknown", stdout=output
+        )
+
+        self.assertIn(
+            "No refinement found for template unknown", output.getvalue()
+        )
+
+    @patch.object(warmfancytreecache, "connections")
+    @patch.object(warmfancytreecache, "warm_up_refinement")
+    @patch.object(
+        warmfancytreecache, "ProcessPoolExecutor", wraps=ThreadPoolExecutor
+    )
+    def test_refinements_are_dispatched_to_workers(
+        self,
+        mock_process_pool_executor,
+        mock_warm_up_refinement,
+        mock_connections,
+    ):
+        """test_refinements_are_dispatched_to_workers"""
+        other_refinement = Refinement.objects.create(
+            name="Other", xsd_name="other", template_hash="mock_hash"
+        )
+        mock_warm_up_refinement.side_effect = lambda refinement: (
+            {"error": "mock error"}
+            if refinement == other_refinement
+            else {"categories": 7, "category_tree": 1.0}
+        )
+        output = StringIO()
+        error = StringIO()
+
+        call_command(
+            "warmfancytreecache",
+            "--template-hash=mock_hash",
+            "--workers=4",
+            stdout=output,
+            stderr=error,
+        )
+
+        mock_process_pool_executor.assert_called_once_with(
+            max_workers=2, initializer=warmfancytreecache._init_worker
+        )
+        # the connections are closed before the workers are started
+        self.assertTrue(mock_connections.close_all.called)
+        self.assertIn(
+            f"Type ({self.fixture.refinement.id}): 7 categories",
+            output.getvalue(),
+        )
+        self.assertIn("2 refinements warmed up", output.getvalue())
+        self.assertIn(
+            f"Other ({other_refinement.id}): mock error", error.getvalue()
+        )
+
+    @patch.object(warmfancytreecache, "template_registry_api")
+    def test_failed_template_read_raises_command_error(
+        self, mock_template_registry_api
+    ):
+        """test_failed_template_read_raises_command_error"""
+        User.objects.create_superuser("admin", "admin@example.com", "admin")
+        mock_template_registry_api.get_current_registry_template.side_effect = Exception(
+            "mock error"
+        )
+
+        with self.assertRaises(CommandError) as context:
+            call_command("warmfancytreecache", stdout=StringIO())
+
+        self.assertIn("mock error", str(context.exception))
+
+    def test_no_superuser_raises_command_error(self):
+        """test_no_superuser_raises_command_error"""
+        with self.assertRaises(CommandError):
+            call_command("warmfancytreecache", stdout=StringIO())
+
+    def test_failed_refinement_is_reported(self):
+        """test_failed_refinement_is_reported"""
+        error = StringIO()
+
+        with patch.object(
+            category_tree_utils,
+            "get_category_tree",
+            side_effect=Exception("mock error"),
+        ):
+            call_command(
+                "warmfancytreecache",
+                "--template-hash=mock_hash",
+                stdout=StringIO(),
+                stderr=error,
+            )
+
+        self.assertIn("mock error", error.getvalue())
+
+
+class TestInitWorker(SimpleTestCase):
+    """Unit tests for the `_init_worker` function."""
+
+    @patch.object(warmfancytreecache, "connections")
+    @patch.object(warmfancytreecache.django, "setup")
+    def test_django_set_up_without_inherited_connections(
+        self, mock_setup, mock_connections
+    ):
+        """test_django_set_up_without_inherited_connections"""
+        warmfancytreecache._init_worker()
+
+        mock_setup.assert_called_once_with()
+        mock_connections.close_all.assert_called_once_with()
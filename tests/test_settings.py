@@ -1,5 +1,8 @@
 """Test settings"""
 
+from os.path import join
+from tempfile import gettempdir
+
 SECRET_KEY = "fake-key"
 
 INSTALLED_APPS = [
@@ -13,9 +16,19 @@ INSTALLED_APPS = [
     "core_main_app",
     "core_main_registry_app",
     "core_parser_app",
+    "core_module_fancy_tree_registry_app",
     "tests",
 ]
 
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "APP_DIRS": True,
+    },
+]
+
+ROOT_URLCONF = "core_module_fancy_tree_registry_app.urls"
+
 # In-memory test DB
 DATABASES = {
     "default": {
@@ -30,6 +43,9 @@ DATABASES = {
 
 SERVER_URI = "http://example.com"
 
+# Files stored by the registry initialization
+MEDIA_ROOT = join(gettempdir(), "core_module_fancy_tree_registry_app")
+
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 CELERYBEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 MONGODB_INDEXING = False
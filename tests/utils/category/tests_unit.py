@@ -0,0 +1,24 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.utils.category` package."""
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from core_module_fancy_tree_registry_app.utils import (
+    category as category_utils,
+)
+
+
+class TestGetValueIndex(TestCase):
+    """Unit tests for the `get_value_index` function."""
+
+    @patch.object(category_utils, "category_tree_utils")
+    def test_returns_value_index_of_category_tree(
+        self, mock_category_tree_utils
+    ):
+        """test_returns_value_index_of_category_tree"""
+        mock_category_tree_utils.get_category_tree.return_value.value_index = {
+            "a": 1
+        }
+
+        self.assertDictEqual(category_utils.get_value_index(1), {"a": 1})
+        mock_category_tree_utils.get_category_tree.assert_called_with(1)
@@ -0,0 +1,218 @@
+"""Integration tests for the `core_module_fancy_tree_registry_app.utils.category_tree` package."""
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from core_main_app.commons import exceptions
+from core_main_registry_app.components.category import api as category_api
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.constants import UNSPECIFIED_LABEL
+from core_main_registry_app.utils.fancytree.widget import get_tree
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+    version as version_utils,
+)
+from tests.fixtures.fixtures import RefinementFixtures
+from tests.utils.category_tree.tests_unit import assert_trees_equal
+
+
+class TestBuildCategoryTree(TestCase):
+    """Integration tests for the `build_category_tree` function."""
+
+    def setUp(self):
+        """setUp"""
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.categories = self.fixture.categories
+        self.category_tree = category_tree_utils.build_category_tree(
+            self.fixture.refinement.id
+        )
+
+    def test_nodes_match_fancy_tree_widget_nodes(self):
+        """test_nodes_match_fancy_tree_widget_nodes"""
+        categories = category_api.get_all_filtered_by_refinement_id(
+            self.fixture.refinement.id
+        ).exclude(name__startswith=UNSPECIFIED_LABEL)
+
+        self.assertEqual(
+            self.category_tree.get_nodes(), get_tree(categories, set(), False)
+        )
+
+    def test_elements_match_category_elements(self):
+        """test_elements_match_category_elements"""
+        self.assertEqual(
+            self.category_tree.get_elements(
+                [category.id for category in self.categories.values()]
+            ),
+            [
+                ("role", "type", "a"),
+                ("role", "type", "a"),
+                ("role", "type", "a:b"),
+                ("role", "type", "a:c"),
+                ("role", "type", "a:c"),
+                ("role", "type", "a:c:d"),
+                ("role", "type", "e"),
+            ],
+        )
+
+    def test_tree_is_built_with_a_single_query(self):
+        """test_tree_is_built_with_a_single_query"""
+        with self.assertNumQueries(1):
+            category_tree_utils.build_category_tree(self.fixture.refinement.id)
+
+    def test_unknown_refinement_raises_does_not_exist(self):
+        """test_unknown_refinement_raises_does_not_exist"""
+        with self.assertRaises(exceptions.DoesNotExist):
+            category_tree_utils.build_category_tree(
+                self.fixture.refinement.id + 1
+            )
+
+
+class TestPatchCategoryTree(TestCase):
+    """Integration tests for the patching of cached category trees."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.refinement_id = self.fixture.refinement.id
+        self.categories = self.fixture.categories
+        category_tree_utils.get_category_tree(self.refinement_id)
+
+    def _create_category(self, name, value, parent=None):
+        return Category.objects.create(
+            name=name,
+            path="Resource.role.type",
+            value=value,
+            parent=parent,
+            refinement=self.fixture.refinement,
+        )
+
+    def _change_categories(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_category("f", "a:c:f", self.categories["c"])
+            self._create_category("g", "g")
+            renamed = self.categories["b"]
+            renamed.name = "renamed"
+            renamed.save()
+            self.categories["e"].delete()
+
+    @patch.object(category_tree_utils, "build_category_tree")
+    def test_patched_tree_matches_fresh_build(self, mock_build_category_tree):
+        """test_patched_tree_matches_fresh_build"""
+        self._change_categories()
+
+        category_tree = category_tree_utils.get_category_tree(
+            self.refinement_id
+        )
+
+        mock_build_category_tree.assert_not_called()
+        self.assertEqual(
+            category_tree.version,
+            version_utils.get_refinement_version(self.refinement_id),
+        )
+        assert_trees_equal(
+            self,
+            category_tree,
+            category_tree_utils.CategoryTree(
+                category_tree_utils._get_category_rows(self.refinement_id)
+            ),
+        )
+
+    def test_patch_does_not_query_all_categories(self):
+        """test_patch_does_not_query_all_categories"""
+        with self.captureOnCommitCallbacks(execute=True):
+            renamed = self.categories["b"]
+            renamed.name = "renamed"
+            renamed.save()
+
+        # the row of the renamed category only
+        with self.assertNumQueries(1):
+            category_tree_utils.get_category_tree(self.refinement_id)
+
+    def test_created_categories_are_placed_with_two_queries(self):
+        """test_created_categories_are_placed_with_two_queries"""
+        with self.captureOnCommitCallbacks(execute=True):
+            parent = self._create_category("f", "f")
+            self._create_category("g", "f:g", parent)
+            self._create_category("h", "a:c:h", self.categories["c"])
+            self._create_category("i", "a:i", self.categories["a"])
+
+        # the rows of the created categories, and the ids of their siblings
+        with self.assertNumQueries(2):
+            category_tree = category_tree_utils.get_category_tree(
+                self.refinement_id
+            )
+
+        assert_trees_equal(
+            self,
+            category_tree,
+            category_tree_utils.build_category_tree(self.refinement_id),
+        )
+
+    def test_deleted_subtree_is_removed(self):
+        """test_deleted_subtree_is_removed"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.categories["c"].delete()
+
+        with self.assertNumQueries(0):
+            category_tree = category_tree_utils.get_category_tree(
+                self.refinement_id
+            )
+
+        assert_trees_equal(
+            self,
+            category_tree,
+            category_tree_utils.build_category_tree(self.refinement_id),
+        )
+
+    @patch.object(
+        category_tree_utils,
+        "build_category_tree",
+        wraps=category_tree_utils.build_category_tree,
+    )
+    def test_missing_change_rebuilds_tree(self, mock_build_category_tree):
+        """test_missing_change_rebuilds_tree"""
+        self._change_categories()
+        version = version_utils.get_refinement_version(self.refinement_id)
+        cache.delete(
+            version_utils.REFINEMENT_CHANGE_KEY.format(
+                refinement_id=self.refinement_id, version=version
+            )
+        )
+
+        category_tree = category_tree_utils.get_category_tree(
+            self.refinement_id
+        )
+
+        mock_build_category_tree.assert_called_once_with(
+            self.refinement_id, version
+        )
+        self.assertNotIn(self.categories["e"].id, category_tree.ids)
+
+    @patch.object(
+        category_tree_utils,
+        "build_category_tree",
+        wraps=category_tree_utils.build_category_tree,
+    )
+    def test_moved_category_rebuilds_tree(self, mock_build_category_tree):
+        """test_moved_category_rebuilds_tree"""
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = self.categories["e"]
+            moved.parent = self.categories["c"]
+            moved.save()
+
+        category_tree = category_tree_utils.get_category_tree(
+            self.refinement_id
+        )
+
+        mock_build_category_tree.assert_called_once()
+        assert_trees_equal(
+            self,
+            category_tree,
+            category_tree_utils.build_category_tree(self.refinement_id),
+        )
@@ -0,0 +1,658 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.utils.category_tree` package."""
+
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core_main_app.commons import exceptions
+from core_main_registry_app.constants import (
+    CATEGORY_SUFFIX,
+    UNSPECIFIED_LABEL,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+    snapshot as snapshot_utils,
+    version as version_utils,
+)
+from core_module_fancy_tree_registry_app.utils.category_tree import (
+    CategoryTree,
+)
+
+# a (a__category)
+#     unspecified a (a)
+#     b (a:b)
+#     c (a:c__category)
+#         unspecified c (a:c)
+#         d (a:c:d)
+# e (e)
+CATEGORIES = [
+    (1, "a", f"a{CATEGORY_SUFFIX}", "a", "Resource.role.type", None),
+    (
+        2,
+        f"{UNSPECIFIED_LABEL} a",
+        "a",
+        f"{UNSPECIFIED_LABEL}-a",
+        "R.role.type",
+        1,
+    ),
+    (3, "b", "a:b", "b", "Resource.role.type", 1),
+    (4, "c", f"a:c{CATEGORY_SUFFIX}", "c", "Resource.role.type", 1),
+    (
+        5,
+        f"{UNSPECIFIED_LABEL} c",
+        "a:c",
+        f"{UNSPECIFIED_LABEL}-c",
+        "R.role.type",
+        4,
+    ),
+    (6, "d", "a:c:d", "d", "Resource.content.subject", 4),
+    (7, "e", "e", "e", "Resource.role.type", None),
+]
+
+
+class TestCategoryTree(SimpleTestCase):
+    """Unit tests for the `CategoryTree` class."""
+
+    def setUp(self):
+        """setUp"""
+        self.category_tree = CategoryTree(CATEGORIES)
+
+    def test_subtree_ends(self):
+        """test_subtree_ends"""
+        self.assertEqual(list(self.category_tree.ends), [6, 2, 3, 6, 5, 6, 7])
+
+    def test_parents(self):
+        """test_parents"""
+        self.assertEqual(
+            list(self.category_tree.parents), [-1, 0, 0, 0, 3, 3, -1]
+        )
+
+    def test_tag_pairs_stored_once_per_path(self):
+        """test_tag_pairs_stored_once_per_path"""
+        self.assertEqual(
+            self.category_tree.tag_pairs,
+            [("role", "type"), ("content", "subject")],
+        )
+
+    def test_value_index_maps_unspecified_to_parent(self):
+        """test_value_index_maps_unspecified_to_parent"""
+        self.assertDictEqual(
+            self.category_tree.value_index,
+            {
+                f"a{CATEGORY_SUFFIX}": 1,
+                "a": 1,
+                "a:b": 3,
+                f"a:c{CATEGORY_SUFFIX}": 4,
+                "a:c": 4,
+                "a:c:d": 6,
+                "e": 7,
+            },
+        )
+
+    def test_iter_children_skips_descendants(self):
+        """test_iter_children_skips_descendants"""
+        self.assertEqual(list(self.category_tree.iter_children()), [0, 6])
+        self.assertEqual(list(self.category_tree.iter_children(0)), [1, 2, 3])
+        self.assertEqual(list(self.category_tree.iter_children(6)), [])
+
+    def test_iter_selectable_children_skips_unspecified(self):
+        """test_iter_selectable_children_skips_unspecified"""
+        self.assertEqual(
+            list(self.category_tree.iter_selectable_children(0)), [2, 3]
+        )
+
+    def test_iter_ancestors_parent_first(self):
+        """test_iter_ancestors_parent_first"""
+        self.assertEqual(list(self.category_tree.iter_ancestors(5)), [3, 0])
+
+    def test_get_elements_strips_category_suffix(self):
+        """test_get_elements_strips_category_suffix"""
+        self.assertEqual(
+            self.category_tree.get_elements(["4", 6, "1"]),
+            [
+                ("role", "type", "a:c"),
+                ("content", "subject", "a:c:d"),
+                ("role", "type", "a"),
+            ],
+        )
+
+    def test_get_elements_unknown_ids_raise_does_not_exist(self):
+        """test_get_elements_unknown_ids_raise_does_not_exist"""
+        with self.assertRaises(exceptions.DoesNotExist) as context:
+            self.category_tree.get_elements(["1", "8", "x"])
+
+        self.assertIn("8, x", str(context.exception))
+
+    def test_get_nodes_without_unspecified(self):
+        """test_get_nodes_without_unspecified"""
+        self.assertEqual(
+            self.category_tree.get_nodes(),
+            [
+                {
+                    "title": "a",
+                    "key": 1,
+                    "folder": True,
+                    "children": [
+                        {"title": "b", "key": 3},
+                        {
+                            "title": "c",
+                            "key": 4,
+                            "folder": True,
+                            "children": [{"title": "d", "key": 6}],
+                        },
+                    ],
+                },
+                {"title": "e", "key": 7},
+            ],
+        )
+
+    def test_get_nodes_with_count_mode(self):
+        """test_get_nodes_with_count_mode"""
+        nodes = self.category_tree.get_nodes(count_mode=True, position=3)
+
+        self.assertEqual(
+            nodes,
+            [
+                {
+                    "title": "d <em class='occurrences' id='6'></em>",
+                    "key": 6,
+                }
+            ],
+        )
+
+    def test_iter_selectable_rows(self):
+        """test_iter_selectable_rows"""
+        self.assertEqual(
+            list(self.category_tree.iter_selectable_rows()),
+            [
+                (1, "a", None),
+                (3, "b", 1),
+                (4, "c", 1),
+                (6, "d", 4),
+                (7, "e", None),
+            ],
+        )
+
+
+def assert_trees_equal(test_case, category_tree, expected_tree):
+    """Assert that two category trees have the same tables.
+
+    Args:
+        test_case:
+        category_tree:
+        expected_tree:
+
+    Returns:
+
+    """
+    for name in (
+        "ids",
+        "names",
+        "values",
+        "parents",
+        "ends",
+        "selectable",
+        "sorted_ids",
+        "sorted_positions",
+    ):
+        test_case.assertEqual(
+            list(getattr(category_tree, name)),
+            list(getattr(expected_tree, name)),
+            name,
+        )
+    test_case.assertEqual(
+        dict(category_tree.value_index), dict(expected_tree.value_index)
+    )
+    # tag pairs are numbered in order of insertion
+    test_case.assertEqual(
+        [
+            category_tree.tag_pairs[index]
+            for index in category_tree.tag_indexes
+        ],
+        [
+            expected_tree.tag_pairs[index]
+            for index in expected_tree.tag_indexes
+        ],
+    )
+
+
+def patch_category_tree(
+    category_tree, expected_categories, categories=(), deleted_id_list=()
+):
+    """Patch a category tree, the children of the parents of the created
+    categories being read from the categories of the patched tree.
+
+    Args:
+        category_tree:
+        expected_categories: categories of the patched tree.
+        categories: created or updated categories.
+        deleted_id_list: ids of the deleted categories.
+
+    Returns:
+        CategoryTree
+
+    """
+    parent_id_set = {
+        category[5]
+        for category in categories
+        if category_tree.get_position(category[0]) is None
+    }
+    child_ids_by_parent = {}
+    for category in expected_categories:
+        if category[5] in parent_id_set:
+            child_ids_by_parent.setdefault(category[5], []).append(category[0])
+    return category_tree.patch(
+        categories, deleted_id_list, child_ids_by_parent, 2
+    )
+
+
+class TestCategoryTreePatch(SimpleTestCase):
+    """Unit tests for the `patch` method of the `CategoryTree` class."""
+
+    def setUp(self):
+        """setUp"""
+        self.category_tree = CategoryTree(CATEGORIES, 1)
+
+    def _assert_patched(self, expected_categories, **changes):
+        category_tree = patch_category_tree(
+            self.category_tree, expected_categories, **changes
+        )
+
+        self.assertEqual(category_tree.version, 2)
+        assert_trees_equal(
+            self, category_tree, CategoryTree(expected_categories)
+        )
+
+    def test_insert_last_child(self):
+        """test_insert_last_child"""
+        category = (8, "f", "a:c:f", "f", "Resource.other.tag", 4)
+
+        self._assert_patched(
+            CATEGORIES[:6] + [category] + CATEGORIES[6:],
+            categories=[category],
+        )
+
+    def test_insert_first_child(self):
+        """test_insert_first_child"""
+        category = (8, "f", "a:f", "f", "Resource.role.type", 1)
+
+        self._assert_patched(
+            CATEGORIES[:1] + [category] + CATEGORIES[1:],
+            categories=[category],
+        )
+
+    def test_insert_roots(self):
+        """test_insert_roots"""
+        first = (0, "z", "z", "z", "Resource.role.type", None)
+        last = (8, "f", "f", "f", "Resource.role.type", None)
+
+        self._assert_patched(
+            [first] + CATEGORIES + [last], categories=[last, first]
+        )
+
+    def test_insert_at_end_of_nested_subtrees(self):
+        """test_insert_at_end_of_nested_subtrees"""
+        deep = (8, "f", "a:c:f", "f", "Resource.role.type", 4)
+        shallow = (9, "g", "a:g", "g", "Resource.role.type", 1)
+
+        self._assert_patched(
+            CATEGORIES[:6] + [deep, shallow] + CATEGORIES[6:],
+            categories=[shallow, deep],
+        )
+
+    def test_insert_subtree(self):
+        """test_insert_subtree"""
+        parent = (8, "f", f"f{CATEGORY_SUFFIX}", "f", "R.role.type", None)
+        unspecified = (
+            9,
+            f"{UNSPECIFIED_LABEL} f",
+            "f",
+            f"{UNSPECIFIED_LABEL}-f",
+            "R.role.type",
+            8,
+        )
+        child = (10, "g", "f:g", "g", "R.other.tag", 8)
+        sibling = (11, "h", "h", "h", "R.role.type", None)
+
+        self._assert_patched(
+            CATEGORIES[:6]
+            + [parent, unspecified, child, sibling, CATEGORIES[6]],
+            categories=[sibling, child, unspecified, parent],
+        )
+
+    def test_insert_skips_siblings_missing_from_tree(self):
+        """test_insert_skips_siblings_missing_from_tree"""
+        category = (8, "f", "a:f", "f", "Resource.role.type", 1)
+
+        # 42 created after the changes were read, 3 deleted
+        category_tree = self.category_tree.patch(
+            [category], [3], {1: [2, 42, 3, 8, 4]}, 2
+        )
+
+        assert_trees_equal(
+            self,
+            category_tree,
+            CategoryTree(CATEGORIES[:2] + [category] + CATEGORIES[3:]),
+        )
+
+    def test_insert_with_unknown_parent_raises_value_error(self):
+        """test_insert_with_unknown_parent_raises_value_error"""
+        with self.assertRaises(ValueError):
+            patch_category_tree(
+                self.category_tree,
+                CATEGORIES + [(8, "f", "f", "f", "R.role.type", 42)],
+                categories=[(8, "f", "f", "f", "R.role.type", 42)],
+            )
+
+    def test_insert_without_siblings_raises_value_error(self):
+        """test_insert_without_siblings_raises_value_error"""
+        with self.assertRaises(ValueError):
+            self.category_tree.patch(
+                [(8, "f", "f", "f", "R.role.type", None)], [], {}, 2
+            )
+
+    def test_insert_after_moved_sibling_raises_value_error(self):
+        """test_insert_after_moved_sibling_raises_value_error"""
+        category = (8, "f", "a:f", "f", "Resource.role.type", 1)
+
+        with self.assertRaises(ValueError):
+            self.category_tree.patch([category], [], {1: [6, 8]}, 2)
+
+    def test_insert_shared_value_raises_value_error(self):
+        """test_insert_shared_value_raises_value_error"""
+        category = (8, "f", "e", "f", "R.role.type", None)
+
+        with self.assertRaises(ValueError):
+            patch_category_tree(
+                self.category_tree, CATEGORIES + [category], [category]
+            )
+
+    def test_delete_shared_value_raises_value_error(self):
+        """test_delete_shared_value_raises_value_error"""
+        # the value of a fresh build is the one of the last category
+        categories = CATEGORIES + [(8, "f", "e", "f", "R.role.type", None)]
+        category_tree = CategoryTree(categories, 1)
+
+        with self.assertRaises(ValueError):
+            patch_category_tree(
+                category_tree, categories[:-1], deleted_id_list=[8]
+            )
+
+    def test_delete_subtree(self):
+        """test_delete_subtree"""
+        self._assert_patched(
+            CATEGORIES[:3] + CATEGORIES[6:], deleted_id_list=[6, 4]
+        )
+
+    def test_delete_unspecified_category(self):
+        """test_delete_unspecified_category"""
+        self._assert_patched(
+            CATEGORIES[:4] + CATEGORIES[5:], deleted_id_list=[5]
+        )
+
+    def test_delete_unknown_category_does_nothing(self):
+        """test_delete_unknown_category_does_nothing"""
+        self._assert_patched(CATEGORIES, deleted_id_list=[42])
+
+    def test_update_category(self):
+        """test_update_category"""
+        category = (3, "renamed", "a:renamed", "b", "Resource.new.tag", 1)
+
+        self._assert_patched(
+            CATEGORIES[:2] + [category] + CATEGORIES[3:],
+            categories=[category],
+        )
+
+    def test_update_parent_category_keeps_unspecified_value(self):
+        """test_update_parent_category_keeps_unspecified_value"""
+        category = (4, "renamed", f"a:c{CATEGORY_SUFFIX}", "c", "R.r.t", 1)
+
+        self._assert_patched(
+            CATEGORIES[:3] + [category] + CATEGORIES[4:],
+            categories=[category],
+        )
+
+    def test_changes_are_applied_at_once(self):
+        """test_changes_are_applied_at_once"""
+        created = (8, "f", "a:f", "f", "Resource.role.type", 1)
+        updated = (7, "renamed", "e", "e", "Resource.role.type", None)
+
+        self._assert_patched(
+            CATEGORIES[:1] + [created] + CATEGORIES[1:3] + [updated],
+            categories=[updated, created],
+            deleted_id_list=[4],
+        )
+
+    def test_update_moved_category_raises_value_error(self):
+        """test_update_moved_category_raises_value_error"""
+        with self.assertRaises(ValueError):
+            self.category_tree.patch(
+                [(3, "b", "a:b", "b", "Resource.role.type", 4)], [], {}, 2
+            )
+
+    def test_update_deleted_category_raises_value_error(self):
+        """test_update_deleted_category_raises_value_error"""
+        with self.assertRaises(ValueError):
+            self.category_tree.patch(
+                [(6, "d", "a:c:d", "d", "Resource.role.type", 4)], [4], {}, 2
+            )
+
+    def test_update_value_of_parent_raises_value_error(self):
+        """test_update_value_of_parent_raises_value_error"""
+        with self.assertRaises(ValueError):
+            self.category_tree.patch(
+                [
+                    (
+                        4,
+                        "c",
+                        f"z{CATEGORY_SUFFIX}",
+                        "c",
+                        "Resource.role.type",
+                        1,
+                    )
+                ],
+                [],
+                {},
+                2,
+            )
+
+    def test_snapshot_tree_is_not_modified(self):
+        """test_snapshot_tree_is_not_modified"""
+        category = (8, "f", "f", "f", "Resource.role.type", None)
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            with patch.object(
+                snapshot_utils, "FANCY_TREE_SNAPSHOT_DIR", snapshot_dir
+            ):
+                snapshot_utils.write_snapshot(1, CategoryTree(CATEGORIES, 1))
+                snapshot_tree = category_tree_utils._read_snapshot(1, 1)
+                category_tree = patch_category_tree(
+                    snapshot_tree, CATEGORIES + [category], [category]
+                )
+
+                assert_trees_equal(
+                    self, snapshot_tree, CategoryTree(CATEGORIES)
+                )
+        assert_trees_equal(
+            self, category_tree, CategoryTree(CATEGORIES + [category])
+        )
+
+
+class TestWriteSnapshot(SimpleTestCase):
+    """Unit tests for the `_write_snapshot` function."""
+
+    def test_tree_returned_if_not_written(self):
+        """test_tree_returned_if_not_written"""
+        category_tree = CategoryTree(CATEGORIES, 1)
+
+        with patch.object(snapshot_utils, "FANCY_TREE_SNAPSHOT_DIR", ""):
+            self.assertIs(
+                category_tree_utils._write_snapshot(1, category_tree),
+                category_tree,
+            )
+
+    def test_tree_returned_if_snapshot_cannot_be_read_back(self):
+        """test_tree_returned_if_snapshot_cannot_be_read_back"""
+        category_tree = CategoryTree(CATEGORIES, 1)
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            with patch.object(
+                snapshot_utils, "FANCY_TREE_SNAPSHOT_DIR", snapshot_dir
+            ), patch.object(
+                snapshot_utils, "read_snapshot", return_value=None
+            ):
+                self.assertIs(
+                    category_tree_utils._write_snapshot(1, category_tree),
+                    category_tree,
+                )
+
+    def test_tree_read_back_from_snapshot(self):
+        """test_tree_read_back_from_snapshot"""
+        category_tree = CategoryTree(CATEGORIES, 1)
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            with patch.object(
+                snapshot_utils, "FANCY_TREE_SNAPSHOT_DIR", snapshot_dir
+            ):
+                snapshot_tree = category_tree_utils._write_snapshot(
+                    1, category_tree
+                )
+
+                self.assertIsNot(snapshot_tree, category_tree)
+                assert_trees_equal(self, snapshot_tree, category_tree)
+
+
+class TestGetCategoryTree(SimpleTestCase):
+    """Unit tests for the `get_category_tree` function."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        category_tree_utils.category_tree_cache.clear()
+
+    @patch.object(category_tree_utils, "build_category_tree")
+    def test_tree_built_once(self, mock_build_category_tree):
+        """test_tree_built_once"""
+        mock_build_category_tree.side_effect = (
+            lambda refinement_id, version: CategoryTree([], version)
+        )
+
+        category_tree_utils.get_category_tree(1)
+        category_tree_utils.get_category_tree("1")
+
+        self.assertEqual(mock_build_category_tree.call_count, 1)
+
+    @patch.object(category_tree_utils, "build_category_tree")
+    def test_tree_built_once_for_concurrent_requests(
+        self, mock_build_category_tree
+    ):
+        """test_tree_built_once_for_concurrent_requests"""
+        requests = 50
+        barrier = threading.Barrier(requests)
+
+        def build(refinement_id, version):
+            # let the other requests miss the cache meanwhile
+            time.sleep(0.1)
+            return CategoryTree(CATEGORIES, version)
+
+        def load(_):
+            barrier.wait()
+            return category_tree_utils.get_category_tree(1)
+
+        mock_build_category_tree.side_effect = build
+
+        with ThreadPoolExecutor(max_workers=requests) as executor:
+            category_trees = list(executor.map(load, range(requests)))
+
+        self.assertEqual(mock_build_category_tree.call_count, 1)
+        self.assertEqual(len({id(tree) for tree in category_trees}), 1)
+
+    @patch.object(category_tree_utils, "build_category_tree")
+    def test_failed_build_is_raised_to_concurrent_requests(
+        self, mock_build_category_tree
+    ):
+        """test_failed_build_is_raised_to_concurrent_requests"""
+        mock_build_category_tree.side_effect = exceptions.DoesNotExist("mock")
+
+        with self.assertRaises(exceptions.DoesNotExist):
+            category_tree_utils.get_category_tree(1)
+        # the failed build is not kept
+        mock_build_category_tree.side_effect = (
+            lambda refinement_id, version: CategoryTree([], version)
+        )
+        self.assertEqual(len(category_tree_utils.get_category_tree(1)), 0)
+
+    @patch.object(category_tree_utils, "build_category_tree")
+    def test_tree_built_again_after_version_bump(
+        self, mock_build_category_tree
+    ):
+        """test_tree_built_again_after_version_bump"""
+        mock_build_category_tree.side_effect = (
+            lambda refinement_id, version: CategoryTree([], version)
+        )
+
+        category_tree_utils.get_category_tree(1)
+        version_utils.bump_refinement_version(1)
+        category_tree_utils.get_category_tree(1)
+
+        self.assertEqual(mock_build_category_tree.call_count, 2)
+
+    @patch.object(category_tree_utils, "build_category_tree")
+    def test_tree_read_from_snapshot_of_other_process(
+        self, mock_build_category_tree
+    ):
+        """test_tree_read_from_snapshot_of_other_process"""
+        mock_build_category_tree.side_effect = (
+            lambda refinement_id, version: CategoryTree(CATEGORIES, version)
+        )
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            with patch.object(
+                snapshot_utils, "FANCY_TREE_SNAPSHOT_DIR", snapshot_dir
+            ):
+                category_tree_utils.get_category_tree(1)
+                # another process only has the snapshot
+                category_tree_utils.category_tree_cache.clear()
+                category_tree = category_tree_utils.get_category_tree(1)
+
+        self.assertEqual(mock_build_category_tree.call_count, 1)
+        self.assertEqual(
+            category_tree.get_elements([6]), [("content", "subject", "a:c:d")]
+        )
+
+    @patch.object(category_tree_utils, "build_category_tree")
+    def test_snapshot_of_other_process_building_is_awaited(
+        self, mock_build_category_tree
+    ):
+        """test_snapshot_of_other_process_building_is_awaited"""
+        mock_build_category_tree.side_effect = (
+            lambda refinement_id, version: CategoryTree(CATEGORIES, version)
+        )
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            with patch.object(
+                snapshot_utils, "FANCY_TREE_SNAPSHOT_DIR", snapshot_dir
+            ):
+                version = version_utils.get_refinement_version(1)
+                # another process of the host holds the build lock
+                lock_key = category_tree_utils.BUILD_LOCK_KEY.format(
+                    host=category_tree_utils.socket.gethostname(),
+                    refinement_id=1,
+                    version=version,
+                )
+                cache.add(lock_key, "other_process")
+                threading.Timer(
+                    0.1,
+                    snapshot_utils.write_snapshot,
+                    (1, CategoryTree(CATEGORIES, version)),
+                ).start()
+
+                category_tree = category_tree_utils.get_category_tree(1)
+
+        mock_build_category_tree.assert_not_called()
+        self.assertEqual(len(category_tree), len(CATEGORIES))
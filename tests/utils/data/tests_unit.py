@@ -0,0 +1,197 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.utils.data` package."""
+
+import gzip
+import zlib
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core_module_fancy_tree_registry_app.utils import data as data_utils
+
+
+class TestParseTwoLevelElements(SimpleTestCase):
+    """Unit tests for the `parse_two_level_elements` function."""
+
+    def test_module_data_is_parsed(self):
+        """test_module_data_is_parsed"""
+        self.assertEqual(
+            data_utils.parse_two_level_elements(
+                "<role><type>a:b</type></role><role><type>e</type></role>"
+            ),
+            [("role", "type", "a:b"), ("role", "type", "e")],
+        )
+
+    def test_empty_value_is_parsed(self):
+        """test_empty_value_is_parsed"""
+        self.assertEqual(
+            data_utils.parse_two_level_elements("<role><type></type></role>"),
+            [("role", "type", "")],
+        )
+
+    def test_predefined_entities_are_unescaped(self):
+        """test_predefined_entities_are_unescaped"""
+        self.assertEqual(
+            data_utils.parse_two_level_elements(
+                "<role><type>a &amp; b &lt;&gt; &quot;&apos;</type></role>"
+            ),
+            [("role", "type", "a & b <> \"'")],
+        )
+
+    def test_character_reference_returns_none(self):
+        """test_character_reference_returns_none"""
+        self.assertIsNone(
+            data_utils.parse_two_level_elements(
+                "<role><type>&#38;</type></role>"
+            )
+        )
+
+    def test_unmatched_closing_tags_return_none(self):
+        """test_unmatched_closing_tags_return_none"""
+        self.assertIsNone(
+            data_utils.parse_two_level_elements("<role><type>a</role></type>")
+        )
+
+    def test_unexpected_content_returns_none(self):
+        """test_unexpected_content_returns_none"""
+        for data in (
+            "<role><type>a</type></role> ",
+            "<role/>",
+            "<role><type>a</type><type>b</type></role>",
+            '<role lang="en"><type>a</type></role>',
+            "<role><type>a</type></role>text",
+        ):
+            with self.subTest(data=data):
+                self.assertIsNone(data_utils.parse_two_level_elements(data))
+
+
+class TestIterDataElements(SimpleTestCase):
+    """Unit tests for the `iter_data_elements` function."""
+
+    def test_empty_data_returns_no_element(self):
+        """test_empty_data_returns_no_element"""
+        self.assertEqual(list(data_utils.iter_data_elements("")), [])
+
+    @patch.object(data_utils, "XSDTree")
+    def test_module_data_is_not_parsed_as_tree(self, mock_xsd_tree):
+        """test_module_data_is_not_parsed_as_tree"""
+        self.assertEqual(
+            list(data_utils.iter_data_elements("<role><type>e</type></role>")),
+            [("role", "type", "e")],
+        )
+        mock_xsd_tree.fromstring.assert_not_called()
+
+    def test_unexpected_data_falls_back_to_tree(self):
+        """test_unexpected_data_falls_back_to_tree"""
+        self.assertEqual(
+            list(
+                data_utils.iter_data_elements(
+                    "<role>\n  <type>&#38;</type>\n</role><empty/>"
+                )
+            ),
+            [("role", "type", "&")],
+        )
+
+    def test_fast_path_and_tree_return_same_elements(self):
+        """test_fast_path_and_tree_return_same_elements"""
+        data = "".join(
+            f"<role><type>a:{index} &amp; &lt;b&gt;</type></role>"
+            for index in range(100)
+        )
+
+        self.assertEqual(
+            list(data_utils.iter_data_elements(data)),
+            list(data_utils._iter_xml_elements(data)),
+        )
+
+
+class TestFormatData(SimpleTestCase):
+    """Unit tests for the `format_data` function."""
+
+    def setUp(self):
+        """setUp"""
+        data_utils.format_data_element.cache_clear()
+
+    def test_elements_are_formatted(self):
+        """test_elements_are_formatted"""
+        self.assertEqual(
+            data_utils.format_data(
+                [("role", "type", "a:b"), ("role", "type", "e")]
+            ),
+            "<role><type>a:b</type></role><role><type>e</type></role>",
+        )
+
+    def test_no_element_returns_empty_data(self):
+        """test_no_element_returns_empty_data"""
+        self.assertEqual(data_utils.format_data([]), "")
+
+    def test_none_value_is_formatted_empty(self):
+        """test_none_value_is_formatted_empty"""
+        self.assertEqual(
+            data_utils.format_data([("role", "type", None)]),
+            "<role><type></type></role>",
+        )
+
+    def test_values_are_escaped(self):
+        """test_values_are_escaped"""
+        elements = [("role", "type", "a & b <c>")]
+
+        data = data_utils.format_data(elements)
+
+        self.assertEqual(data, "<role><type>a &amp; b &lt;c&gt;</type></role>")
+        self.assertEqual(data_utils.parse_two_level_elements(data), elements)
+
+    def test_element_is_formatted_once(self):
+        """test_element_is_formatted_once"""
+        data_utils.format_data([("role", "type", "a")])
+        data_utils.format_data([("role", "type", "a"), ("role", "type", "b")])
+
+        cache_info = data_utils.format_data_element.cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses), (1, 2))
+
+
+class TestDecompress(SimpleTestCase):
+    """Unit tests for the `decompress` function."""
+
+    def test_body_without_encoding_is_returned(self):
+        """test_body_without_encoding_is_returned"""
+        for content_encoding in (None, "", "identity"):
+            with self.subTest(content_encoding=content_encoding):
+                self.assertEqual(
+                    data_utils.decompress(b"data", content_encoding), b"data"
+                )
+
+    def test_gzip_body_is_decompressed(self):
+        """test_gzip_body_is_decompressed"""
+        self.assertEqual(
+            data_utils.decompress(gzip.compress(b"data"), "gzip"), b"data"
+        )
+
+    def test_deflate_body_is_decompressed(self):
+        """test_deflate_body_is_decompressed"""
+        self.assertEqual(
+            data_utils.decompress(zlib.compress(b"data"), " Deflate"),
+            b"data",
+        )
+
+    def test_unsupported_encoding_raises_value_error(self):
+        """test_unsupported_encoding_raises_value_error"""
+        with self.assertRaises(ValueError):
+            data_utils.decompress(b"data", "br")
+
+    def test_invalid_body_raises_value_error(self):
+        """test_invalid_body_raises_value_error"""
+        with self.assertRaises(ValueError):
+            data_utils.decompress(b"data", "gzip")
+
+    def test_truncated_body_raises_value_error(self):
+        """test_truncated_body_raises_value_error"""
+        with self.assertRaises(ValueError):
+            data_utils.decompress(gzip.compress(b"data")[:-8], "gzip")
+
+    def test_body_larger_than_max_size_raises_value_error(self):
+        """test_body_larger_than_max_size_raises_value_error"""
+        body = gzip.compress(b"a" * 1000)
+
+        self.assertEqual(len(data_utils.decompress(body, "gzip", 1000)), 1000)
+        with self.assertRaises(ValueError):
+            data_utils.decompress(body, "gzip", 999)
@@ -0,0 +1,124 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.utils.instrumentation` package."""
+
+from unittest.mock import MagicMock
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+
+from core_module_fancy_tree_registry_app.utils.instrumentation import (
+    Instrumentation,
+    QueryCounter,
+)
+
+
+class TestQueryCounter(SimpleTestCase):
+    """Unit tests for the `QueryCounter` class."""
+
+    def test_query_counter_counts_and_executes_queries(self):
+        """test_query_counter_counts_and_executes_queries"""
+        mock_execute = MagicMock(return_value="result")
+        query_counter = QueryCounter()
+
+        query_counter(mock_execute, "sql", (), False, {})
+        result = query_counter(mock_execute, "sql", (), False, {})
+
+        self.assertEqual(query_counter.count, 2)
+        self.assertEqual(result, "result")
+
+
+class TestInstrumentationPhase(SimpleTestCase):
+    """Unit tests for the `phase` method of `Instrumentation` class."""
+
+    def test_disabled_instrumentation_records_nothing(self):
+        """test_disabled_instrumentation_records_nothing"""
+        instrumentation = Instrumentation()
+
+        with instrumentation.phase("render"):
+            pass
+
+        self.assertEqual(instrumentation.phases, {})
+
+    def test_enabled_instrumentation_records_phase(self):
+        """test_enabled_instrumentation_records_phase"""
+        instrumentation = Instrumentation(enabled=True)
+
+        with instrumentation.phase("render"):
+            pass
+
+        self.assertEqual(instrumentation.phases["render"]["queries"], 0)
+        self.assertGreaterEqual(
+            instrumentation.phases["render"]["duration_ms"], 0
+        )
+
+    def test_repeated_phase_is_added_up(self):
+        """test_repeated_phase_is_added_up"""
+        instrumentation = Instrumentation(enabled=True)
+        instrumentation.phases["render"] = {"duration_ms": 1.0, "queries": 2}
+
+        with instrumentation.phase("render"):
+            pass
+
+        self.assertEqual(list(instrumentation.phases), ["render"])
+        self.assertGreaterEqual(
+            instrumentation.phases["render"]["duration_ms"], 1.0
+        )
+        self.assertEqual(instrumentation.phases["render"]["queries"], 2)
+
+    def test_phase_is_recorded_when_exception_raised(self):
+        """test_phase_is_recorded_when_exception_raised"""
+        instrumentation = Instrumentation(enabled=True)
+
+        with self.assertRaises(ValueError):
+            with instrumentation.phase("render"):
+                raise ValueError()
+
+        self.assertIn("render", instrumentation.phases)
+
+
+class TestInstrumentationReport(SimpleTestCase):
+    """Unit tests for the `report` method of `Instrumentation` class."""
+
+    def setUp(self):
+        """setUp"""
+        self.instrumentation = Instrumentation(enabled=True)
+        self.instrumentation.tags = {
+            "xml_xpath": "/ns:Resource/ns:role/ns:type",
+            "refinement_id": 1,
+        }
+        self.instrumentation.phases = {
+            "refinement": {"duration_ms": 1.5, "queries": 1},
+            "render": {"duration_ms": 12.25, "queries": 0},
+        }
+
+    def test_report_sets_server_timing_header(self):
+        """test_report_sets_server_timing_header"""
+        response = self.instrumentation.report(HttpResponse())
+
+        self.assertEqual(
+            response["Server-Timing"],
+            'refinement;dur=1.50;desc="1 queries", '
+            'render;dur=12.25;desc="0 queries"',
+        )
+
+    def test_report_logs_tagged_record(self):
+        """test_report_logs_tagged_record"""
+        with self.assertLogs(
+            "core_module_fancy_tree_registry_app.utils.instrumentation",
+            "INFO",
+        ) as logs:
+            self.instrumentation.report(HttpResponse())
+
+        record = logs.records[0]
+        self.assertEqual(
+            record.fancy_tree_xpath, "/ns:Resource/ns:role/ns:type"
+        )
+        self.assertEqual(record.fancy_tree_refinement_id, 1)
+        self.assertEqual(record.fancy_tree_phases, self.instrumentation.phases)
+
+    def test_disabled_report_does_not_set_header(self):
+        """test_disabled_report_does_not_set_header"""
+        self.instrumentation.enabled = False
+
+        response = self.instrumentation.report(HttpResponse())
+
+        self.assertFalse(response.has_header("Server-Timing"))
@@ -0,0 +1,48 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.utils.lru_cache` package."""
+
+from unittest import TestCase
+
+from core_module_fancy_tree_registry_app.utils.lru_cache import LRUCache
+
+
+class TestLRUCache(TestCase):
+    """Unit tests for the `LRUCache` class."""
+
+    def test_get_missing_key_returns_default(self):
+        """test_get_missing_key_returns_default"""
+        cache = LRUCache(2)
+        self.assertEqual(cache.get("mock_key", "mock_default"), "mock_default")
+
+    def test_get_returns_set_value(self):
+        """test_get_returns_set_value"""
+        cache = LRUCache(2)
+        cache.set("mock_key", "mock_value")
+        self.assertEqual(cache.get("mock_key"), "mock_value")
+
+    def test_set_evicts_least_recently_used(self):
+        """test_set_evicts_least_recently_used"""
+        cache = LRUCache(2)
+        cache.set("key_1", 1)
+        cache.set("key_2", 2)
+        cache.get("key_1")
+        cache.set("key_3", 3)
+
+        self.assertIn("key_1", cache)
+        self.assertNotIn("key_2", cache)
+        self.assertIn("key_3", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_delete_removes_key(self):
+        """test_delete_removes_key"""
+        cache = LRUCache(2)
+        cache.set("mock_key", "mock_value")
+        cache.delete("mock_key")
+        self.assertNotIn("mock_key", cache)
+
+    def test_clear_removes_all_keys(self):
+        """test_clear_removes_all_keys"""
+        cache = LRUCache(2)
+        cache.set("key_1", 1)
+        cache.set("key_2", 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
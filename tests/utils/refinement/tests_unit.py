@@ -0,0 +1,123 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.utils.refinement` package."""
+
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from core_main_app.commons import exceptions
+from core_module_fancy_tree_registry_app.utils import (
+    refinement as refinement_utils,
+    version as version_utils,
+)
+
+
+class TestParseXmlXpath(TestCase):
+    """Unit tests for the `parse_xml_xpath` function."""
+
+    def test_returns_field_id_and_element(self):
+        """test_returns_field_id_and_element"""
+        self.assertEqual(
+            refinement_utils.parse_xml_xpath("/ns:Resource[1]/ns:role.type"),
+            ("nsResource1nsroletype", "role.type"),
+        )
+
+    def test_element_without_namespace(self):
+        """test_element_without_namespace"""
+        self.assertEqual(
+            refinement_utils.parse_xml_xpath("Resource/type"),
+            ("Resourcetype", "type"),
+        )
+
+
+class TestGetRefinementMap(TestCase):
+    """Unit tests for the `get_refinement_map` function."""
+
+    def setUp(self):
+        """setUp"""
+        refinement_utils.clear_refinement_map()
+
+    @staticmethod
+    def _mock_refinement(xsd_name):
+        mock_refinement = MagicMock()
+        mock_refinement.xsd_name = xsd_name
+        return mock_refinement
+
+    @patch.object(refinement_utils, "refinement_api")
+    def test_returns_refinements_by_xsd_name(self, mock_refinement_api):
+        """test_returns_refinements_by_xsd_name"""
+        mock_refinement_1 = self._mock_refinement("type")
+        mock_refinement_2 = self._mock_refinement("role")
+        mock_refinement_api.get_all_filtered_by_template_hash.return_value = [
+            mock_refinement_1,
+            mock_refinement_2,
+        ]
+
+        self.assertDictEqual(
+            refinement_utils.get_refinement_map("mock_hash"),
+            {"type": mock_refinement_1, "role": mock_refinement_2},
+        )
+
+    @patch.object(refinement_utils, "refinement_api")
+    def test_map_built_once_per_template_hash(self, mock_refinement_api):
+        """test_map_built_once_per_template_hash"""
+        mock_refinement_api.get_all_filtered_by_template_hash.return_value = []
+
+        refinement_utils.get_refinement_map("mock_hash")
+        refinement_utils.get_refinement_map("mock_hash")
+
+        mock_refinement_api.get_all_filtered_by_template_hash.assert_called_once_with(
+            "mock_hash"
+        )
+
+    @patch.object(refinement_utils, "refinement_api")
+    def test_map_rebuilt_when_template_hash_changes(self, mock_refinement_api):
+        """test_map_rebuilt_when_template_hash_changes"""
+        mock_refinement_api.get_all_filtered_by_template_hash.return_value = []
+
+        refinement_utils.get_refinement_map("mock_hash_1")
+        refinement_utils.get_refinement_map("mock_hash_2")
+
+        self.assertEqual(
+            mock_refinement_api.get_all_filtered_by_template_hash.call_count,
+            2,
+        )
+
+    @patch.object(refinement_utils, "refinement_api")
+    def test_map_rebuilt_after_template_version_bump(
+        self, mock_refinement_api
+    ):
+        """test_map_rebuilt_after_template_version_bump"""
+        mock_refinement_api.get_all_filtered_by_template_hash.return_value = []
+
+        refinement_utils.get_refinement_map("mock_hash")
+        version_utils.bump_template_version("mock_hash")
+        refinement_utils.get_refinement_map("mock_hash")
+
+        self.assertEqual(
+            mock_refinement_api.get_all_filtered_by_template_hash.call_count,
+            2,
+        )
+
+
+class TestGetByXsdName(TestCase):
+    """Unit tests for the `get_by_xsd_name` function."""
+
+    @patch.object(refinement_utils, "get_refinement_map")
+    def test_returns_refinement(self, mock_get_refinement_map):
+        """test_returns_refinement"""
+        mock_refinement = MagicMock()
+        mock_get_refinement_map.return_value = {"type": mock_refinement}
+
+        self.assertEqual(
+            refinement_utils.get_by_xsd_name("mock_hash", "type"),
+            mock_refinement,
+        )
+
+    @patch.object(refinement_utils, "get_refinement_map")
+    def test_unknown_xsd_name_raises_does_not_exist(
+        self, mock_get_refinement_map
+    ):
+        """test_unknown_xsd_name_raises_does_not_exist"""
+        mock_get_refinement_map.return_value = {}
+
+        with self.assertRaises(exceptions.DoesNotExist):
+            refinement_utils.get_by_xsd_name("mock_hash", "type")
@@ -0,0 +1,152 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.utils.search` package."""
+
+from threading import Event, Thread
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core_module_fancy_tree_registry_app.utils import search as search_utils
+from core_module_fancy_tree_registry_app.utils import (
+    version as version_utils,
+)
+
+CATEGORIES = [
+    (1, "Physics", None),
+    (2, "Solid State Physics", 1),
+    (3, "Optics", 1),
+    (4, "Quantum Optics", 3),
+    (5, "Chemistry", None),
+    (6, "Physical Chemistry", 5),
+]
+
+
+class TestSearchIndex(SimpleTestCase):
+    """Unit tests for the `SearchIndex` class."""
+
+    def setUp(self):
+        """setUp"""
+        self.search_index = search_utils.SearchIndex(CATEGORIES)
+
+    def _keys(self, query, limit=10):
+        return [node["key"] for node in self.search_index.search(query, limit)]
+
+    def test_search_matches_token_prefix(self):
+        """test_search_matches_token_prefix"""
+        self.assertEqual(self._keys("opt"), [3, 4])
+
+    def test_search_is_case_insensitive(self):
+        """test_search_is_case_insensitive"""
+        self.assertEqual(self._keys("QUANTUM"), [4])
+
+    def test_search_matches_every_query_token(self):
+        """test_search_matches_every_query_token"""
+        self.assertEqual(self._keys("phys chem"), [6])
+
+    def test_exact_name_comes_first(self):
+        """test_exact_name_comes_first"""
+        self.assertEqual(self._keys("optics"), [3, 4])
+        self.assertEqual(self._keys("chemistry"), [5, 6])
+        self.assertEqual(self._keys("physical chemistry"), [6])
+
+    def test_other_matches_are_in_tree_order(self):
+        """test_other_matches_are_in_tree_order"""
+        self.assertEqual(self._keys("ph"), [1, 2, 6])
+
+    def test_search_returns_limit_matches(self):
+        """test_search_returns_limit_matches"""
+        self.assertEqual(self._keys("ph", limit=2), [1, 2])
+
+    def test_no_match_returns_empty_list(self):
+        """test_no_match_returns_empty_list"""
+        self.assertEqual(self._keys("biology"), [])
+        self.assertEqual(self._keys("optics biology"), [])
+
+    def test_empty_query_returns_empty_list(self):
+        """test_empty_query_returns_empty_list"""
+        self.assertEqual(self._keys(" - "), [])
+
+    def test_search_returns_ancestors(self):
+        """test_search_returns_ancestors"""
+        self.assertEqual(
+            self.search_index.search("quantum", 10),
+            [
+                {
+                    "title": "Quantum Optics",
+                    "key": 4,
+                    "ancestors": [
+                        {"title": "Physics", "key": 1},
+                        {"title": "Optics", "key": 3},
+                    ],
+                }
+            ],
+        )
+
+
+class TestGetSearchIndex(SimpleTestCase):
+    """Unit tests for the `get_search_index` function."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        search_utils.search_index_cache.clear()
+
+    def tearDown(self):
+        """tearDown"""
+        search_utils.search_index_cache.clear()
+
+    @patch.object(search_utils, "build_search_index")
+    def test_search_index_is_built_once(self, mock_build_search_index):
+        """test_search_index_is_built_once"""
+        mock_build_search_index.return_value = search_utils.SearchIndex(
+            CATEGORIES, version_utils.get_refinement_version(1)
+        )
+        search_utils.get_search_index(1)
+        search_index = search_utils.get_search_index(1)
+
+        mock_build_search_index.assert_called_once_with(
+            1, version_utils.get_refinement_version(1)
+        )
+        self.assertEqual(search_index, mock_build_search_index.return_value)
+
+    @patch.object(search_utils, "build_search_index")
+    def test_search_index_is_rebuilt_after_version_bump(
+        self, mock_build_search_index
+    ):
+        """test_search_index_is_rebuilt_after_version_bump"""
+        mock_build_search_index.return_value = search_utils.SearchIndex(
+            CATEGORIES, version_utils.get_refinement_version(1)
+        )
+        search_utils.get_search_index(1)
+        version_utils.bump_refinement_version(1)
+        search_utils.get_search_index(1)
+
+        self.assertEqual(mock_build_search_index.call_count, 2)
+
+    @patch.object(search_utils, "build_search_index")
+    def test_build_of_previous_version_is_not_joined(
+        self, mock_build_search_index
+    ):
+        """test_build_of_previous_version_is_not_joined"""
+        previous_version = version_utils.get_refinement_version(1)
+        build_started = Event()
+        release_build = Event()
+
+        def build_search_index(refinement_id, version):
+            if version == previous_version:
+                build_started.set()
+                release_build.wait(5)
+            return search_utils.SearchIndex(CATEGORIES, version)
+
+        mock_build_search_index.side_effect = build_search_index
+        thread = Thread(target=search_utils.get_search_index, args=(1,))
+        thread.start()
+        build_started.wait(5)
+        version = version_utils.bump_refinement_version(1)
+
+        search_index = search_utils.get_search_index(1)
+        release_build.set()
+        thread.join()
+
+        self.assertEqual(search_index.version, version)
+        self.assertEqual(mock_build_search_index.call_count, 2)
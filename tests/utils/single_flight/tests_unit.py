@@ -0,0 +1,127 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.utils.single_flight` package."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core_module_fancy_tree_registry_app.utils import (
+    single_flight as single_flight_utils,
+)
+
+
+class TestSingleFlightDo(SimpleTestCase):
+    """Unit tests for the `do` method of `SingleFlight` class."""
+
+    def setUp(self):
+        """setUp"""
+        self.single_flight = single_flight_utils.SingleFlight()
+
+    def _do_concurrently(self, key, func, calls=50):
+        barrier = threading.Barrier(calls)
+
+        def call(_):
+            barrier.wait()
+            try:
+                return self.single_flight.do(key, func)
+            except Exception as exception:
+                return exception
+
+        with ThreadPoolExecutor(max_workers=calls) as executor:
+            return list(executor.map(call, range(calls)))
+
+    def test_concurrent_calls_run_once(self):
+        """test_concurrent_calls_run_once"""
+        func = MagicMock(side_effect=lambda: time.sleep(0.1) or "mock_result")
+
+        results = self._do_concurrently("mock_key", func)
+
+        func.assert_called_once_with()
+        self.assertEqual(results, ["mock_result"] * 50)
+
+    def test_exception_is_raised_to_all_callers(self):
+        """test_exception_is_raised_to_all_callers"""
+        error = ValueError("mock_error")
+
+        def func():
+            time.sleep(0.1)
+            raise error
+
+        results = self._do_concurrently("mock_key", func)
+
+        self.assertEqual(results, [error] * 50)
+
+    def test_sequential_calls_run_again(self):
+        """test_sequential_calls_run_again"""
+        func = MagicMock(return_value="mock_result")
+
+        self.single_flight.do("mock_key", func)
+        self.single_flight.do("mock_key", func)
+
+        self.assertEqual(func.call_count, 2)
+
+    def test_calls_with_other_keys_are_not_coalesced(self):
+        """test_calls_with_other_keys_are_not_coalesced"""
+        func = MagicMock(return_value="mock_result")
+
+        self.single_flight.do("mock_key_1", func)
+        self.single_flight.do("mock_key_2", func)
+
+        self.assertEqual(func.call_count, 2)
+
+
+class TestFillOnce(SimpleTestCase):
+    """Unit tests for the `fill_once` function."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+
+    def test_computes_and_releases_lock(self):
+        """test_computes_and_releases_lock"""
+        result = single_flight_utils.fill_once(
+            "mock_lock", lambda: None, lambda: "mock_value"
+        )
+
+        self.assertEqual(result, "mock_value")
+        self.assertIsNone(cache.get("mock_lock"))
+
+    def test_waits_for_value_of_lock_holder(self):
+        """test_waits_for_value_of_lock_holder"""
+        compute = MagicMock()
+        cache.add("mock_lock", "other_process")
+        threading.Timer(0.1, cache.set, ("mock_value", "filled")).start()
+
+        result = single_flight_utils.fill_once(
+            "mock_lock", lambda: cache.get("mock_value"), compute
+        )
+
+        self.assertEqual(result, "filled")
+        compute.assert_not_called()
+        # the lock of the other process is not released
+        self.assertEqual(cache.get("mock_lock"), "other_process")
+
+    @patch.object(single_flight_utils, "FANCY_TREE_FILL_LOCK_TIMEOUT", 0.1)
+    def test_computes_if_lock_is_not_released(self):
+        """test_computes_if_lock_is_not_released"""
+        cache.add("mock_lock", "other_process")
+
+        result = single_flight_utils.fill_once(
+            "mock_lock", lambda: None, lambda: "mock_value"
+        )
+
+        self.assertEqual(result, "mock_value")
+
+    @patch.object(single_flight_utils, "FANCY_TREE_FILL_LOCK_TIMEOUT", 0)
+    def test_disabled_lock_computes(self):
+        """test_disabled_lock_computes"""
+        cache.add("mock_lock", "other_process")
+
+        result = single_flight_utils.fill_once(
+            "mock_lock", lambda: None, lambda: "mock_value"
+        )
+
+        self.assertEqual(result, "mock_value")
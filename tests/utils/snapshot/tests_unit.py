@@ -0,0 +1,225 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.utils.snapshot` package."""
+
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core_module_fancy_tree_registry_app.utils import (
+    snapshot as snapshot_utils,
+)
+from core_module_fancy_tree_registry_app.utils.category_tree import (
+    CategoryTree,
+)
+from tests.utils.category_tree.tests_unit import CATEGORIES
+
+
+class TestSnapshot(SimpleTestCase):
+    """Unit tests for the `write_snapshot` and `read_snapshot` functions."""
+
+    def setUp(self):
+        """setUp"""
+        self.snapshot_dir = tempfile.TemporaryDirectory()
+        patcher = patch.object(
+            snapshot_utils, "FANCY_TREE_SNAPSHOT_DIR", self.snapshot_dir.name
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.snapshot_dir.cleanup)
+        self.category_tree = CategoryTree(CATEGORIES, 5)
+
+    def test_read_tree_matches_written_tree(self):
+        """test_read_tree_matches_written_tree"""
+        self.assertTrue(snapshot_utils.write_snapshot(1, self.category_tree))
+
+        snapshot_tree = CategoryTree.from_tables(
+            5, snapshot_utils.read_snapshot(1, 5)
+        )
+
+        self.assertEqual(
+            snapshot_tree.get_nodes(), self.category_tree.get_nodes()
+        )
+        self.assertEqual(
+            snapshot_tree.get_elements(["4", 6, "1"]),
+            self.category_tree.get_elements(["4", 6, "1"]),
+        )
+        self.assertEqual(
+            list(snapshot_tree.iter_selectable_rows()),
+            list(self.category_tree.iter_selectable_rows()),
+        )
+        self.assertDictEqual(
+            dict(snapshot_tree.value_index), self.category_tree.value_index
+        )
+        self.assertIsNone(snapshot_tree.value_index.get("unknown"))
+
+    def test_other_version_is_not_read(self):
+        """test_other_version_is_not_read"""
+        snapshot_utils.write_snapshot(1, self.category_tree)
+
+        self.assertIsNone(snapshot_utils.read_snapshot(1, 6))
+
+    def test_previous_versions_are_removed(self):
+        """test_previous_versions_are_removed"""
+        snapshot_utils.write_snapshot(1, self.category_tree)
+        snapshot_utils.write_snapshot(1, CategoryTree(CATEGORIES, 6))
+        snapshot_utils.write_snapshot(2, CategoryTree(CATEGORIES, 4))
+
+        self.assertEqual(
+            sorted(os.listdir(self.snapshot_dir.name)),
+            ["refinement_1_6.snapshot", "refinement_2_4.snapshot"],
+        )
+
+    def test_invalid_snapshot_is_ignored(self):
+        """test_invalid_snapshot_is_ignored"""
+        with open(
+            os.path.join(self.snapshot_dir.name, "refinement_1_5.snapshot"),
+            "wb",
+        ) as snapshot_file:
+            snapshot_file.write(b"invalid")
+
+        with self.assertLogs(snapshot_utils.logger, "WARNING"):
+            self.assertIsNone(snapshot_utils.read_snapshot(1, 5))
+
+    def _get_snapshot_path(self, version=5):
+        return os.path.join(
+            self.snapshot_dir.name, f"refinement_1_{version}.snapshot"
+        )
+
+    def test_version_mismatch_is_ignored(self):
+        """test_version_mismatch_is_ignored"""
+        snapshot_utils.write_snapshot(1, self.category_tree)
+        os.rename(self._get_snapshot_path(), self._get_snapshot_path(6))
+
+        with self.assertLogs(snapshot_utils.logger, "WARNING") as context:
+            self.assertIsNone(snapshot_utils.read_snapshot(1, 6))
+
+        self.assertIn("version mismatch", context.output[0])
+
+    def test_truncated_snapshot_is_ignored(self):
+        """test_truncated_snapshot_is_ignored"""
+        snapshot_utils.write_snapshot(1, self.category_tree)
+        path = self._get_snapshot_path()
+        os.truncate(path, os.path.getsize(path) - 16)
+
+        with self.assertLogs(snapshot_utils.logger, "WARNING") as context:
+            self.assertIsNone(snapshot_utils.read_snapshot(1, 5))
+
+        self.assertIn("truncated snapshot", context.output[0])
+
+    def test_snapshot_with_missing_table_is_ignored(self):
+        """test_snapshot_with_missing_table_is_ignored"""
+        with patch.object(snapshot_utils, "STRING_TABLES", ("names",)):
+            snapshot_utils.write_snapshot(1, self.category_tree)
+
+        with self.assertLogs(snapshot_utils.logger, "WARNING"):
+            self.assertIsNone(snapshot_utils.read_snapshot(1, 5))
+
+    def test_corrupt_header_is_ignored(self):
+        """test_corrupt_header_is_ignored"""
+        snapshot_utils.write_snapshot(1, self.category_tree)
+        with open(self._get_snapshot_path(), "r+b") as snapshot_file:
+            snapshot_file.seek(len(snapshot_utils.SNAPSHOT_MAGIC) + 8)
+            snapshot_file.write(b"#")
+
+        with self.assertLogs(snapshot_utils.logger, "WARNING"):
+            self.assertIsNone(snapshot_utils.read_snapshot(1, 5))
+
+    @patch.object(snapshot_utils.os, "fsync")
+    def test_failed_write_removes_temporary_file(self, mock_fsync):
+        """test_failed_write_removes_temporary_file"""
+        mock_fsync.side_effect = OSError("disk full")
+
+        with self.assertLogs(snapshot_utils.logger, "WARNING"):
+            self.assertFalse(
+                snapshot_utils.write_snapshot(1, self.category_tree)
+            )
+
+        self.assertEqual(os.listdir(self.snapshot_dir.name), [])
+
+    @patch.object(snapshot_utils.os, "remove")
+    @patch.object(snapshot_utils.os, "fsync")
+    def test_failed_removal_of_temporary_file_is_ignored(
+        self, mock_fsync, mock_remove
+    ):
+        """test_failed_removal_of_temporary_file_is_ignored"""
+        mock_fsync.side_effect = OSError("disk full")
+        mock_remove.side_effect = OSError("read-only file system")
+
+        with self.assertLogs(snapshot_utils.logger, "WARNING"):
+            self.assertFalse(
+                snapshot_utils.write_snapshot(1, self.category_tree)
+            )
+
+        mock_remove.assert_called_once()
+
+    def test_snapshot_written_if_previous_version_cannot_be_removed(self):
+        """test_snapshot_written_if_previous_version_cannot_be_removed"""
+        snapshot_utils.write_snapshot(1, self.category_tree)
+
+        with patch.object(snapshot_utils.os, "remove", side_effect=OSError):
+            self.assertTrue(
+                snapshot_utils.write_snapshot(1, CategoryTree(CATEGORIES, 6))
+            )
+
+        self.assertEqual(
+            sorted(os.listdir(self.snapshot_dir.name)),
+            ["refinement_1_5.snapshot", "refinement_1_6.snapshot"],
+        )
+
+    def test_disabled_snapshots_are_not_written(self):
+        """test_disabled_snapshots_are_not_written"""
+        with patch.object(snapshot_utils, "FANCY_TREE_SNAPSHOT_DIR", None):
+            self.assertFalse(
+                snapshot_utils.write_snapshot(1, self.category_tree)
+            )
+            self.assertIsNone(snapshot_utils.read_snapshot(1, 5))
+
+        self.assertEqual(os.listdir(self.snapshot_dir.name), [])
+
+
+class TestStringTable(SimpleTestCase):
+    """Unit tests for the `StringTable` class."""
+
+    def setUp(self):
+        """setUp"""
+        offsets, data = snapshot_utils._encode_strings(["a", "bé", ""])
+        self.string_table = snapshot_utils.StringTable(offsets, data)
+
+    def test_strings_are_decoded(self):
+        """test_strings_are_decoded"""
+        self.assertEqual(list(self.string_table), ["a", "bé", ""])
+
+    def test_negative_index_from_the_end(self):
+        """test_negative_index_from_the_end"""
+        self.assertEqual(self.string_table[-2], "bé")
+
+    def test_index_out_of_range_raises_index_error(self):
+        """test_index_out_of_range_raises_index_error"""
+        with self.assertRaises(IndexError):
+            self.string_table[3]
+        with self.assertRaises(IndexError):
+            self.string_table[-4]
+
+
+class TestValueIndex(SimpleTestCase):
+    """Unit tests for the `ValueIndex` class."""
+
+    def setUp(self):
+        """setUp"""
+        offsets, data = snapshot_utils._encode_strings(["a", "b"])
+        self.value_index = snapshot_utils.ValueIndex(
+            snapshot_utils.StringTable(offsets, data), [1, 2]
+        )
+
+    def test_mapping(self):
+        """test_mapping"""
+        self.assertEqual(len(self.value_index), 2)
+        self.assertEqual(dict(self.value_index), {"a": 1, "b": 2})
+
+    def test_unknown_value_raises_key_error(self):
+        """test_unknown_value_raises_key_error"""
+        with self.assertRaises(KeyError):
+            self.value_index["c"]
+        with self.assertRaises(KeyError):
+            self.value_index[1]
@@ -0,0 +1,115 @@
+"""Integration tests for the `core_module_fancy_tree_registry_app.utils.tree` package."""
+
+from django.test import TestCase
+
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+    tree as tree_utils,
+)
+from tests.fixtures.fixtures import RefinementFixtures
+
+
+class TestGetLazyTree(TestCase):
+    """Integration tests for the `get_lazy_tree` function."""
+
+    def setUp(self):
+        """setUp"""
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.categories = self.fixture.categories
+
+    def test_no_selection_returns_top_level(self):
+        """test_no_selection_returns_top_level"""
+        self.assertEqual(
+            tree_utils.get_lazy_tree(self.fixture.refinement.id),
+            [
+                {
+                    "title": "a",
+                    "key": self.categories["a"].id,
+                    "folder": True,
+                    "lazy": True,
+                },
+                {"title": "e", "key": self.categories["e"].id},
+            ],
+        )
+
+    def test_selection_loads_ancestors(self):
+        """test_selection_loads_ancestors"""
+        tree = tree_utils.get_lazy_tree(
+            self.fixture.refinement.id, [self.categories["d"].id]
+        )
+
+        node_a = tree[0]
+        self.assertTrue(node_a["expand"])
+        self.assertNotIn("lazy", node_a)
+        self.assertEqual(
+            [node["title"] for node in node_a["children"]], ["b", "c"]
+        )
+        node_c = node_a["children"][1]
+        self.assertEqual(
+            node_c["children"],
+            [
+                {
+                    "title": "d",
+                    "key": self.categories["d"].id,
+                    "selected": True,
+                    "expand": True,
+                }
+            ],
+        )
+
+    def test_selected_top_level_node_stays_lazy(self):
+        """test_selected_top_level_node_stays_lazy"""
+        tree = tree_utils.get_lazy_tree(
+            self.fixture.refinement.id, [str(self.categories["a"].id)]
+        )
+
+        self.assertTrue(tree[0]["selected"])
+        self.assertTrue(tree[0]["lazy"])
+
+
+class TestGetChildren(TestCase):
+    """Integration tests for the `get_children` function."""
+
+    def setUp(self):
+        """setUp"""
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.categories = self.fixture.categories
+
+    def test_returns_children_without_unspecified(self):
+        """test_returns_children_without_unspecified"""
+        self.assertEqual(
+            tree_utils.get_children(
+                self.fixture.refinement.id, self.categories["a"].id
+            ),
+            [
+                {"title": "b", "key": self.categories["b"].id},
+                {
+                    "title": "c",
+                    "key": self.categories["c"].id,
+                    "folder": True,
+                    "lazy": True,
+                },
+            ],
+        )
+
+    def test_leaf_has_no_children(self):
+        """test_leaf_has_no_children"""
+        self.assertEqual(
+            tree_utils.get_children(
+                self.fixture.refinement.id, self.categories["e"].id
+            ),
+            [],
+        )
+
+    def test_unknown_category_has_no_children(self):
+        """test_unknown_category_has_no_children"""
+        self.assertEqual(
+            tree_utils.get_children(
+                self.fixture.refinement.id, self.categories["e"].id + 100
+            ),
+            [],
+        )
@@ -0,0 +1,106 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.utils.version` package."""
+
+from unittest.mock import patch, MagicMock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core_module_fancy_tree_registry_app.utils import (
+    version as version_utils,
+)
+
+
+class TestRefinementVersion(SimpleTestCase):
+    """Unit tests for the refinement version functions."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+
+    def test_get_refinement_version_is_stable(self):
+        """test_get_refinement_version_is_stable"""
+        self.assertEqual(
+            version_utils.get_refinement_version(1),
+            version_utils.get_refinement_version(1),
+        )
+
+    def test_bump_refinement_version_increments_version(self):
+        """test_bump_refinement_version_increments_version"""
+        version = version_utils.get_refinement_version(1)
+
+        self.assertEqual(version_utils.bump_refinement_version(1), version + 1)
+        self.assertEqual(version_utils.get_refinement_version(1), version + 1)
+
+    def test_bump_refinement_version_initializes_missing_version(self):
+        """test_bump_refinement_version_initializes_missing_version"""
+        self.assertIsInstance(version_utils.bump_refinement_version(1), int)
+
+    def test_versions_are_independent_per_refinement(self):
+        """test_versions_are_independent_per_refinement"""
+        version = version_utils.get_refinement_version(1)
+        version_utils.bump_refinement_version(2)
+
+        self.assertEqual(version_utils.get_refinement_version(1), version)
+
+    def test_evicted_version_is_not_reused(self):
+        """test_evicted_version_is_not_reused"""
+        version = version_utils.bump_refinement_version(1)
+        cache.clear()
+
+        self.assertGreater(version_utils.get_refinement_version(1), version)
+
+
+class TestTemplateVersion(SimpleTestCase):
+    """Unit tests for the template version functions."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+
+    def test_bump_template_version_increments_version(self):
+        """test_bump_template_version_increments_version"""
+        version = version_utils.get_template_version("mock_hash")
+
+        self.assertEqual(
+            version_utils.bump_template_version("mock_hash"), version + 1
+        )
+        self.assertEqual(
+            version_utils.get_template_version("mock_hash"), version + 1
+        )
+
+    def test_template_and_refinement_versions_are_independent(self):
+        """test_template_and_refinement_versions_are_independent"""
+        version = version_utils.get_refinement_version(1)
+        version_utils.bump_template_version(1)
+
+        self.assertEqual(version_utils.get_refinement_version(1), version)
+
+
+class TestRenderVersion(SimpleTestCase):
+    """Unit tests for the `get_render_version` function."""
+
+    def setUp(self):
+        """setUp"""
+        version_utils.get_render_version.cache_clear()
+
+    def tearDown(self):
+        """tearDown"""
+        version_utils.get_render_version.cache_clear()
+
+    def test_render_version_is_stable(self):
+        """test_render_version_is_stable"""
+        version = version_utils.get_render_version()
+        version_utils.get_render_version.cache_clear()
+
+        self.assertEqual(version_utils.get_render_version(), version)
+
+    @patch.object(version_utils, "get_template")
+    def test_render_version_changes_with_templates(self, mock_get_template):
+        """test_render_version_changes_with_templates"""
+        mock_get_template.return_value = MagicMock()
+        mock_get_template.return_value.template.source = "<div></div>"
+        version = version_utils.get_render_version()
+        version_utils.get_render_version.cache_clear()
+        mock_get_template.return_value.template.source = "<span></span>"
+
+        self.assertNotEqual(version_utils.get_render_version(), version)
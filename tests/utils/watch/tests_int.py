@@ -0,0 +1,127 @@
+"""Integration tests for the `core_module_fancy_tree_registry_app.utils.watch` package."""
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+    version as version_utils,
+)
+from tests.fixtures.fixtures import RefinementFixtures
+
+
+class TestCategoryChanged(TestCase):
+    """Integration tests for the category signal handlers."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.refinement_id = self.fixture.refinement.id
+
+    def test_category_save_bumps_refinement_version(self):
+        """test_category_save_bumps_refinement_version"""
+        version = version_utils.get_refinement_version(self.refinement_id)
+        category = self.fixture.categories["b"]
+        category.name = "renamed"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.save()
+
+        self.assertGreater(
+            version_utils.get_refinement_version(self.refinement_id), version
+        )
+
+    def test_category_delete_bumps_refinement_version(self):
+        """test_category_delete_bumps_refinement_version"""
+        version = version_utils.get_refinement_version(self.refinement_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fixture.categories["e"].delete()
+
+        self.assertGreater(
+            version_utils.get_refinement_version(self.refinement_id), version
+        )
+
+    def test_version_is_not_bumped_before_commit(self):
+        """test_version_is_not_bumped_before_commit"""
+        version = version_utils.get_refinement_version(self.refinement_id)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            self.fixture.categories["e"].delete()
+
+        self.assertEqual(
+            version_utils.get_refinement_version(self.refinement_id), version
+        )
+
+    def test_cached_category_tree_is_rebuilt_after_change(self):
+        """test_cached_category_tree_is_rebuilt_after_change"""
+        category_tree_utils.get_category_tree(self.refinement_id)
+        category = self.fixture.categories["b"]
+        category.name = "renamed"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.save()
+        category_tree = category_tree_utils.get_category_tree(
+            self.refinement_id
+        )
+
+        self.assertEqual(
+            category_tree.names[category_tree.get_position(category.id)],
+            "renamed",
+        )
+
+    def test_other_refinements_are_not_bumped(self):
+        """test_other_refinements_are_not_bumped"""
+        version = version_utils.get_refinement_version(self.refinement_id + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fixture.categories["e"].delete()
+
+        self.assertEqual(
+            version_utils.get_refinement_version(self.refinement_id + 1),
+            version,
+        )
+
+
+class TestRefinementChanged(TestCase):
+    """Integration tests for the refinement signal handlers."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.refinement = self.fixture.refinement
+
+    def test_refinement_save_bumps_refinement_and_template_versions(self):
+        """test_refinement_save_bumps_refinement_and_template_versions"""
+        refinement_version = version_utils.get_refinement_version(
+            self.refinement.id
+        )
+        template_version = version_utils.get_template_version("mock_hash")
+        self.refinement.name = "renamed"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.refinement.save()
+
+        self.assertGreater(
+            version_utils.get_refinement_version(self.refinement.id),
+            refinement_version,
+        )
+        self.assertGreater(
+            version_utils.get_template_version("mock_hash"), template_version
+        )
+
+    def test_refinement_delete_bumps_template_version(self):
+        """test_refinement_delete_bumps_template_version"""
+        template_version = version_utils.get_template_version("mock_hash")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.refinement.delete()
+
+        self.assertGreater(
+            version_utils.get_template_version("mock_hash"), template_version
+        )
@@ -0,0 +1,240 @@
+"""Integration tests for the `core_module_fancy_tree_registry_app.views.ajax` package."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core_main_registry_app.components.template import (
+    api as template_registry_api,
+)
+from core_parser_app.tools.modules.views.module import AbstractModule
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+    refinement as refinement_utils,
+    search as search_utils,
+)
+from tests.fixtures.fixtures import RefinementFixtures
+
+
+class TestChildrenView(TestCase):
+    """Integration tests for the `ChildrenView` view."""
+
+    def setUp(self):
+        """setUp"""
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.url = reverse("core_module_fancy_tree_registry_children")
+
+    def test_missing_parameters_returns_bad_request(self):
+        """test_missing_parameters_returns_bad_request"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_returns_children_as_json(self):
+        """test_returns_children_as_json"""
+        response = self.client.get(
+            self.url,
+            {
+                "refinement_id": self.fixture.refinement.id,
+                "category_id": self.fixture.categories["c"].id,
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            [{"title": "d", "key": self.fixture.categories["d"].id}],
+        )
+
+    def test_unknown_refinement_returns_not_found(self):
+        """test_unknown_refinement_returns_not_found"""
+        response = self.client.get(
+            self.url,
+            {
+                "refinement_id": self.fixture.refinement.id + 1,
+                "category_id": self.fixture.categories["c"].id,
+            },
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("message", json.loads(response.content))
+
+
+class TestSearchView(TestCase):
+    """Integration tests for the `SearchView` view."""
+
+    def setUp(self):
+        """setUp"""
+        category_tree_utils.category_tree_cache.clear()
+        search_utils.search_index_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.url = reverse("core_module_fancy_tree_registry_search")
+
+    def test_missing_refinement_id_returns_bad_request(self):
+        """test_missing_refinement_id_returns_bad_request"""
+        response = self.client.get(self.url, {"query": "d"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_limit_returns_bad_request(self):
+        """test_invalid_limit_returns_bad_request"""
+        response = self.client.get(
+            self.url,
+            {
+                "refinement_id": self.fixture.refinement.id,
+                "query": "d",
+                "limit": "all",
+            },
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_refinement_returns_not_found(self):
+        """test_unknown_refinement_returns_not_found"""
+        response = self.client.get(
+            self.url,
+            {"refinement_id": self.fixture.refinement.id + 1, "query": "d"},
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("message", json.loads(response.content))
+
+    def test_returns_matches_with_ancestors(self):
+        """test_returns_matches_with_ancestors"""
+        categories = self.fixture.categories
+
+        response = self.client.get(
+            self.url,
+            {"refinement_id": self.fixture.refinement.id, "query": "d"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            [
+                {
+                    "title": "d",
+                    "key": categories["d"].id,
+                    "ancestors": [
+                        {"title": "a", "key": categories["a"].id},
+                        {"title": "c", "key": categories["c"].id},
+                    ],
+                }
+            ],
+        )
+
+    def test_unspecified_categories_are_not_returned(self):
+        """test_unspecified_categories_are_not_returned"""
+        response = self.client.get(
+            self.url,
+            {"refinement_id": self.fixture.refinement.id, "query": "unspec"},
+        )
+
+        self.assertEqual(json.loads(response.content), [])
+
+    def test_second_search_does_not_query(self):
+        """test_second_search_does_not_query"""
+        query = {"refinement_id": self.fixture.refinement.id, "query": "a"}
+        self.client.get(self.url, query)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url, query)
+
+
+@patch.object(AbstractModule, "render_template", MagicMock(return_value=""))
+class TestBatchRenderView(TestCase):
+    """Integration tests for the `BatchRenderView` view."""
+
+    def setUp(self):
+        """setUp"""
+        refinement_utils.clear_refinement_map()
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.url = reverse("core_module_fancy_tree_registry_batch")
+
+    def _post(self, body):
+        return self.client.post(
+            self.url, json.dumps(body), content_type="application/json"
+        )
+
+    def test_invalid_body_returns_bad_request(self):
+        """test_invalid_body_returns_bad_request"""
+        for body in ({}, {"modules": "mock"}, {"modules": [{"data": ""}]}):
+            with self.subTest(body=body):
+                self.assertEqual(self._post(body).status_code, 400)
+
+    @patch.object(template_registry_api, "get_current_registry_template")
+    def test_returns_html_or_error_of_each_module(self, mock_get_template):
+        """test_returns_html_or_error_of_each_module"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+
+        response = self._post(
+            {
+                "modules": [
+                    {
+                        "xml_xpath": "/ns:Resource/ns:role/ns:type",
+                        "data": "<role><type>a:b</type></role>",
+                    },
+                    {"xml_xpath": "/ns:Resource/ns:role/ns:unknown"},
+                    {
+                        "xml_xpath": "/ns:Resource/ns:role/ns:type",
+                        "data": "<role><type>unknown</type></role>",
+                    },
+                ]
+            }
+        )
+
+        self.assertEqual(response.status_code, 200)
+        modules = json.loads(response.content)["modules"]
+        self.assertEqual(
+            [module["xml_xpath"] for module in modules],
+            [
+                "/ns:Resource/ns:role/ns:type",
+                "/ns:Resource/ns:role/ns:unknown",
+                "/ns:Resource/ns:role/ns:type",
+            ],
+        )
+        self.assertEqual(modules[0]["html"], "")
+        self.assertIn("No refinement found", modules[1]["error"])
+        self.assertIn("unknown", modules[2]["error"])
+
+    @patch.object(template_registry_api, "get_current_registry_template")
+    def test_template_is_looked_up_once(self, mock_get_template):
+        """test_template_is_looked_up_once"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+
+        self._post(
+            {
+                "modules": [
+                    {"xml_xpath": "/ns:Resource/ns:role/ns:type"},
+                    {"xml_xpath": "/ns:Resource/ns:role/ns:type"},
+                ]
+            }
+        )
+
+        mock_get_template.assert_called_once()
+
+    @patch.object(template_registry_api, "get_current_registry_template")
+    def test_template_error_is_reported_for_each_module(
+        self, mock_get_template
+    ):
+        """test_template_error_is_reported_for_each_module"""
+        mock_get_template.side_effect = Exception("mock_template_error")
+
+        response = self._post(
+            {
+                "modules": [
+                    {"xml_xpath": "/ns:Resource/ns:role/ns:type"},
+                    {"xml_xpath": "/ns:Resource/ns:role/ns:type"},
+                ]
+            }
+        )
+
+        for module in json.loads(response.content)["modules"]:
+            self.assertIn("mock_template_error", module["error"])
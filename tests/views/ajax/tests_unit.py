@@ -0,0 +1,89 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.views.ajax` package."""
+
+import json
+import threading
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from django.test import RequestFactory
+
+from core_module_fancy_tree_registry_app.views import ajax as module_ajax
+from core_parser_app.tools.modules.exceptions import ModuleError
+
+
+class TestRenderBatchModule(TestCase):
+    """Unit tests for the `render_batch_module` function."""
+
+    @patch.object(module_ajax, "FancyTreeModule")
+    def test_returns_module_html(self, mock_fancy_tree_module):
+        """test_returns_module_html"""
+        mock_module = mock_fancy_tree_module.return_value
+        mock_module.render_element.return_value = "mock_html"
+        mock_request = MagicMock()
+        mock_template = MagicMock()
+
+        result = module_ajax.render_batch_module(
+            mock_request,
+            mock_template,
+            {"xml_xpath": "mock_xpath", "data": "mock_data"},
+        )
+
+        self.assertEqual(
+            result, {"xml_xpath": "mock_xpath", "html": "mock_html"}
+        )
+        self.assertEqual(mock_module.data, "mock_data")
+        mock_module.render_element.assert_called_with(
+            mock_request, "mock_xpath", mock_template
+        )
+
+    @patch.object(module_ajax, "FancyTreeModule")
+    def test_module_error_returns_error_message(self, mock_fancy_tree_module):
+        """test_module_error_returns_error_message"""
+        mock_fancy_tree_module.return_value.render_element.side_effect = (
+            ModuleError("mock_error")
+        )
+
+        result = module_ajax.render_batch_module(
+            MagicMock(), MagicMock(), {"xml_xpath": "mock_xpath"}
+        )
+
+        self.assertEqual(
+            result, {"xml_xpath": "mock_xpath", "error": "mock_error"}
+        )
+
+
+class TestBatchRenderViewWorkers(TestCase):
+    """Unit tests for the threaded rendering of `BatchRenderView`."""
+
+    @patch.object(module_ajax, "FANCY_TREE_BATCH_WORKERS", 4)
+    @patch.object(module_ajax, "template_registry_api")
+    @patch.object(module_ajax, "render_batch_module")
+    def test_modules_are_rendered_in_threads_in_order(
+        self, mock_render_batch_module, mock_template_registry_api
+    ):
+        """test_modules_are_rendered_in_threads_in_order"""
+        threads = set()
+
+        def render(request, template, module):
+            threads.add(threading.get_ident())
+            return {"xml_xpath": module["xml_xpath"], "html": ""}
+
+        mock_render_batch_module.side_effect = render
+        modules = [{"xml_xpath": f"mock_xpath_{index}"} for index in range(8)]
+        request = RequestFactory().post(
+            "/module-fancy-tree-registry-batch",
+            json.dumps({"modules": modules}),
+            content_type="application/json",
+        )
+
+        response = module_ajax.BatchRenderView.as_view()(request)
+
+        self.assertEqual(
+            [
+                module["xml_xpath"]
+                for module in json.loads(response.content)["modules"]
+            ],
+            [module["xml_xpath"] for module in modules],
+        )
+        self.assertNotIn(threading.get_ident(), threads)
+        mock_template_registry_api.get_current_registry_template.assert_called_once()
@@ -0,0 +1,167 @@
+"""Integration tests for the `core_module_fancy_tree_registry_app.views.forms` package."""
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.constants import (
+    CATEGORY_SUFFIX,
+    UNSPECIFIED_LABEL,
+)
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+)
+from core_module_fancy_tree_registry_app.views import forms as forms_module
+from core_module_fancy_tree_registry_app.views.forms import RefinementForm
+from tests.benchmarks.fixtures import create_refinement
+
+
+class TestRefinementFormRender(TestCase):
+    """Integration tests for the rendering of `RefinementForm`."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        self.refinement = Refinement.objects.create(
+            name="Type", xsd_name="type", template_hash="mock_hash"
+        )
+        self.parent = Category.objects.create(
+            name="a",
+            path="Resource.role.type",
+            value=f"a{CATEGORY_SUFFIX}",
+            parent=None,
+            refinement=self.refinement,
+        )
+        Category.objects.create(
+            name="unspecified a",
+            path="Resource.role.type",
+            value="a",
+            parent=self.parent,
+            refinement=self.refinement,
+        )
+        self.child = Category.objects.create(
+            name="b",
+            path="Resource.role.type",
+            value="a:b",
+            parent=self.parent,
+            refinement=self.refinement,
+        )
+
+    def _render(self, selection):
+        return str(
+            RefinementForm(
+                refinement=self.refinement,
+                field_id="field",
+                data={"refinement-field": selection},
+            )
+        )
+
+    def test_rendered_tree_is_cached(self):
+        """test_rendered_tree_is_cached"""
+        self._render([])
+
+        # the selection is validated against the cached category tree
+        with self.assertNumQueries(0):
+            self._render([str(self.child.id)])
+
+    def test_selection_is_layered_on_cached_tree(self):
+        """test_selection_is_layered_on_cached_tree"""
+        self._render([])
+        rendering = self._render([str(self.child.id)])
+
+        self.assertNotIn('"selected"', rendering)
+        self.assertIn(
+            f'(fancytree_data_id_refinement_field, ["{self.child.id}"]',
+            rendering,
+        )
+
+    @patch.object(forms_module, "FANCY_TREE_VIRTUAL_RENDERING", True)
+    def test_virtual_rendering_tracks_selection_without_checkboxes(self):
+        """test_virtual_rendering_tracks_selection_without_checkboxes"""
+        rendering = self._render([str(self.child.id)])
+
+        self.assertNotIn('type="checkbox"', rendering)
+        self.assertIn('id="id_refinement-field_values"', rendering)
+        self.assertIn(
+            f'(fancytree_data_id_refinement_field, ["{self.child.id}"]',
+            rendering,
+        )
+
+
+class TestRefinementFormValidation(TestCase):
+    """Integration tests for the validation of `RefinementForm`."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        category_tree_utils.category_tree_cache.clear()
+        self.refinement = Refinement.objects.create(
+            name="Type", xsd_name="type", template_hash="mock_hash"
+        )
+        self.parent = Category.objects.create(
+            name="a",
+            path="Resource.role.type",
+            value=f"a{CATEGORY_SUFFIX}",
+            parent=None,
+            refinement=self.refinement,
+        )
+        self.unspecified = Category.objects.create(
+            name="unspecified a",
+            path="Resource.role.type",
+            value="a",
+            parent=self.parent,
+            refinement=self.refinement,
+        )
+
+    def _is_valid(self, selection):
+        return RefinementForm(
+            refinement=self.refinement,
+            field_id="field",
+            data={"refinement-field": selection},
+        ).is_valid()
+
+    def test_selectable_category_is_valid(self):
+        """test_selectable_category_is_valid"""
+        self.assertTrue(self._is_valid([str(self.parent.id)]))
+
+    def test_unspecified_category_is_invalid(self):
+        """test_unspecified_category_is_invalid"""
+        self.assertFalse(self._is_valid([str(self.unspecified.id)]))
+
+    def test_unknown_category_is_invalid(self):
+        """test_unknown_category_is_invalid"""
+        self.assertFalse(self._is_valid(["999999", "x"]))
+
+
+class TestRefinementFormQueryCount(TestCase):
+    """Integration tests for the number of queries of `RefinementForm`."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        category_tree_utils.category_tree_cache.clear()
+        self.refinement = create_refinement(10000)
+        self.selection = [
+            str(category_id)
+            for category_id in Category.objects.filter(
+                refinement=self.refinement
+            )
+            .exclude(name__startswith=UNSPECIFIED_LABEL)
+            .values_list("id", flat=True)[:100]
+        ]
+
+    @override_settings(DEBUG=False)
+    def test_categories_evaluated_once_for_validation_and_rendering(self):
+        """test_categories_evaluated_once_for_validation_and_rendering"""
+        with self.assertNumQueries(1):
+            form = RefinementForm(
+                refinement=self.refinement,
+                field_id="field",
+                data={"refinement-field": self.selection},
+            )
+            self.assertTrue(form.is_valid())
+            str(form)
@@ -0,0 +1,68 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.views.forms` package."""
+
+from unittest.mock import MagicMock, patch
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase
+
+from core_module_fancy_tree_registry_app.views import forms as forms_module
+from core_module_fancy_tree_registry_app.views.forms import (
+    CategoryMultipleChoiceField,
+)
+from core_module_fancy_tree_registry_app.views.widgets import (
+    CachedFancyTreeWidget,
+    LazyFancyTreeWidget,
+    VirtualFancyTreeWidget,
+)
+
+
+class TestCategoryMultipleChoiceFieldCheckValues(SimpleTestCase):
+    """Unit tests for the `_check_values` method of
+    `CategoryMultipleChoiceField`."""
+
+    def test_value_not_iterable_raises_invalid_list(self):
+        """test_value_not_iterable_raises_invalid_list"""
+        field = CategoryMultipleChoiceField(1, queryset=MagicMock())
+
+        with self.assertRaises(ValidationError) as context:
+            field._check_values(42)
+
+        self.assertEqual(context.exception.code, "invalid_list")
+
+    @patch.object(forms_module.category_tree_utils, "get_category_tree")
+    def test_unselectable_value_raises_invalid_choice(
+        self, mock_get_category_tree
+    ):
+        """test_unselectable_value_raises_invalid_choice"""
+        mock_get_category_tree.return_value.get_unselectable_ids.return_value = [
+            "2"
+        ]
+        field = CategoryMultipleChoiceField(1, queryset=MagicMock())
+
+        with self.assertRaises(ValidationError) as context:
+            field._check_values(["1", "2"])
+
+        self.assertEqual(context.exception.code, "invalid_choice")
+        mock_get_category_tree.assert_called_once_with(1)
+
+
+class TestGetWidgetClass(SimpleTestCase):
+    """Unit tests for the `_get_widget_class` function."""
+
+    @patch.object(forms_module, "FANCY_TREE_VIRTUAL_RENDERING", True)
+    @patch.object(forms_module, "FANCY_TREE_LAZY_LOADING", True)
+    def test_lazy_loading_first(self):
+        """test_lazy_loading_first"""
+        self.assertIs(forms_module._get_widget_class(), LazyFancyTreeWidget)
+
+    @patch.object(forms_module, "FANCY_TREE_VIRTUAL_RENDERING", True)
+    @patch.object(forms_module, "FANCY_TREE_LAZY_LOADING", False)
+    def test_virtual_rendering(self):
+        """test_virtual_rendering"""
+        self.assertIs(forms_module._get_widget_class(), VirtualFancyTreeWidget)
+
+    @patch.object(forms_module, "FANCY_TREE_VIRTUAL_RENDERING", False)
+    @patch.object(forms_module, "FANCY_TREE_LAZY_LOADING", False)
+    def test_cached_widget_by_default(self):
+        """test_cached_widget_by_default"""
+        self.assertIs(forms_module._get_widget_class(), CachedFancyTreeWidget)
@@ -0,0 +1,884 @@
+"""Integration tests for the `core_module_fancy_tree_registry_app.views.views` package."""
+
+import gzip
+import json
+from unittest.mock import patch, MagicMock
+
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+
+from core_main_registry_app.components.template import (
+    api as template_registry_api,
+)
+from core_parser_app.components.data_structure_element import (
+    api as data_structure_element_api,
+)
+from core_parser_app.tools.modules.exceptions import ModuleError
+from core_parser_app.tools.modules.views.module import AbstractModule
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+    refinement as refinement_utils,
+    version as version_utils,
+)
+from core_module_fancy_tree_registry_app.views.views import (
+    AsyncFancyTreeModule,
+    FancyTreeModule,
+)
+from tests.fixtures.fixtures import RefinementFixtures
+
+XML_XPATH = "/ns:Resource/ns:role/ns:type"
+
+
+class TestFancyTreeModulePostSequence(TestCase):
+    """Integration tests for successive saves of the `FancyTreeModule`
+    selection, as sent by the coalescing client."""
+
+    def setUp(self):
+        """setUp"""
+        refinement_utils.clear_refinement_map()
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.categories = self.fixture.categories
+        self.module_element = MagicMock()
+        self.module_element.options = {
+            "xpath": {"xml": XML_XPATH},
+            "data": "",
+        }
+        get_template_patcher = patch.object(
+            template_registry_api,
+            "get_current_registry_template",
+            return_value=MagicMock(hash="mock_hash"),
+        )
+        get_template_patcher.start()
+        self.addCleanup(get_template_patcher.stop)
+
+    def _post(self, post_data):
+        request = RequestFactory().post(
+            "/module-fancy-tree-registry",
+            dict(post_data, module_id="mock_module_id"),
+        )
+        response = FancyTreeModule.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+
+    def _ids(self, *names):
+        return [str(self.categories[name].id) for name in names]
+
+    @patch.object(
+        AbstractModule, "render_template", MagicMock(return_value="")
+    )
+    @patch.object(data_structure_element_api, "upsert")
+    @patch.object(data_structure_element_api, "get_by_id")
+    def test_stored_data_matches_last_coalesced_delta(
+        self, mock_get_by_id, mock_upsert
+    ):
+        """test_stored_data_matches_last_coalesced_delta"""
+        mock_get_by_id.return_value = self.module_element
+
+        self._post({"added[]": self._ids("b", "d")})
+        # changes made while the first request was in flight
+        self._post(
+            {"added[]": self._ids("e", "a"), "removed[]": self._ids("b")}
+        )
+
+        self.assertEqual(
+            self.module_element.options["data"],
+            "<role><type>a:c:d</type></role>"
+            "<role><type>e</type></role>"
+            "<role><type>a</type></role>",
+        )
+
+    @patch.object(
+        AbstractModule, "render_template", MagicMock(return_value="")
+    )
+    @patch.object(data_structure_element_api, "upsert")
+    @patch.object(data_structure_element_api, "get_by_id")
+    def test_module_element_is_loaded_once_per_delta(
+        self, mock_get_by_id, mock_upsert
+    ):
+        """test_module_element_is_loaded_once_per_delta"""
+        mock_get_by_id.return_value = self.module_element
+
+        self._post({"added[]": self._ids("b")})
+
+        mock_get_by_id.assert_called_once()
+        mock_upsert.assert_called_once()
+        self.assertEqual(
+            self.module_element.options["data"],
+            "<role><type>a:b</type></role>",
+        )
+
+    @patch.object(
+        AbstractModule, "render_template", MagicMock(return_value="")
+    )
+    @patch.object(data_structure_element_api, "upsert")
+    @patch.object(data_structure_element_api, "get_by_id")
+    def test_stored_data_matches_last_full_list(
+        self, mock_get_by_id, mock_upsert
+    ):
+        """test_stored_data_matches_last_full_list"""
+        mock_get_by_id.return_value = self.module_element
+
+        self._post({"added[]": self._ids("b", "d")})
+        self._post({"data[]": self._ids("e", "b")})
+
+        self.assertEqual(
+            self.module_element.options["data"],
+            "<role><type>e</type></role><role><type>a:b</type></role>",
+        )
+
+    @patch.object(
+        AbstractModule, "render_template", MagicMock(return_value="")
+    )
+    @patch.object(data_structure_element_api, "upsert")
+    @patch.object(data_structure_element_api, "get_by_id")
+    def test_deselect_after_select_leaves_data_empty(
+        self, mock_get_by_id, mock_upsert
+    ):
+        """test_deselect_after_select_leaves_data_empty"""
+        mock_get_by_id.return_value = self.module_element
+
+        self._post({"added[]": self._ids("d")})
+        self._post({"removed[]": self._ids("d")})
+
+        self.assertEqual(self.module_element.options["data"], "")
+
+    @patch.object(
+        AbstractModule, "render_template", MagicMock(return_value="")
+    )
+    @patch.object(data_structure_element_api, "upsert")
+    @patch.object(data_structure_element_api, "get_by_id")
+    def test_module_refinement_validates_categories_without_queries(
+        self, mock_get_by_id, mock_upsert
+    ):
+        """test_module_refinement_validates_categories_without_queries"""
+        mock_get_by_id.return_value = self.module_element
+        self._post({"added[]": self._ids("b")})
+
+        with self.assertNumQueries(0):
+            self._post({"added[]": self._ids("d")})
+        with self.assertRaises(ModuleError):
+            self._post({"added[]": self._ids("unspecified a")})
+
+    @patch.object(
+        AbstractModule, "render_template", MagicMock(return_value="")
+    )
+    @patch.object(data_structure_element_api, "upsert")
+    @patch.object(data_structure_element_api, "get_by_id")
+    def test_posted_refinement_id_is_ignored(
+        self, mock_get_by_id, mock_upsert
+    ):
+        """test_posted_refinement_id_is_ignored"""
+        mock_get_by_id.return_value = self.module_element
+
+        self._post(
+            {
+                "added[]": self._ids("b", "d"),
+                "refinement_id": str(self.fixture.refinement.id + 1),
+            }
+        )
+
+        self.assertEqual(
+            self.module_element.options["data"],
+            "<role><type>a:b</type></role><role><type>a:c:d</type></role>",
+        )
+
+
+@patch.object(
+    template_registry_api,
+    "get_current_registry_template",
+    MagicMock(return_value=MagicMock(hash="mock_hash")),
+)
+class TestFancyTreeModuleInstrumentation(TestCase):
+    """Integration tests for the instrumentation of `FancyTreeModule`."""
+
+    def setUp(self):
+        """setUp"""
+        refinement_utils.clear_refinement_map()
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.categories = self.fixture.categories
+        self.module_element = MagicMock(
+            options={"xpath": {"xml": XML_XPATH}, "data": ""}
+        )
+
+    @patch(
+        "core_module_fancy_tree_registry_app.views.views.FANCY_TREE_INSTRUMENTATION",
+        True,
+    )
+    @patch.object(
+        AbstractModule, "render_template", MagicMock(return_value="")
+    )
+    @patch.object(data_structure_element_api, "upsert")
+    @patch.object(data_structure_element_api, "get_by_id")
+    def test_post_response_has_server_timing_header(
+        self, mock_get_by_id, mock_upsert
+    ):
+        """test_post_response_has_server_timing_header"""
+        mock_get_by_id.return_value = self.module_element
+        request = RequestFactory().post(
+            "/module-fancy-tree-registry",
+            {
+                "data[]": [str(self.categories["b"].id)],
+                "module_id": "mock_module_id",
+            },
+        )
+
+        response = FancyTreeModule.as_view()(request)
+
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^refinement;dur=[0-9.]+;desc="1 queries", '
+            r'categories;dur=[0-9.]+;desc="1 queries"$',
+        )
+
+    @patch.object(
+        AbstractModule, "render_template", MagicMock(return_value="")
+    )
+    @patch.object(data_structure_element_api, "upsert")
+    @patch.object(data_structure_element_api, "get_by_id")
+    def test_instrumentation_is_disabled_by_default(
+        self, mock_get_by_id, mock_upsert
+    ):
+        """test_instrumentation_is_disabled_by_default"""
+        mock_get_by_id.return_value = self.module_element
+        request = RequestFactory().post(
+            "/module-fancy-tree-registry",
+            {
+                "data[]": [str(self.categories["b"].id)],
+                "module_id": "mock_module_id",
+            },
+        )
+
+        response = FancyTreeModule.as_view()(request)
+
+        self.assertFalse(response.has_header("Server-Timing"))
+
+
+@patch.object(AbstractModule, "render_template", MagicMock(return_value=""))
+@patch.object(data_structure_element_api, "upsert")
+@patch.object(data_structure_element_api, "get_by_id")
+@patch.object(template_registry_api, "get_current_registry_template")
+class TestFancyTreeModuleConditionalGet(TestCase):
+    """Integration tests for the conditional GET of `FancyTreeModule`."""
+
+    def setUp(self):
+        """setUp"""
+        refinement_utils.clear_refinement_map()
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.query = {
+            "xml_xpath": XML_XPATH,
+            "module_id": "mock_module_id",
+            "url": "mock_url",
+            "data": "<role><type>a:b</type></role>",
+        }
+
+    def _get(self, **headers):
+        request = RequestFactory().get(
+            "/module-fancy-tree-registry", self.query, **headers
+        )
+        return FancyTreeModule.as_view()(request)
+
+    def test_unchanged_module_returns_not_modified_without_query(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_unchanged_module_returns_not_modified_without_query"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = MagicMock(options={"data": ""})
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        mock_upsert.reset_mock()
+
+        with self.assertNumQueries(0):
+            response = self._get(HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, 304)
+        mock_upsert.assert_not_called()
+
+    def test_not_modified_restores_stored_data_for_next_delta(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_not_modified_restores_stored_data_for_next_delta"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        module_element = MagicMock(
+            options={"xpath": {"xml": XML_XPATH}, "data": ""}
+        )
+        mock_get_by_id.return_value = module_element
+        etag = self._get()["ETag"]
+        # data stored meanwhile, e.g. by another draft of the form
+        module_element.options["data"] = "<role><type>e</type></role>"
+
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        FancyTreeModule.as_view()(
+            RequestFactory().post(
+                "/module-fancy-tree-registry",
+                {
+                    "added[]": [str(self.fixture.categories["d"].id)],
+                    "module_id": "mock_module_id",
+                },
+            )
+        )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(
+            module_element.options["data"],
+            "<role><type>a:b</type></role><role><type>a:c:d</type></role>",
+        )
+
+    def test_changed_data_renders_module(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_changed_data_renders_module"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        etag = self._get()["ETag"]
+        self.query["data"] = "<role><type>e</type></role>"
+
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_bumped_refinement_version_renders_module(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_bumped_refinement_version_renders_module"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        etag = self._get()["ETag"]
+        version_utils.bump_refinement_version(self.fixture.refinement.id)
+
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+
+@patch.object(AbstractModule, "render_template", MagicMock(return_value=""))
+@patch.object(data_structure_element_api, "upsert")
+@patch.object(data_structure_element_api, "get_by_id")
+@patch.object(template_registry_api, "get_current_registry_template")
+class TestFancyTreeModuleRenderPost(TestCase):
+    """Integration tests for the rendering of `FancyTreeModule` with a POST
+    request."""
+
+    def setUp(self):
+        """setUp"""
+        refinement_utils.clear_refinement_map()
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.categories = self.fixture.categories
+        self.module_element = MagicMock()
+        self.module_element.options = {
+            "xpath": {"xml": XML_XPATH},
+            "data": "",
+        }
+        self.parameters = {
+            "xml_xpath": XML_XPATH,
+            "module_id": "mock_module_id",
+            "url": "mock_url",
+            "data": "<role><type>a:b</type></role><role><type>e</type></role>",
+        }
+
+    def _render(self, request):
+        with patch.object(
+            FancyTreeModule, "_render_form", return_value=""
+        ) as mock_render_form:
+            response = FancyTreeModule.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        return response, mock_render_form.call_args.args[2]
+
+    def _post(self, body, **headers):
+        return RequestFactory().post(
+            "/module-fancy-tree-registry",
+            body,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    def test_gzip_post_reloads_same_data_as_get(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_gzip_post_reloads_same_data_as_get"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+        _, get_reload_data = self._render(
+            RequestFactory().get(
+                "/module-fancy-tree-registry", self.parameters
+            )
+        )
+        self.module_element.options = {"data": ""}
+
+        response, post_reload_data = self._render(
+            self._post(
+                gzip.compress(json.dumps(self.parameters).encode()),
+                content_encoding="gzip",
+            )
+        )
+
+        field_id, _ = refinement_utils.parse_xml_xpath(
+            self.parameters["xml_xpath"]
+        )
+        self.assertEqual(
+            post_reload_data,
+            {
+                f"refinement-{field_id}": [
+                    self.categories["b"].id,
+                    self.categories["e"].id,
+                ]
+            },
+        )
+        self.assertEqual(post_reload_data, get_reload_data)
+        self.assertEqual(
+            self.module_element.options["data"], self.parameters["data"]
+        )
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_post_without_url_uses_module_element_url(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_post_without_url_uses_module_element_url"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+        self.module_element.options = {"data": "", "url": "mock_url"}
+        del self.parameters["url"]
+
+        self._render(self._post(json.dumps(self.parameters)))
+
+        self.assertEqual(
+            AbstractModule.render_template.call_args.args[1]["url"],
+            "mock_url",
+        )
+
+    def test_invalid_body_returns_bad_request(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_invalid_body_returns_bad_request"""
+        response = FancyTreeModule.as_view()(
+            self._post(json.dumps(self.parameters), content_encoding="gzip")
+        )
+
+        self.assertEqual(response.status_code, 400)
+        mock_upsert.assert_not_called()
+
+    def test_form_post_without_module_id_returns_bad_request(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_form_post_without_module_id_returns_bad_request"""
+        response = FancyTreeModule.as_view()(
+            RequestFactory().post(
+                "/module-fancy-tree-registry",
+                {"data[]": [str(self.categories["b"].id)]},
+            )
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(
+            json.loads(response.content),
+            {"error": 'No "module_id" parameter provided'},
+        )
+        mock_get_by_id.assert_not_called()
+        mock_upsert.assert_not_called()
+
+    def test_form_post_saves_data(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_form_post_saves_data"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+
+        response = FancyTreeModule.as_view()(
+            RequestFactory().post(
+                "/module-fancy-tree-registry",
+                {
+                    "data[]": [str(self.categories["b"].id)],
+                    "module_id": "mock_module_id",
+                },
+            )
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.module_element.options["data"],
+            "<role><type>a:b</type></role>",
+        )
+
+
+@patch.object(AbstractModule, "render_template", MagicMock(return_value=""))
+@patch.object(data_structure_element_api, "upsert")
+@patch.object(data_structure_element_api, "get_by_id")
+@patch.object(template_registry_api, "get_current_registry_template")
+class TestAsyncFancyTreeModule(TestCase):
+    """Integration tests for the `AsyncFancyTreeModule` view."""
+
+    def setUp(self):
+        """setUp"""
+        refinement_utils.clear_refinement_map()
+        category_tree_utils.category_tree_cache.clear()
+        self.fixture = RefinementFixtures()
+        self.fixture.insert_data()
+        self.categories = self.fixture.categories
+        self.module_element = MagicMock()
+        self.module_element.options = {
+            "xpath": {"xml": XML_XPATH},
+            "data": "",
+        }
+        self.query = {
+            "xml_xpath": XML_XPATH,
+            "module_id": "mock_module_id",
+            "url": "mock_url",
+            "data": "<role><type>a:b</type></role>",
+        }
+
+    def _ids(self, *names):
+        return [str(self.categories[name].id) for name in names]
+
+    async def test_get_renders_module_with_reload_data(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_get_renders_module_with_reload_data"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+
+        with patch.object(
+            FancyTreeModule, "_render_form", return_value=""
+        ) as mock_render_form:
+            response = await AsyncFancyTreeModule.as_view()(
+                AsyncRequestFactory().get(
+                    "/module-fancy-tree-registry", self.query
+                )
+            )
+
+        self.assertEqual(response.status_code, 200)
+        field_id, _ = refinement_utils.parse_xml_xpath(self.query["xml_xpath"])
+        self.assertEqual(
+            mock_render_form.call_args.args[2],
+            {f"refinement-{field_id}": [self.categories["b"].id]},
+        )
+        self.assertEqual(
+            self.module_element.options["data"], self.query["data"]
+        )
+
+    async def test_get_without_data_renders_empty_form(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_get_without_data_renders_empty_form"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+        self.query["data"] = ""
+
+        with patch.object(
+            FancyTreeModule, "_render_form", return_value=""
+        ) as mock_render_form:
+            response = await AsyncFancyTreeModule.as_view()(
+                AsyncRequestFactory().get(
+                    "/module-fancy-tree-registry", self.query
+                )
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_render_form.call_args.args[2], {})
+
+    async def test_gzip_post_renders_module_with_reload_data(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_gzip_post_renders_module_with_reload_data"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+
+        with patch.object(
+            FancyTreeModule, "_render_form", return_value=""
+        ) as mock_render_form:
+            response = await AsyncFancyTreeModule.as_view()(
+                AsyncRequestFactory().post(
+                    "/module-fancy-tree-registry",
+                    gzip.compress(json.dumps(self.query).encode()),
+                    content_type="application/json",
+                    headers={"Content-Encoding": "gzip"},
+                )
+            )
+
+        self.assertEqual(response.status_code, 200)
+        field_id, _ = refinement_utils.parse_xml_xpath(self.query["xml_xpath"])
+        self.assertEqual(
+            mock_render_form.call_args.args[2],
+            {f"refinement-{field_id}": [self.categories["b"].id]},
+        )
+        self.assertEqual(
+            self.module_element.options["data"], self.query["data"]
+        )
+
+    async def test_get_unchanged_module_returns_not_modified(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_get_unchanged_module_returns_not_modified"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+        view = AsyncFancyTreeModule.as_view()
+        response = await view(
+            AsyncRequestFactory().get(
+                "/module-fancy-tree-registry", self.query
+            )
+        )
+
+        response = await view(
+            AsyncRequestFactory().get(
+                "/module-fancy-tree-registry",
+                self.query,
+                headers={"If-None-Match": response["ETag"]},
+            )
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    async def test_get_not_modified_restores_stored_data(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_get_not_modified_restores_stored_data"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+        view = AsyncFancyTreeModule.as_view()
+        response = await view(
+            AsyncRequestFactory().get(
+                "/module-fancy-tree-registry", self.query
+            )
+        )
+        self.module_element.options["data"] = ""
+
+        response = await view(
+            AsyncRequestFactory().get(
+                "/module-fancy-tree-registry",
+                self.query,
+                headers={"If-None-Match": response["ETag"]},
+            )
+        )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(
+            self.module_element.options["data"], self.query["data"]
+        )
+
+    async def test_post_sequence_stores_same_data_as_sync_view(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_post_sequence_stores_same_data_as_sync_view"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+        view = AsyncFancyTreeModule.as_view()
+
+        for post_data in (
+            {"added[]": self._ids("b", "d")},
+            {"added[]": self._ids("e", "a"), "removed[]": self._ids("b")},
+        ):
+            response = await view(
+                AsyncRequestFactory().post(
+                    "/module-fancy-tree-registry",
+                    dict(post_data, module_id="mock_module_id"),
+                )
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            self.module_element.options["data"],
+            "<role><type>a:c:d</type></role>"
+            "<role><type>e</type></role>"
+            "<role><type>a</type></role>",
+        )
+
+    async def _post(self, post_data):
+        response = await AsyncFancyTreeModule.as_view()(
+            AsyncRequestFactory().post(
+                "/module-fancy-tree-registry",
+                dict(post_data, module_id="mock_module_id"),
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+
+    async def test_post_data_list_stores_data(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_post_data_list_stores_data"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+
+        await self._post({"data[]": self._ids("e", "b")})
+
+        self.assertEqual(
+            self.module_element.options["data"],
+            "<role><type>e</type></role><role><type>a:b</type></role>",
+        )
+        mock_upsert.assert_called_once()
+
+    async def test_post_removed_list_removes_data(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_post_removed_list_removes_data"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+        self.module_element.options["data"] = (
+            "<role><type>a:b</type></role><role><type>e</type></role>"
+        )
+
+        await self._post({"removed[]": self._ids("b")})
+
+        self.assertEqual(
+            self.module_element.options["data"],
+            "<role><type>e</type></role>",
+        )
+
+    async def test_post_without_data_stores_empty_data(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_post_without_data_stores_empty_data"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+        self.module_element.options["data"] = "<role><type>e</type></role>"
+
+        await self._post({})
+
+        self.assertEqual(self.module_element.options["data"], "")
+
+    async def test_post_validates_categories_against_module_refinement(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_post_validates_categories_against_module_refinement"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+
+        await self._post(
+            {
+                "added[]": self._ids("b"),
+                "refinement_id": str(self.fixture.refinement.id + 1),
+            }
+        )
+        with self.assertRaises(ModuleError):
+            await self._post({"added[]": self._ids("unspecified a")})
+
+        self.assertEqual(
+            self.module_element.options["data"],
+            "<role><type>a:b</type></role>",
+        )
+        mock_upsert.assert_called_once()
+
+    async def test_post_unknown_element_raises_module_error(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_post_unknown_element_raises_module_error"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        self.module_element.options["xpath"]["xml"] = "/ns:Resource/ns:name"
+        mock_get_by_id.return_value = self.module_element
+
+        with self.assertRaises(ModuleError):
+            await self._post({"added[]": self._ids("b")})
+
+        mock_upsert.assert_not_called()
+
+    async def test_post_module_element_error_raises_module_error(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_post_module_element_error_raises_module_error"""
+        mock_get_by_id.side_effect = Exception("mock error")
+
+        with self.assertRaises(ModuleError):
+            await self._post({"added[]": self._ids("b")})
+
+    async def test_post_without_module_id_returns_bad_request(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_post_without_module_id_returns_bad_request"""
+        response = await AsyncFancyTreeModule.as_view()(
+            AsyncRequestFactory().post(
+                "/module-fancy-tree-registry", {"added[]": self._ids("b")}
+            )
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(
+            json.loads(response.content),
+            {"error": 'No "module_id" parameter provided'},
+        )
+        mock_get_by_id.assert_not_called()
+
+    async def test_invalid_render_body_returns_bad_request(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_invalid_render_body_returns_bad_request"""
+        response = await AsyncFancyTreeModule.as_view()(
+            AsyncRequestFactory().post(
+                "/module-fancy-tree-registry",
+                json.dumps(self.query),
+                content_type="application/json",
+                headers={"Content-Encoding": "gzip"},
+            )
+        )
+
+        self.assertEqual(response.status_code, 400)
+        mock_upsert.assert_not_called()
+
+    async def test_get_without_url_uses_module_element_url(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_get_without_url_uses_module_element_url"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        self.module_element.options["url"] = "mock_element_url"
+        mock_get_by_id.return_value = self.module_element
+        del self.query["url"]
+
+        response = await AsyncFancyTreeModule.as_view()(
+            AsyncRequestFactory().get(
+                "/module-fancy-tree-registry", self.query
+            )
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            AbstractModule.render_template.call_args.args[1]["url"],
+            "mock_element_url",
+        )
+
+    async def test_get_without_xml_xpath_raises_module_error(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_get_without_xml_xpath_raises_module_error"""
+        mock_get_by_id.return_value = self.module_element
+        del self.query["xml_xpath"]
+
+        with self.assertRaises(ModuleError):
+            await AsyncFancyTreeModule.as_view()(
+                AsyncRequestFactory().get(
+                    "/module-fancy-tree-registry", self.query
+                )
+            )
+
+        mock_get_template.assert_not_called()
+
+    async def test_get_unknown_element_raises_module_error(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_get_unknown_element_raises_module_error"""
+        mock_get_template.return_value = MagicMock(hash="mock_hash")
+        mock_get_by_id.return_value = self.module_element
+        self.query["xml_xpath"] = "/ns:Resource/ns:name"
+
+        with self.assertRaises(ModuleError):
+            await AsyncFancyTreeModule.as_view()(
+                AsyncRequestFactory().get(
+                    "/module-fancy-tree-registry", self.query
+                )
+            )
+
+        mock_upsert.assert_not_called()
+
+    def test_view_called_from_sync_code_returns_response(
+        self, mock_get_template, mock_get_by_id, mock_upsert
+    ):
+        """test_view_called_from_sync_code_returns_response"""
+        response = AsyncFancyTreeModule.as_view()(
+            RequestFactory().get(
+                "/module-fancy-tree-registry", {"managing_occurrences": ""}
+            )
+        )
+
+        self.assertEqual(response.content, b"true")
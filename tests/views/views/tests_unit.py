@@ -1,17 +1,25 @@
 """Unit tests for the `core_module_fancy_tree_registry_app.views.views` package."""
 
+import gzip
+import json
 from unittest import TestCase
-from unittest.mock import patch, MagicMock, call, Mock
+from unittest.mock import patch, MagicMock, Mock
 
-from core_main_registry_app.constants import (
-    UNSPECIFIED_LABEL,
-    CATEGORY_SUFFIX,
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory
+
+from core_module_fancy_tree_registry_app.utils import (
+    category_tree as category_tree_utils,
+)
+from core_module_fancy_tree_registry_app.utils.category_tree import (
+    CategoryTree,
 )
 from core_module_fancy_tree_registry_app.views import (
     views as module_fancy_tree_views,
 )
 from core_module_fancy_tree_registry_app.views.forms import RefinementForm
 from core_parser_app.tools.modules.exceptions import ModuleError
+from tests.utils.category_tree.tests_unit import CATEGORIES
 
 
 class TestFancyTreeModuleInit(TestCase):
@@ -53,145 +61,57 @@ class TestFancyTreeModuleReloadData(TestCase):
             self.mock_module._reload_data(**self.mock_kwargs), {}
         )
 
-    @patch.object(module_fancy_tree_views, "category_api")
-    @patch.object(module_fancy_tree_views, "XSDTree")
-    def test_get_all_filtered_by_refinement_id_called(
-        self, mock_xsd_tree, mock_category_api
+    @patch.object(module_fancy_tree_views, "category_utils")
+    @patch.object(module_fancy_tree_views, "data_utils")
+    def test_get_value_index_called(
+        self, mock_data_utils, mock_category_utils
     ):
-        """test_get_all_filtered_by_refinement_id_called"""
+        """test_get_value_index_called"""
         self.mock_module._reload_data(**self.mock_kwargs)
-        mock_category_api.get_all_filtered_by_refinement_id.assert_called_with(
+        mock_category_utils.get_value_index.assert_called_with(
             self.mock_kwargs["refinement"].id
         )
 
-    @patch.object(module_fancy_tree_views, "category_api")
-    @patch.object(module_fancy_tree_views, "XSDTree")
-    def test_xsd_tree_from_string_called(
-        self, mock_xsd_tree, mock_category_api
+    @patch.object(module_fancy_tree_views, "category_utils")
+    @patch.object(module_fancy_tree_views, "data_utils")
+    def test_iter_data_elements_called(
+        self, mock_data_utils, mock_category_utils
     ):
-        """test_xsd_tree_from_string_called"""
+        """test_iter_data_elements_called"""
         self.mock_module._reload_data(**self.mock_kwargs)
-        mock_xsd_tree.fromstring.assert_called_with(
-            f"<root>{self.mock_module.data}</root>"
+        mock_data_utils.iter_data_elements.assert_called_with(
+            self.mock_module.data
         )
 
-    @patch.object(module_fancy_tree_views, "category_api")
-    @patch.object(module_fancy_tree_views, "XSDTree")
-    def test_categories_get_called(self, mock_xsd_tree, mock_category_api):
-        """test_categories_get_called"""
-        mock_category = MagicMock()
-        mock_category.slug = "mock_category_name"
-        mock_categories = MagicMock()
-        mock_categories.get.return_value = mock_category
-        mock_category_api.get_all_filtered_by_refinement_id.return_value = (
-            mock_categories
-        )
-
-        mock_xsd_element = MagicMock()
-        mock_xsd_tree.fromstring.return_value = [[mock_xsd_element]]
-
-        self.mock_module._reload_data(**self.mock_kwargs)
-        mock_categories.get.assert_called_with(value=mock_xsd_element.text)
-
-    @patch.object(module_fancy_tree_views, "category_api")
-    @patch.object(module_fancy_tree_views, "XSDTree")
-    def test_categories_get_not_called_if_item_is_empty(
-        self, mock_xsd_tree, mock_category_api
+    @patch.object(module_fancy_tree_views, "category_utils")
+    @patch.object(module_fancy_tree_views, "data_utils")
+    def test_unknown_value_raises_module_error(
+        self, mock_data_utils, mock_category_utils
     ):
-        """test_categories_get_not_called_if_item_is_empty"""
-        mock_categories = MagicMock()
-        mock_category_api.get_all_filtered_by_refinement_id.return_value = (
-            mock_categories
-        )
-
-        mock_xsd_tree.fromstring.return_value = [[]]
-
-        self.mock_module._reload_data(**self.mock_kwargs)
-        mock_categories.get.assert_not_called()
-
-    @patch.object(module_fancy_tree_views, "category_api")
-    @patch.object(module_fancy_tree_views, "XSDTree")
-    def test_categories_get_has_multiple_calls_if_unspecified(
-        self, mock_xsd_tree, mock_category_api
-    ):
-        """test_categories_get_has_multiple_calls_if_unspecified"""
-        mock_category = MagicMock()
-        mock_category.slug = f"{UNSPECIFIED_LABEL}_label"
-
-        mock_categories = MagicMock()
-        mock_categories.get.return_value = mock_category
-        mock_category_api.get_all_filtered_by_refinement_id.return_value = (
-            mock_categories
-        )
-
-        mock_xsd_element = MagicMock()
-        mock_xsd_tree.fromstring.return_value = [[mock_xsd_element]]
-
-        self.mock_module._reload_data(**self.mock_kwargs)
-
-        mock_categories.get.assert_has_calls(
-            [
-                call(value=mock_xsd_element.text),
-                call(value=f"{mock_xsd_element.text}{CATEGORY_SUFFIX}"),
-            ]
-        )
-
-    @patch.object(module_fancy_tree_views, "category_api")
-    @patch.object(module_fancy_tree_views, "XSDTree")
-    def test_categories_get_exception_raises_module_error(
-        self, mock_xsd_tree, mock_category_api
-    ):
-        """test_categories_get_exception_raises_module_error"""
-        mock_categories = MagicMock()
-        mock_categories.get.side_effect = Exception(
-            "mock_categories_get_exception"
-        )
-        mock_category_api.get_all_filtered_by_refinement_id.return_value = (
-            mock_categories
-        )
-
-        mock_xsd_element = MagicMock()
-        mock_xsd_tree.fromstring.return_value = [[mock_xsd_element]]
+        """test_unknown_value_raises_module_error"""
+        mock_category_utils.get_value_index.return_value = {}
+        mock_data_utils.iter_data_elements.return_value = [
+            ("mock_parent", "mock_child", "mock_value")
+        ]
 
         with self.assertRaises(ModuleError):
             self.mock_module._reload_data(**self.mock_kwargs)
 
-    @patch.object(module_fancy_tree_views, "category_api")
-    @patch.object(module_fancy_tree_views, "XSDTree")
-    def test_returns_data_dict(self, mock_xsd_tree, mock_category_api):
+    @patch.object(module_fancy_tree_views, "category_utils")
+    @patch.object(module_fancy_tree_views, "data_utils")
+    def test_returns_data_dict(self, mock_data_utils, mock_category_utils):
         """test_returns_data_dict"""
-        mock_category_specified = MagicMock()
-        mock_category_specified_id = 1
-        mock_category_specified.id = mock_category_specified_id
-        mock_category_specified.slug = "mock_specified_category"
-        mock_category_unspecified = MagicMock()
-        mock_category_unspecified_id = 2
-        mock_category_unspecified.id = mock_category_unspecified_id
-        mock_category_unspecified.slug = f"{UNSPECIFIED_LABEL}_label"
-
-        mock_categories = MagicMock()
-        mock_categories.get.side_effect = [
-            mock_category_specified,
-            mock_category_unspecified,
-            mock_category_unspecified,
-        ]
-        mock_category_api.get_all_filtered_by_refinement_id.return_value = (
-            mock_categories
-        )
-
-        mock_xsd_element_1 = MagicMock()
-        mock_xsd_element_2 = MagicMock()
-        mock_xsd_tree.fromstring.return_value = [
-            [mock_xsd_element_1],
-            [],
-            [mock_xsd_element_2],
+        mock_category_utils.get_value_index.return_value = {
+            "mock_specified_value": 1,
+            "mock_unspecified_value": 2,
+        }
+        mock_data_utils.iter_data_elements.return_value = [
+            ("mock_parent", "mock_child", "mock_specified_value"),
+            ("mock_parent", "mock_child", "mock_unspecified_value"),
         ]
 
         expected_result = {
-            f"{RefinementForm.prefix}-{self.mock_kwargs['field_id']}": [
-                mock_category_specified_id,
-                mock_category_unspecified_id,
-            ]
+            f"{RefinementForm.prefix}-{self.mock_kwargs['field_id']}": [1, 2]
         }
         result = self.mock_module._reload_data(**self.mock_kwargs)
 
@@ -222,12 +142,35 @@ class TestFancyTreeModuleRenderModule(TestCase):
         with self.assertRaises(ModuleError):
             self.mock_module._render_module(**self.mock_kwargs)
 
-    @patch.object(module_fancy_tree_views, "re")
+    @patch.object(module_fancy_tree_views, "refinement_utils")
+    @patch.object(module_fancy_tree_views, "template_registry_api")
+    def test_parse_xml_xpath_called(
+        self, mock_template_registry_api, mock_refinement_utils
+    ):
+        """test_parse_xml_xpath_called"""
+        mock_refinement_utils.parse_xml_xpath.return_value = (
+            MagicMock(),
+            MagicMock(),
+        )
+
+        with self.assertRaises(ModuleError):
+            self.mock_module._render_module(**self.mock_kwargs)
+
+        mock_refinement_utils.parse_xml_xpath.assert_called_with(
+            self.mock_kwargs["request"].GET.get.return_value
+        )
+
+    @patch.object(module_fancy_tree_views, "refinement_utils")
     @patch.object(module_fancy_tree_views, "template_registry_api")
     def test_get_current_registry_template_called(
-        self, mock_template_registry_api, mock_re
+        self, mock_template_registry_api, mock_refinement_utils
     ):
         """test_get_current_registry_template_called"""
+        mock_refinement_utils.parse_xml_xpath.return_value = (
+            MagicMock(),
+            MagicMock(),
+        )
+
         with self.assertRaises(ModuleError):
             self.mock_module._render_module(**self.mock_kwargs)
 
@@ -235,12 +178,16 @@ class TestFancyTreeModuleRenderModule(TestCase):
             request=self.mock_kwargs["request"]
         )
 
-    @patch.object(module_fancy_tree_views, "re")
+    @patch.object(module_fancy_tree_views, "refinement_utils")
     @patch.object(module_fancy_tree_views, "template_registry_api")
     def test_get_current_registry_template_exception_raises_module_error(
-        self, mock_template_registry_api, mock_re
+        self, mock_template_registry_api, mock_refinement_utils
     ):
         """test_get_current_registry_template_exception_raises_module_error"""
+        mock_refinement_utils.parse_xml_xpath.return_value = (
+            MagicMock(),
+            MagicMock(),
+        )
         mock_template_registry_api.get_current_registry_template.side_effect = Exception(
             "mock_get_current_registry_template_exception"
         )
@@ -248,13 +195,17 @@ class TestFancyTreeModuleRenderModule(TestCase):
         with self.assertRaises(ModuleError):
             self.mock_module._render_module(**self.mock_kwargs)
 
-    @patch.object(module_fancy_tree_views, "re")
+    @patch.object(module_fancy_tree_views, "refinement_utils")
     @patch.object(module_fancy_tree_views, "template_registry_api")
-    @patch.object(module_fancy_tree_views, "refinement_api")
-    def test_get_all_filtered_by_template_hash_called(
-        self, mock_refinement_api, mock_template_registry_api, mock_re
+    def test_get_by_xsd_name_called(
+        self, mock_template_registry_api, mock_refinement_utils
     ):
-        """test_get_all_filtered_by_template_hash_called"""
+        """test_get_by_xsd_name_called"""
+        xml_element = "mock_xml_xpath"
+        mock_refinement_utils.parse_xml_xpath.return_value = (
+            MagicMock(),
+            xml_element,
+        )
         mock_template = MagicMock()
         mock_template_registry_api.get_current_registry_template.return_value = (
             mock_template
@@ -263,73 +214,29 @@ class TestFancyTreeModuleRenderModule(TestCase):
         with self.assertRaises(ModuleError):
             self.mock_module._render_module(**self.mock_kwargs)
 
-        mock_refinement_api.get_all_filtered_by_template_hash.assert_called_with(
-            mock_template.hash
-        )
-
-    @patch.object(module_fancy_tree_views, "re")
-    @patch.object(module_fancy_tree_views, "template_registry_api")
-    @patch.object(module_fancy_tree_views, "refinement_api")
-    def test_get_all_filtered_by_template_hash_exception_raises_module_error(
-        self, mock_refinement_api, mock_template_registry_api, mock_re
-    ):
-        """test_get_all_filtered_by_template_hash_exception_raises_module_error"""
-        mock_refinement_api.get_all_filtered_by_template_hash.side_effect = (
-            Exception("get_all_filtered_by_template_hash")
-        )
-
-        with self.assertRaises(ModuleError):
-            self.mock_module._render_module(**self.mock_kwargs)
-
-    @patch.object(module_fancy_tree_views, "re")
-    @patch.object(module_fancy_tree_views, "template_registry_api")
-    @patch.object(module_fancy_tree_views, "refinement_api")
-    def test_refinements_get_called(
-        self, mock_refinement_api, mock_template_registry_api, mock_re
-    ):
-        """test_refinements_get_called"""
-        xml_element_namespace = "mock_namespace"
-        xml_element = "mock_xml_xpath"
-        self.mock_kwargs["request"].GET.get.return_value = (
-            f"{xml_element_namespace}:{xml_element}"
-        )
-
-        mock_refinement_query_set = MagicMock()
-        mock_refinement_api.get_all_filtered_by_template_hash.return_value = (
-            mock_refinement_query_set
+        mock_refinement_utils.get_by_xsd_name.assert_called_with(
+            mock_template.hash, xml_element
         )
 
-        with self.assertRaises(ModuleError):
-            self.mock_module._render_module(**self.mock_kwargs)
-
-        mock_refinement_query_set.get.assert_called_with(xsd_name=xml_element)
-
-    @patch.object(module_fancy_tree_views, "re")
+    @patch.object(module_fancy_tree_views, "refinement_utils")
     @patch.object(module_fancy_tree_views, "template_registry_api")
-    @patch.object(module_fancy_tree_views, "refinement_api")
-    def test_refinements_get_exception_raises_module_error(
-        self, mock_refinement_api, mock_template_registry_api, mock_re
+    def test_get_by_xsd_name_exception_raises_module_error(
+        self, mock_template_registry_api, mock_refinement_utils
     ):
-        """test_refinements_get_exception_raises_module_error"""
-        """test_refinements_get_called"""
-        xml_element = "mock_xml_xpath"
-        self.mock_kwargs["request"].GET.get.return_value = xml_element
-
-        mock_refinement_query_set = MagicMock()
-        mock_refinement_api.get_all_filtered_by_template_hash.return_value = (
-            mock_refinement_query_set
+        """test_get_by_xsd_name_exception_raises_module_error"""
+        mock_refinement_utils.parse_xml_xpath.return_value = (
+            MagicMock(),
+            MagicMock(),
         )
-
-        mock_refinement_query_set.get.side_effect = Exception(
-            "mock_refinement_query_set_get_exception"
+        mock_refinement_utils.get_by_xsd_name.side_effect = Exception(
+            "mock_get_by_xsd_name_exception"
         )
 
         with self.assertRaises(ModuleError):
             self.mock_module._render_module(**self.mock_kwargs)
 
-    @patch.object(module_fancy_tree_views, "re")
+    @patch.object(module_fancy_tree_views, "refinement_utils")
     @patch.object(module_fancy_tree_views, "template_registry_api")
-    @patch.object(module_fancy_tree_views, "refinement_api")
     @patch.object(module_fancy_tree_views, "AbstractModule")
     @patch.object(module_fancy_tree_views, "RefinementForm")
     @patch.object(module_fancy_tree_views.FancyTreeModule, "_reload_data")
@@ -338,21 +245,18 @@ class TestFancyTreeModuleRenderModule(TestCase):
         mock_reload_data,
         mock_refinement_form,
         mock_abstract_module,
-        mock_refinement_api,
         mock_template_registry_api,
-        mock_re,
+        mock_refinement_utils,
     ):
         """test_abstract_module_render_template_called"""
         mock_field_id = MagicMock()
-        mock_re.sub.return_value = mock_field_id
-
-        mock_refinement_query_set = MagicMock()
-        mock_refinement_api.get_all_filtered_by_template_hash.return_value = (
-            mock_refinement_query_set
+        mock_refinement_utils.parse_xml_xpath.return_value = (
+            mock_field_id,
+            MagicMock(),
         )
 
         mock_refinement = MagicMock()
-        mock_refinement_query_set.get.return_value = mock_refinement
+        mock_refinement_utils.get_by_xsd_name.return_value = mock_refinement
 
         mock_data = MagicMock()
         mock_reload_data.return_value = mock_data
@@ -370,12 +274,14 @@ class TestFancyTreeModuleRenderModule(TestCase):
 
         mock_abstract_module.render_template.assert_called_with(
             "core_module_fancy_tree_registry_app/fancy_tree.html",
-            {"form": mock_refinement_form_object},
+            {
+                "form": mock_refinement_form_object,
+                "save_delay": module_fancy_tree_views.FANCY_TREE_SAVE_DELAY,
+            },
         )
 
-    @patch.object(module_fancy_tree_views, "re")
+    @patch.object(module_fancy_tree_views, "refinement_utils")
     @patch.object(module_fancy_tree_views, "template_registry_api")
-    @patch.object(module_fancy_tree_views, "refinement_api")
     @patch.object(module_fancy_tree_views, "AbstractModule")
     @patch.object(module_fancy_tree_views, "RefinementForm")
     @patch.object(module_fancy_tree_views.FancyTreeModule, "_reload_data")
@@ -384,28 +290,14 @@ class TestFancyTreeModuleRenderModule(TestCase):
         mock_reload_data,
         mock_refinement_form,
         mock_abstract_module,
-        mock_refinement_api,
         mock_template_registry_api,
-        mock_re,
+        mock_refinement_utils,
     ):
         """test_abstract_module_render_template_exception_raises_module_error"""
-        mock_field_id = MagicMock()
-        mock_re.sub.return_value = mock_field_id
-
-        mock_refinement_query_set = MagicMock()
-        mock_refinement_api.get_all_filtered_by_template_hash.return_value = (
-            mock_refinement_query_set
+        mock_refinement_utils.parse_xml_xpath.return_value = (
+            MagicMock(),
+            MagicMock(),
         )
-
-        mock_refinement = MagicMock()
-        mock_refinement_query_set.get.return_value = mock_refinement
-
-        mock_data = MagicMock()
-        mock_reload_data.return_value = mock_data
-
-        mock_refinement_form_object = MagicMock()
-        mock_refinement_form.return_value = mock_refinement_form_object
-
         mock_abstract_module.render_template.side_effect = Exception(
             "mock_abstract_module_render_module_exception"
         )
@@ -413,9 +305,8 @@ class TestFancyTreeModuleRenderModule(TestCase):
         with self.assertRaises(ModuleError):
             self.mock_module._render_module(**self.mock_kwargs)
 
-    @patch.object(module_fancy_tree_views, "re")
+    @patch.object(module_fancy_tree_views, "refinement_utils")
     @patch.object(module_fancy_tree_views, "template_registry_api")
-    @patch.object(module_fancy_tree_views, "refinement_api")
     @patch.object(module_fancy_tree_views, "AbstractModule")
     @patch.object(module_fancy_tree_views, "RefinementForm")
     @patch.object(module_fancy_tree_views.FancyTreeModule, "_reload_data")
@@ -424,11 +315,14 @@ class TestFancyTreeModuleRenderModule(TestCase):
         mock_reload_data,
         mock_refinement_form,
         mock_abstract_module,
-        mock_refinement_api,
         mock_template_registry_api,
-        mock_re,
+        mock_refinement_utils,
     ):
         """test_returns_abstract_module_render_template"""
+        mock_refinement_utils.parse_xml_xpath.return_value = (
+            MagicMock(),
+            MagicMock(),
+        )
         mock_module_template_rendering = MagicMock()
         mock_abstract_module.render_template.return_value = (
             mock_module_template_rendering
@@ -450,6 +344,7 @@ class TestFancyTreeModuleRetrieveDataGet(TestCase):
 
         self.mock_kwargs = {"request": self.mock_request}
         self.mock_module = module_fancy_tree_views.FancyTreeModule()
+        category_tree_utils.category_tree_cache.clear()
 
     def test_no_data_in_request_returns_empty_string(self):
         """test_no_data_in_request_returns_empty_string"""
@@ -469,191 +364,264 @@ class TestFancyTreeModuleRetrieveDataGet(TestCase):
         )
 
 
-class TestFancyTreeModuleRetrieveDataPost(TestCase):
-    """Unit tests for the `_retrieve_data` method of `FancyTreeModule` class. These
-    tests only cover POST requests."""
+class RetrieveDataPostTestCase(TestCase):
+    """Base class of the unit tests of the `_retrieve_data` method of
+    `FancyTreeModule` class for POST requests. The categories are read from
+    the category tree of the refinement of the module."""
+
+    categories = CATEGORIES
 
     def setUp(self):
         """setUp"""
         self.mock_request = MagicMock()
         self.mock_request.method = "POST"
-
-        self.mock_kwargs = {"request": self.mock_request}
         self.mock_module = module_fancy_tree_views.FancyTreeModule()
+        self.mock_refinement = MagicMock(id=1)
+
+        patcher = patch.object(
+            module_fancy_tree_views.FancyTreeModule,
+            "_get_module_refinement",
+            return_value=("mock_field_id", self.mock_refinement, MagicMock()),
+        )
+        self.mock_get_module_refinement = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch.object(
+            module_fancy_tree_views.category_tree_utils,
+            "get_category_tree",
+            return_value=CategoryTree(self.categories),
+        )
+        self.mock_get_category_tree = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _set_post(self, post_data, existing_data=""):
+        self.mock_request.POST = QueryDict(mutable=True)
+        self.mock_request.POST["module_id"] = "mock_module_id"
+        for key, values in post_data.items():
+            self.mock_request.POST.setlist(key, values)
+
+        mock_module_element = MagicMock()
+        mock_module_element.options = {
+            "xpath": {"xml": "mock_xml_xpath"},
+            "data": existing_data,
+        }
+        return mock_module_element
 
-    @patch.object(module_fancy_tree_views, "RefinementForm")
-    def test_refinement_form_called(self, mock_refinement_form):
-        """test_refinement_form_called"""
-        self.mock_module._retrieve_data(**self.mock_kwargs)
-
-        mock_refinement_form.assert_called_with(
-            self.mock_kwargs["request"].POST
-        )
-
-    @patch.object(module_fancy_tree_views, "RefinementForm")
-    def test_form_is_valid_called(self, mock_refinement_form):
-        """test_form_is_valid_called"""
-        mock_form = MagicMock()
-        mock_refinement_form.return_value = mock_form
-
-        self.mock_module._retrieve_data(**self.mock_kwargs)
 
-        mock_form.is_valid.assert_called()
+class TestFancyTreeModuleRetrieveDataPost(RetrieveDataPostTestCase):
+    """Unit tests for the `_retrieve_data` method of `FancyTreeModule` class. These
+    tests only cover POST requests."""
 
-    @patch.object(module_fancy_tree_views, "RefinementForm")
-    def test_form_not_valid_raises_module_error(self, mock_refinement_form):
-        """test_form_not_valid_raises_module_error"""
-        mock_form = MagicMock()
-        mock_refinement_form.return_value = mock_form
+    def test_refinement_of_module_is_used(self):
+        """test_refinement_of_module_is_used"""
+        mock_module_element = self._set_post(
+            {"data[]": ["7"], "refinement_id": ["42"]}
+        )
 
-        mock_form.is_valid.return_value = False
+        self.mock_module._retrieve_data(self.mock_request, mock_module_element)
 
-        with self.assertRaises(ModuleError):
-            self.mock_module._retrieve_data(**self.mock_kwargs)
+        self.mock_get_module_refinement.assert_called_with(
+            self.mock_request, "mock_xml_xpath"
+        )
+        # the refinement posted by the client is ignored
+        self.mock_get_category_tree.assert_called_with(1)
 
-    @patch.object(module_fancy_tree_views, "RefinementForm")
-    def test_no_data_in_request_returns_empty_string(
-        self, mock_refinement_form
+    @patch.object(module_fancy_tree_views, "data_structure_element_api")
+    def test_module_element_is_loaded_if_not_provided(
+        self, mock_data_structure_element_api
     ):
-        """test_no_data_in_request_returns_empty_string"""
-        mock_form = MagicMock()
-        mock_refinement_form.return_value = mock_form
-        mock_form.is_valid.return_value = True
+        """test_module_element_is_loaded_if_not_provided"""
+        mock_data_structure_element_api.get_by_id.return_value = (
+            self._set_post({"data[]": ["7"]})
+        )
 
         self.assertEqual(
-            self.mock_module._retrieve_data(**self.mock_kwargs), ""
+            self.mock_module._retrieve_data(self.mock_request),
+            "<role><type>e</type></role>",
+        )
+        mock_data_structure_element_api.get_by_id.assert_called_with(
+            "mock_module_id", self.mock_request
         )
 
-    @patch.object(module_fancy_tree_views, "RefinementForm")
-    def test_request_getlist_called(self, mock_refinement_form):
-        """test_request_getlist_called"""
-
-        class MockPostData(Mock):
-            def __contains__(self, item):
-                return True
+    @patch.object(module_fancy_tree_views, "data_structure_element_api")
+    def test_module_element_exception_raises_module_error(
+        self, mock_data_structure_element_api
+    ):
+        """test_module_element_exception_raises_module_error"""
+        self._set_post({"data[]": ["7"]})
+        mock_data_structure_element_api.get_by_id.side_effect = Exception(
+            "mock_get_by_id_exception"
+        )
 
-        self.mock_kwargs["request"].POST = MockPostData()
-        self.mock_kwargs["request"].POST.getlist.return_value = []
+        with self.assertRaises(ModuleError):
+            self.mock_module._retrieve_data(self.mock_request)
 
-        mock_form = MagicMock()
-        mock_refinement_form.return_value = mock_form
-        mock_form.is_valid.return_value = True
+    def test_refinement_exception_raises_module_error(self):
+        """test_refinement_exception_raises_module_error"""
+        mock_module_element = self._set_post({"data[]": ["7"]})
+        self.mock_get_module_refinement.side_effect = Exception(
+            "mock_get_module_refinement_exception"
+        )
 
-        self.mock_module._retrieve_data(**self.mock_kwargs)
+        with self.assertRaises(ModuleError):
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            )
 
-        self.mock_kwargs["request"].POST.getlist.assert_called_with("data[]")
+        self.mock_get_category_tree.assert_not_called()
 
-    @patch.object(module_fancy_tree_views, "RefinementForm")
-    def test_request_getlist_exception_raises_module_error(
-        self, mock_refinement_form
-    ):
-        """test_request_getlist_exception_raises_module_error"""
+    def test_no_data_in_request_returns_empty_string(self):
+        """test_no_data_in_request_returns_empty_string"""
+        mock_module_element = self._set_post({})
 
-        class MockPostData(Mock):
-            def __contains__(self, item):
-                return True
+        self.assertEqual(
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            ),
+            "",
+        )
 
-        self.mock_kwargs["request"].POST = MockPostData()
-        self.mock_kwargs["request"].POST.getlist.side_effect = Exception(
+    def test_request_getlist_exception_raises_module_error(self):
+        """test_request_getlist_exception_raises_module_error"""
+        mock_module_element = self._set_post({})
+        self.mock_request.POST = MagicMock()
+        self.mock_request.POST.getlist.side_effect = Exception(
             "mock_post_get_list_exception"
         )
 
-        mock_form = MagicMock()
-        mock_refinement_form.return_value = mock_form
-        mock_form.is_valid.return_value = True
-
         with self.assertRaises(ModuleError):
-            self.mock_module._retrieve_data(**self.mock_kwargs)
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            )
 
-    @patch.object(module_fancy_tree_views, "RefinementForm")
-    @patch.object(module_fancy_tree_views, "category_api")
-    def test_category_api_get_by_id_called(
-        self, mock_category_api, mock_refinement_form
-    ):
-        """test_category_api_get_by_id_called"""
+    def test_elements_are_read_from_category_tree(self):
+        """test_elements_are_read_from_category_tree"""
+        mock_module_element = self._set_post({"data[]": ["6", "7"]})
 
-        class MockPostData(Mock):
-            def __contains__(self, item):
-                return True
+        self.assertEqual(
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            ),
+            "<content><subject>a:c:d</subject></content>"
+            "<role><type>e</type></role>",
+        )
 
-        self.mock_kwargs["request"].POST = MockPostData()
-        mock_category_id = MagicMock()
-        self.mock_kwargs["request"].POST.getlist.return_value = [
-            mock_category_id
-        ]
+    def test_values_are_escaped(self):
+        """test_values_are_escaped"""
+        self.mock_get_category_tree.return_value = CategoryTree(
+            [(1, "a", "a & b", "a", "Resource.role.type", None)]
+        )
+        mock_module_element = self._set_post({"data[]": ["1"]})
 
-        mock_form = MagicMock()
-        mock_refinement_form.return_value = mock_form
-        mock_form.is_valid.return_value = True
+        self.assertEqual(
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            ),
+            "<role><type>a &amp; b</type></role>",
+        )
 
-        self.mock_module._retrieve_data(**self.mock_kwargs)
+    def test_unselectable_category_is_rejected(self):
+        """test_unselectable_category_is_rejected"""
+        # category 2 is an unspecified category
+        mock_module_element = self._set_post(
+            {"added[]": ["3"], "removed[]": ["2"]},
+            "<role><type>a:b</type></role>",
+        )
 
-        mock_category_api.get_by_id.assert_called_with(mock_category_id)
+        with self.assertRaises(ModuleError):
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            )
 
-    @patch.object(module_fancy_tree_views, "RefinementForm")
-    @patch.object(module_fancy_tree_views, "category_api")
-    def test_category_api_get_by_id_exception_raises_module_error(
-        self, mock_category_api, mock_refinement_form
-    ):
-        """test_category_api_get_by_id_exception_raises_module_error"""
+    def test_unknown_categories_are_listed_in_error(self):
+        """test_unknown_categories_are_listed_in_error"""
+        mock_module_element = self._set_post(
+            {"data[]": ["6", "99999", "88888"]}
+        )
 
-        class MockPostData(Mock):
-            def __contains__(self, item):
-                return True
+        with self.assertRaises(ModuleError) as context:
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            )
+
+        self.assertIn("99999, 88888", str(context.exception))
 
-        self.mock_kwargs["request"].POST = MockPostData()
-        mock_category_id = MagicMock()
-        self.mock_kwargs["request"].POST.getlist.return_value = [
-            mock_category_id
-        ]
 
-        mock_form = MagicMock()
-        mock_refinement_form.return_value = mock_form
-        mock_form.is_valid.return_value = True
+class TestFancyTreeModuleRetrieveDataPostDelta(RetrieveDataPostTestCase):
+    """Unit tests for the `_retrieve_data` method of `FancyTreeModule` class. These
+    tests only cover POST requests sending added and removed categories."""
+
+    categories = [
+        (1, "b", "a:b", "b", "Resource.role.type", None),
+        (2, "c", "a:c", "c", "Resource.role.type", None),
+        (3, "e", "e", "e", "Resource.role.type", None),
+    ]
 
-        mock_category_api.get_by_id.side_effect = Exception(
-            "mock_category_get_by_id_exception"
+    def test_added_category_is_appended(self):
+        """test_added_category_is_appended"""
+        mock_module_element = self._set_post(
+            {"added[]": ["2"]}, "<role><type>a:b</type></role>"
         )
 
-        with self.assertRaises(ModuleError):
-            self.mock_module._retrieve_data(**self.mock_kwargs)
+        self.assertEqual(
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            ),
+            "<role><type>a:b</type></role><role><type>a:c</type></role>",
+        )
 
-    @patch.object(module_fancy_tree_views, "RefinementForm")
-    @patch.object(module_fancy_tree_views, "category_api")
-    def test_succesful_execution_returns_data(
-        self, mock_category_api, mock_refinement_form
-    ):
-        """test_succesful_execution_returns_data"""
-        self.maxDiff = None
+    def test_removed_category_is_removed(self):
+        """test_removed_category_is_removed"""
+        mock_module_element = self._set_post(
+            {"removed[]": ["1"]},
+            "<role><type>a:b</type></role><role><type>e</type></role>",
+        )
 
-        class MockPostData(Mock):
-            def __contains__(self, item):
-                return True
+        self.assertEqual(
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            ),
+            "<role><type>e</type></role>",
+        )
 
-        self.mock_kwargs["request"].POST = MockPostData()
-        mock_category_id = MagicMock()
-        self.mock_kwargs["request"].POST.getlist.return_value = [
-            mock_category_id
-        ]
+    def test_already_selected_category_is_not_duplicated(self):
+        """test_already_selected_category_is_not_duplicated"""
+        mock_module_element = self._set_post(
+            {"added[]": ["1"]}, "<role><type>a:b</type></role>"
+        )
 
-        mock_form = MagicMock()
-        mock_refinement_form.return_value = mock_form
-        mock_form.is_valid.return_value = True
+        self.assertEqual(
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            ),
+            "<role><type>a:b</type></role>",
+        )
 
-        mock_category = MagicMock()
-        category_path_1 = MagicMock()
-        category_path_2 = MagicMock()
-        mock_category.path.split.return_value = [
-            category_path_1,
-            category_path_2,
-        ]
-        mock_category_api.get_by_id.return_value = mock_category
+    def test_delta_applied_to_empty_data(self):
+        """test_delta_applied_to_empty_data"""
+        mock_module_element = self._set_post(
+            {"added[]": ["3"], "removed[]": ["1"]}
+        )
 
-        expected_results = f"<{category_path_1}><{category_path_2}>{mock_category.value.__getitem__()}</{category_path_2}></{category_path_1}>"
+        self.assertEqual(
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            ),
+            "<role><type>e</type></role>",
+        )
+
+    def test_full_list_takes_precedence_over_delta(self):
+        """test_full_list_takes_precedence_over_delta"""
+        mock_module_element = self._set_post(
+            {"data[]": ["3"], "added[]": ["1"]},
+            "<role><type>a:c</type></role>",
+        )
 
         self.assertEqual(
-            self.mock_module._retrieve_data(**self.mock_kwargs),
-            expected_results,
+            self.mock_module._retrieve_data(
+                self.mock_request, mock_module_element
+            ),
+            "<role><type>e</type></role>",
         )
 
 
@@ -665,3 +633,305 @@ class TestFancyTreeModuleRenderData(TestCase):
         """test_returns_empty_string"""
         mock_module = module_fancy_tree_views.FancyTreeModule()
         self.assertEqual(mock_module._render_data(MagicMock()), "")
+
+
+class TestFancyTreeModuleGetEtag(TestCase):
+    """Unit tests for the `_get_etag` method of `FancyTreeModule` class."""
+
+    def setUp(self):
+        """setUp"""
+        self.mock_module = module_fancy_tree_views.FancyTreeModule()
+        self.mock_module.module_refinement = (
+            MagicMock(),
+            Mock(id=1),
+            Mock(hash="mock_hash"),
+        )
+        self.query = {
+            "xml_xpath": "/ns:Resource/ns:role/ns:type",
+            "module_id": "mock_module_id",
+            "data": "<role><type>a</type></role>",
+        }
+
+    def _get_etag(self, **query):
+        request = RequestFactory().get(
+            "/module-fancy-tree-registry", dict(self.query, **query)
+        )
+        return self.mock_module._get_etag(request)
+
+    @patch.object(module_fancy_tree_views, "version_utils")
+    def test_etag_is_stable(self, mock_version_utils):
+        """test_etag_is_stable"""
+        mock_version_utils.get_refinement_version.return_value = 1
+
+        self.assertEqual(self._get_etag(), self._get_etag())
+
+    @patch.object(module_fancy_tree_views, "version_utils")
+    def test_etag_changes_with_data(self, mock_version_utils):
+        """test_etag_changes_with_data"""
+        mock_version_utils.get_refinement_version.return_value = 1
+
+        self.assertNotEqual(
+            self._get_etag(),
+            self._get_etag(data="<role><type>b</type></role>"),
+        )
+
+    @patch.object(module_fancy_tree_views, "version_utils")
+    def test_etag_changes_with_module_id(self, mock_version_utils):
+        """test_etag_changes_with_module_id"""
+        mock_version_utils.get_refinement_version.return_value = 1
+
+        self.assertNotEqual(
+            self._get_etag(), self._get_etag(module_id="mock_other_id")
+        )
+
+    @patch.object(module_fancy_tree_views, "version_utils")
+    def test_etag_changes_with_refinement_version(self, mock_version_utils):
+        """test_etag_changes_with_refinement_version"""
+        mock_version_utils.get_refinement_version.return_value = 1
+        etag = self._get_etag()
+        mock_version_utils.get_refinement_version.return_value = 2
+
+        self.assertNotEqual(etag, self._get_etag())
+
+    @patch.object(module_fancy_tree_views, "version_utils")
+    def test_etag_changes_with_render_version(self, mock_version_utils):
+        """test_etag_changes_with_render_version"""
+        mock_version_utils.get_refinement_version.return_value = 1
+        mock_version_utils.get_render_version.return_value = "mock_version"
+        etag = self._get_etag()
+        mock_version_utils.get_render_version.return_value = "mock_other"
+
+        self.assertNotEqual(etag, self._get_etag())
+
+    @patch.object(module_fancy_tree_views, "version_utils")
+    def test_etag_changes_with_template_hash(self, mock_version_utils):
+        """test_etag_changes_with_template_hash"""
+        mock_version_utils.get_refinement_version.return_value = 1
+        etag = self._get_etag()
+        self.mock_module.module_refinement[2].hash = "mock_other_hash"
+
+        self.assertNotEqual(etag, self._get_etag())
+
+    def test_missing_xml_xpath_returns_none(self):
+        """test_missing_xml_xpath_returns_none"""
+        del self.query["xml_xpath"]
+
+        self.assertIsNone(self._get_etag())
+
+    @patch.object(module_fancy_tree_views, "refinement_utils")
+    @patch.object(module_fancy_tree_views, "template_registry_api")
+    def test_refinement_lookup_exception_returns_none(
+        self, mock_template_registry_api, mock_refinement_utils
+    ):
+        """test_refinement_lookup_exception_returns_none"""
+        self.mock_module.module_refinement = None
+        mock_refinement_utils.parse_xml_xpath.side_effect = Exception()
+
+        self.assertIsNone(self._get_etag())
+
+
+class TestFancyTreeModuleGet(TestCase):
+    """Unit tests for the `_get` method of `FancyTreeModule` class."""
+
+    def setUp(self):
+        """setUp"""
+        self.mock_module = module_fancy_tree_views.FancyTreeModule()
+        self.mock_module._get_etag = MagicMock(return_value='"mock_etag"')
+
+    @patch.object(module_fancy_tree_views.FancyTreeModule, "_render")
+    def test_matching_etag_returns_not_modified(self, mock_render):
+        """test_matching_etag_returns_not_modified"""
+        request = RequestFactory().get(
+            "/module-fancy-tree-registry",
+            HTTP_IF_NONE_MATCH='"mock_etag"',
+        )
+
+        self.mock_module._save_rendered_data = MagicMock()
+
+        response = self.mock_module._get(request)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], '"mock_etag"')
+        mock_render.assert_not_called()
+        self.mock_module._save_rendered_data.assert_called_with(request)
+
+    @patch.object(module_fancy_tree_views.FancyTreeModule, "_render")
+    def test_other_etag_renders_module(self, mock_render):
+        """test_other_etag_renders_module"""
+        mock_render.return_value = HttpResponse()
+        request = RequestFactory().get(
+            "/module-fancy-tree-registry",
+            HTTP_IF_NONE_MATCH='"mock_other_etag"',
+        )
+
+        response = self.mock_module._get(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"mock_etag"')
+        mock_render.assert_called_with(request)
+
+    @patch.object(module_fancy_tree_views.FancyTreeModule, "_render")
+    def test_no_etag_renders_module_without_etag(self, mock_render):
+        """test_no_etag_renders_module_without_etag"""
+        mock_render.return_value = HttpResponse()
+        self.mock_module._get_etag.return_value = None
+
+        response = self.mock_module._get(
+            RequestFactory().get("/module-fancy-tree-registry")
+        )
+
+        self.assertFalse(response.has_header("ETag"))
+
+
+class TestFancyTreeModuleSaveRenderedData(TestCase):
+    """Unit tests for the `_save_rendered_data` method of `FancyTreeModule`
+    class."""
+
+    def setUp(self):
+        """setUp"""
+        self.mock_module = module_fancy_tree_views.FancyTreeModule()
+        self.mock_module._save_module_data = MagicMock()
+        self.request = RequestFactory().get(
+            "/module-fancy-tree-registry",
+            {"module_id": "mock_module_id", "data": "mock_data"},
+        )
+
+    def test_rendered_data_is_saved(self):
+        """test_rendered_data_is_saved"""
+        self.mock_module._save_rendered_data(self.request)
+
+        self.assertEqual(self.mock_module.data, "mock_data")
+        self.mock_module._save_module_data.assert_called_with(
+            "mock_module_id", self.request
+        )
+
+    def test_save_exception_raises_module_error(self):
+        """test_save_exception_raises_module_error"""
+        self.mock_module._save_module_data.side_effect = Exception(
+            "mock_save_module_data_exception"
+        )
+
+        with self.assertRaises(ModuleError) as context:
+            self.mock_module._save_rendered_data(self.request)
+
+        self.assertIn(
+            "mock_save_module_data_exception", str(context.exception)
+        )
+
+
+class TestFancyTreeModuleRender(TestCase):
+    """Unit tests for the `_render` method of `FancyTreeModule` class."""
+
+    def setUp(self):
+        """setUp"""
+        self.mock_module = module_fancy_tree_views.FancyTreeModule()
+        self.mock_module.render_parameters = {
+            "module_id": "mock_module_id",
+            "xml_xpath": "mock_xml_xpath",
+            "url": "mock_url",
+            "data": "mock_data",
+        }
+        self.mock_module._render_module = MagicMock(return_value="")
+        self.mock_module._save_module_data = MagicMock()
+        self.request = RequestFactory().post("/module-fancy-tree-registry")
+
+    @patch.object(module_fancy_tree_views.AbstractModule, "render_template")
+    def test_renders_module_template(self, mock_render_template):
+        """test_renders_module_template"""
+        mock_render_template.return_value = "mock_html"
+
+        response = self.mock_module._render(self.request)
+
+        self.assertEqual(response.content, b"mock_html")
+        self.mock_module._save_module_data.assert_called_with(
+            "mock_module_id", self.request
+        )
+
+    def test_render_module_exception_raises_module_error(self):
+        """test_render_module_exception_raises_module_error"""
+        self.mock_module._render_module.side_effect = Exception(
+            "mock_render_module_exception"
+        )
+
+        with self.assertRaises(ModuleError) as context:
+            self.mock_module._render(self.request)
+
+        self.assertEqual(
+            str(context.exception),
+            "Something went wrong during module initialization: "
+            "mock_render_module_exception",
+        )
+        self.mock_module._save_module_data.assert_not_called()
+
+
+class TestFancyTreeModuleReadRenderParameters(TestCase):
+    """Unit tests for the `_read_render_parameters` method of
+    `FancyTreeModule` class."""
+
+    def setUp(self):
+        """setUp"""
+        self.parameters = {
+            "module_id": "mock_module_id",
+            "xml_xpath": "/ns:Resource/ns:role/ns:type",
+            "data": "<role><type>a</type></role>",
+        }
+
+    def _read(self, body, **headers):
+        request = RequestFactory().post(
+            "/module-fancy-tree-registry",
+            body,
+            content_type="application/json",
+            headers=headers,
+        )
+        return module_fancy_tree_views.FancyTreeModule._read_render_parameters(
+            request
+        )
+
+    def test_json_body_is_read(self):
+        """test_json_body_is_read"""
+        self.assertEqual(
+            self._read(json.dumps(self.parameters)), self.parameters
+        )
+
+    def test_gzip_body_is_read(self):
+        """test_gzip_body_is_read"""
+        self.assertEqual(
+            self._read(
+                gzip.compress(json.dumps(self.parameters).encode()),
+                content_encoding="gzip",
+            ),
+            self.parameters,
+        )
+
+    def test_other_parameters_are_ignored(self):
+        """test_other_parameters_are_ignored"""
+        self.assertEqual(
+            self._read(json.dumps(dict(self.parameters, other="other"))),
+            self.parameters,
+        )
+
+    def test_missing_xml_xpath_raises_value_error(self):
+        """test_missing_xml_xpath_raises_value_error"""
+        del self.parameters["xml_xpath"]
+
+        with self.assertRaises(ValueError):
+            self._read(json.dumps(self.parameters))
+
+    def test_parameter_not_string_raises_value_error(self):
+        """test_parameter_not_string_raises_value_error"""
+        self.parameters["data"] = ["<role><type>a</type></role>"]
+
+        with self.assertRaises(ValueError):
+            self._read(json.dumps(self.parameters))
+
+    def test_invalid_json_raises_value_error(self):
+        """test_invalid_json_raises_value_error"""
+        for body in ("{", "[]", b"\xff"):
+            with self.subTest(body=body):
+                with self.assertRaises(ValueError):
+                    self._read(body)
+
+    def test_invalid_gzip_body_raises_value_error(self):
+        """test_invalid_gzip_body_raises_value_error"""
+        with self.assertRaises(ValueError):
+            self._read(json.dumps(self.parameters), content_encoding="gzip")
@@ -0,0 +1,358 @@
+"""Unit tests for the `core_module_fancy_tree_registry_app.views.widgets` package."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core_main_registry_app.utils.fancytree.widget import FancyTreeWidget
+from core_module_fancy_tree_registry_app.utils import (
+    version as version_utils,
+)
+from core_module_fancy_tree_registry_app.utils.category_tree import (
+    CategoryTree,
+)
+from core_module_fancy_tree_registry_app.views import (
+    widgets as widgets_module,
+)
+from core_module_fancy_tree_registry_app.views.widgets import (
+    CachedFancyTreeWidget,
+    LazyFancyTreeWidget,
+    VirtualFancyTreeWidget,
+)
+
+
+class TestCachedFancyTreeWidgetRender(SimpleTestCase):
+    """Unit tests for the `render` method of `CachedFancyTreeWidget` class."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        self.widget = CachedFancyTreeWidget(
+            queryset=MagicMock(), select_mode=2, refinement_id=1
+        )
+        self.attrs = {"id": "id_refinement-field"}
+
+    @patch.object(FancyTreeWidget, "render")
+    def test_no_refinement_id_renders_without_cache(self, mock_render):
+        """test_no_refinement_id_renders_without_cache"""
+        mock_render.return_value = "mock_tree"
+        widget = CachedFancyTreeWidget(queryset=MagicMock())
+
+        widget.render("refinement-field", ["1"], self.attrs)
+        widget.render("refinement-field", ["1"], self.attrs)
+
+        self.assertEqual(mock_render.call_count, 2)
+
+    @patch.object(CachedFancyTreeWidget, "render_payload")
+    def test_tree_rendered_once_without_selection(self, mock_render_payload):
+        """test_tree_rendered_once_without_selection"""
+        mock_render_payload.return_value = "mock_tree"
+
+        self.widget.render("refinement-field", ["1"], self.attrs)
+        self.widget.render("refinement-field", ["2"], self.attrs)
+
+        mock_render_payload.assert_called_once_with()
+
+    @patch.object(CachedFancyTreeWidget, "render_payload")
+    def test_tree_rendered_once_for_concurrent_requests(
+        self, mock_render_payload
+    ):
+        """test_tree_rendered_once_for_concurrent_requests"""
+        requests = 50
+        barrier = threading.Barrier(requests)
+        # let the other requests miss the cache meanwhile
+        mock_render_payload.side_effect = lambda: time.sleep(0.1) or "tree"
+
+        def render(_):
+            barrier.wait()
+            return self.widget.render("refinement-field", [], self.attrs)
+
+        with ThreadPoolExecutor(max_workers=requests) as executor:
+            results = list(executor.map(render, range(requests)))
+
+        mock_render_payload.assert_called_once_with()
+        self.assertEqual(results, ["tree"] * requests)
+
+    @patch.object(CachedFancyTreeWidget, "render_payload")
+    def test_tree_shared_by_fields(self, mock_render_payload):
+        """test_tree_shared_by_fields"""
+        mock_render_payload.return_value = (
+            f'<div id="{widgets_module.PAYLOAD_ID}" '
+            f'name="{widgets_module.PAYLOAD_NAME}"></div>'
+        )
+
+        self.widget.render("refinement-field", [], self.attrs)
+        result = self.widget.render(
+            "refinement-other", [], {"id": "id_refinement-other"}
+        )
+
+        mock_render_payload.assert_called_once_with()
+        self.assertEqual(
+            result,
+            '<div id="id_refinement-other" name="refinement-other"></div>',
+        )
+
+    @patch.object(CachedFancyTreeWidget, "render_payload")
+    def test_tree_rendered_again_after_version_bump(self, mock_render_payload):
+        """test_tree_rendered_again_after_version_bump"""
+        mock_render_payload.return_value = "mock_tree"
+
+        self.widget.render("refinement-field", [], self.attrs)
+        version_utils.bump_refinement_version(1)
+        self.widget.render("refinement-field", [], self.attrs)
+
+        self.assertEqual(mock_render_payload.call_count, 2)
+
+    @patch.object(CachedFancyTreeWidget, "render_payload")
+    def test_tree_not_shared_by_widgets_with_other_settings(
+        self, mock_render_payload
+    ):
+        """test_tree_not_shared_by_widgets_with_other_settings"""
+        mock_render_payload.return_value = "mock_tree"
+        widgets = [
+            self.widget,
+            CachedFancyTreeWidget(
+                queryset=MagicMock(), select_mode=3, refinement_id=1
+            ),
+            CachedFancyTreeWidget(
+                queryset=MagicMock(),
+                select_mode=2,
+                count_mode=True,
+                refinement_id=1,
+            ),
+            CachedFancyTreeWidget(
+                queryset=MagicMock(),
+                select_mode=2,
+                refinement_id=1,
+                attrs={"class": "mock_class"},
+            ),
+        ]
+        labelled_widget = CachedFancyTreeWidget(
+            queryset=MagicMock(), select_mode=2, refinement_id=1
+        )
+        labelled_widget.choices = MagicMock()
+        labelled_widget.choices.field.label = "mock_label"
+        widgets.append(labelled_widget)
+
+        for widget in widgets:
+            widget.render("refinement-field", [], self.attrs)
+
+        self.assertEqual(mock_render_payload.call_count, len(widgets))
+
+    @patch.object(CachedFancyTreeWidget, "render_payload")
+    def test_no_selection_returns_cached_tree(self, mock_render_payload):
+        """test_no_selection_returns_cached_tree"""
+        mock_render_payload.return_value = "mock_tree"
+
+        self.assertEqual(
+            self.widget.render("refinement-field", [], self.attrs),
+            "mock_tree",
+        )
+
+    @patch.object(CachedFancyTreeWidget, "render_payload")
+    def test_selection_is_added_to_cached_tree(self, mock_render_payload):
+        """test_selection_is_added_to_cached_tree"""
+        mock_render_payload.return_value = "mock_tree"
+
+        result = self.widget.render("refinement-field", [2, 1], self.attrs)
+
+        self.assertTrue(result.startswith("mock_tree<script"))
+        self.assertIn(
+            '(fancytree_data_id_refinement_field, ["1", "2"]', result
+        )
+
+
+class TestCachedFancyTreeWidgetRenderSelection(SimpleTestCase):
+    """Unit tests for the `render_selection` method of
+    `CachedFancyTreeWidget` class."""
+
+    def test_scalar_value_is_selected(self):
+        """test_scalar_value_is_selected"""
+        result = CachedFancyTreeWidget.render_selection(
+            2, {"id": "id_refinement-field"}
+        )
+
+        self.assertIn('(fancytree_data_id_refinement_field, ["2"]', result)
+
+
+class TestCachedFancyTreeWidgetRenderPayload(SimpleTestCase):
+    """Unit tests for the `render_payload` method of `CachedFancyTreeWidget`
+    class."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        self.widget = CachedFancyTreeWidget(
+            queryset=MagicMock(), select_mode=2, refinement_id=1
+        )
+        self.attrs = {"id": "id_refinement-field"}
+
+    @patch.object(widgets_module, "category_tree_utils")
+    def test_field_name_and_id_are_placeholders(
+        self, mock_category_tree_utils
+    ):
+        """test_field_name_and_id_are_placeholders"""
+        mock_category_tree_utils.get_category_tree.return_value = CategoryTree(
+            [(1, "a", "a", "a", "R.role.type", None)]
+        )
+
+        result = self.widget.render_payload()
+
+        self.assertIn(
+            f'<input type="checkbox" name="{widgets_module.PAYLOAD_NAME}" '
+            f'value="1" id="{widgets_module.PAYLOAD_ID}_1">',
+            result,
+        )
+        self.assertNotIn("refinement-field", result)
+
+    @patch.object(widgets_module, "category_tree_utils")
+    def test_widget_attrs_are_set_on_checkboxes(
+        self, mock_category_tree_utils
+    ):
+        """test_widget_attrs_are_set_on_checkboxes"""
+        mock_category_tree_utils.get_category_tree.return_value = CategoryTree(
+            [(1, "a", "a", "a", "R.role.type", None)]
+        )
+        widget = CachedFancyTreeWidget(
+            queryset=MagicMock(),
+            refinement_id=1,
+            attrs={"class": "mock_class", "id": "mock_id"},
+        )
+
+        result = widget.render_payload()
+
+        self.assertIn(
+            f'value="1" class="mock_class" id="{widgets_module.PAYLOAD_ID}_1">',
+            result,
+        )
+
+    @patch.object(widgets_module, "category_tree_utils")
+    def test_renders_checkboxes_and_nodes_of_category_tree(
+        self, mock_category_tree_utils
+    ):
+        """test_renders_checkboxes_and_nodes_of_category_tree"""
+        mock_category_tree_utils.get_category_tree.return_value = CategoryTree(
+            [
+                (1, "a", "a__category", "a", "R.role.type", None),
+                (2, "unspecified a", "a", "unspecified-a", "R.role.type", 1),
+                (3, "</script>&", "a:b", "b", "R.role.type", 1),
+            ]
+        )
+
+        result = self.widget.render("refinement-field", [], self.attrs)
+
+        self.assertIn(
+            '<input type="checkbox" name="refinement-field" value="3" '
+            'id="id_refinement-field_3"> &lt;/script&gt;&amp;</label>',
+            result,
+        )
+        self.assertNotIn('value="2"', result)
+        self.assertIn(
+            'var fancytree_data_id_refinement_field = [{"title": "a", '
+            '"key": 1, "folder": true, "children": [{"title": "<\\/script>&", '
+            '"key": 3}]}];',
+            result,
+        )
+        self.assertIn('$("#id_refinement-field").fancytree(', result)
+
+
+class TestVirtualFancyTreeWidgetRender(SimpleTestCase):
+    """Unit tests for the `render` method of `VirtualFancyTreeWidget` class."""
+
+    def setUp(self):
+        """setUp"""
+        cache.clear()
+        self.widget = VirtualFancyTreeWidget(
+            queryset=MagicMock(), select_mode=2, refinement_id=1
+        )
+        self.attrs = {"id": "id_refinement-field"}
+
+    @patch.object(widgets_module, "category_tree_utils")
+    def test_renders_viewport_without_checkboxes(
+        self, mock_category_tree_utils
+    ):
+        """test_renders_viewport_without_checkboxes"""
+        mock_category_tree_utils.get_category_tree.return_value = CategoryTree(
+            [(1, "a", "a", "a", "R.role.type", None)]
+        )
+
+        result = self.widget.render("refinement-field", [], self.attrs)
+
+        self.assertNotIn('type="checkbox"', result)
+        self.assertIn(
+            'id="id_refinement-field_values" data-name="refinement-field"',
+            result,
+        )
+        self.assertIn('extensions: ["glyph", "grid"]', result)
+        self.assertIn(
+            'var fancytree_data_id_refinement_field = [{"title": "a", '
+            '"key": 1}];',
+            result,
+        )
+
+    @patch.object(VirtualFancyTreeWidget, "render_payload")
+    def test_payload_is_not_shared_with_cached_widget(
+        self, mock_render_payload
+    ):
+        """test_payload_is_not_shared_with_cached_widget"""
+        mock_render_payload.return_value = "mock_tree"
+
+        self.assertNotEqual(
+            self.widget.get_payload_cache_key(),
+            CachedFancyTreeWidget(
+                queryset=MagicMock(), refinement_id=1
+            ).get_payload_cache_key(),
+        )
+        self.assertEqual(
+            self.widget.render("refinement-field", [], self.attrs),
+            "mock_tree",
+        )
+
+
+class TestLazyFancyTreeWidgetRender(SimpleTestCase):
+    """Unit tests for the `render` method of `LazyFancyTreeWidget` class."""
+
+    def setUp(self):
+        """setUp"""
+        self.widget = LazyFancyTreeWidget(
+            queryset=MagicMock(), select_mode=2, refinement_id=1
+        )
+        self.attrs = {"id": "id_refinement-field"}
+
+    @patch.object(widgets_module, "tree_utils")
+    def test_get_lazy_tree_called_with_selection(self, mock_tree_utils):
+        """test_get_lazy_tree_called_with_selection"""
+        mock_tree_utils.get_lazy_tree.return_value = []
+
+        self.widget.render("refinement-field", ["1"], self.attrs)
+
+        mock_tree_utils.get_lazy_tree.assert_called_with(1, ["1"])
+
+    @patch.object(widgets_module, "tree_utils")
+    def test_renders_children_url_and_source(self, mock_tree_utils):
+        """test_renders_children_url_and_source"""
+        mock_tree_utils.get_lazy_tree.return_value = [
+            {"title": "</script>", "key": 1}
+        ]
+
+        result = self.widget.render("refinement-field", None, self.attrs)
+
+        self.assertIn(
+            'data-children-url="/module-fancy-tree-registry-children"', result
+        )
+        self.assertIn('data-refinement-id="1"', result)
+        self.assertIn('id="id_refinement-field_source"', result)
+        self.assertNotIn('"</script>"', result)
+
+    @patch.object(widgets_module, "tree_utils")
+    def test_scalar_value_is_selected(self, mock_tree_utils):
+        """test_scalar_value_is_selected"""
+        mock_tree_utils.get_lazy_tree.return_value = []
+
+        self.widget.render("refinement-field", "1", self.attrs)
+
+        mock_tree_utils.get_lazy_tree.assert_called_with(1, ["1"])